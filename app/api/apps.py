@@ -1,6 +1,16 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        # Connect the cache invalidation signal handlers
+        from . import signals  # noqa: F401
+        # Register the shared cache check
+        from . import checks  # noqa: F401
+        # The blacklist prefilter syncs on the blacklisted_at column of simplejwt's table
+        from .token_blacklist import create_blacklisted_at_index
+        post_migrate.connect(create_blacklisted_at_index, sender=self)
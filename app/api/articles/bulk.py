@@ -0,0 +1,124 @@
+import datetime
+from django.db import transaction
+from api.models import User
+from api.tags.models import Tag
+from .models import Article
+from .serializers import ArticleBulkItemSerializer, ArticleSerializer
+
+
+class ArticleBulkWriter:
+    """
+    Validate and write a batch of articles with a fixed number of queries.
+    Items with an id update that article, the others are created.
+    """
+
+    def __init__(self, items, user):
+        self.items = items
+        self.user = user
+        self.errors = [{} for _ in items]
+        self.validated = [None] * len(items)
+
+    def is_valid(self):
+        for index, item in enumerate(self.items):
+            serializer = ArticleBulkItemSerializer(data=item)
+            if serializer.is_valid():
+                self.validated[index] = serializer.validated_data
+            else:
+                self.errors[index] = serializer.errors
+        self.resolve_references()
+        return not any(self.errors)
+
+    def valid_items(self):
+        return [(index, item) for index, item in enumerate(self.validated) if item is not None]
+
+    def resolve_references(self):
+        """Check every referenced user, tag and article with one query each"""
+        items = self.valid_items()
+        author_ids = {author for _, item in items for author in item['authors']}
+        tag_names = {tag for _, item in items for tag in item['tags']}
+        article_ids = [item['id'] for _, item in items if 'id' in item]
+
+        self.users = set(User.objects.filter(id__in=author_ids).values_list('id', flat=True))
+        self.tags = dict(Tag.objects.filter(name__in=tag_names).values_list('name', 'id'))
+        self.articles = Article.objects.in_bulk(article_ids)
+        if self.user.is_staff:
+            editable = set(self.articles)
+        else:
+            editable = set(Article.objects.filter(pk__in=article_ids).editable_by(self.user).values_list('id', flat=True))
+
+        seen_ids = set()
+        for index, item in items:
+            errors = {}
+            missing_authors = [author for author in item['authors'] if author not in self.users]
+            if missing_authors:
+                errors['authors'] = [f'Invalid pk "{author}" - object does not exist.' for author in missing_authors]
+            missing_tags = [tag for tag in item['tags'] if tag not in self.tags]
+            if missing_tags:
+                errors['tags'] = [f'Object with name={tag} does not exist.' for tag in missing_tags]
+            if 'id' in item:
+                if item['id'] in seen_ids:
+                    errors['id'] = ['Article appears more than once in the batch.']
+                elif item['id'] not in self.articles:
+                    errors['id'] = ['Article not found.']
+                elif item['id'] not in editable:
+                    errors['id'] = ['You do not have permission to edit this article.']
+                seen_ids.add(item['id'])
+            self.errors[index] = errors
+
+    @transaction.atomic
+    def save(self):
+        """Write the whole batch in one transaction and return (status, article id) per item"""
+        items = [item for _, item in self.valid_items()]
+        created = [Article(title=item['title'], abstract=item['abstract']) for item in items if 'id' not in item]
+        Article.objects.bulk_create(created)
+
+        updated = []
+        for item in items:
+            if 'id' in item:
+                article = self.articles[item['id']]
+                article.title = item['title']
+                article.abstract = item['abstract']
+                article.publication_date = datetime.date.today()
+                updated.append(article)
+        if updated:
+            Article.objects.bulk_update(updated, ['title', 'abstract', 'publication_date'])
+
+        # Replace the relations of updated articles, then insert every link in bulk
+        author_links = Article.authors.through
+        tag_links = Article.tags.through
+        updated_ids = [article.id for article in updated]
+        author_links.objects.filter(article_id__in=updated_ids).delete()
+        tag_links.objects.filter(article_id__in=updated_ids).delete()
+
+        created_articles = iter(created)
+        outcome, new_author_links, new_tag_links = [], [], []
+        for item in items:
+            if 'id' in item:
+                article_id, item_status, authors = item['id'], 'updated', item['authors']
+            else:
+                # Like ArticleView.perform_create, the current user is added as an author
+                article_id, item_status = next(created_articles).id, 'created'
+                authors = [*item['authors'], self.user.id]
+            outcome.append((item_status, article_id))
+            new_author_links.extend(
+                author_links(article_id=article_id, user_id=author) for author in dict.fromkeys(authors)
+            )
+            new_tag_links.extend(
+                tag_links(article_id=article_id, tag_id=self.tags[tag]) for tag in dict.fromkeys(item['tags'])
+            )
+        author_links.objects.bulk_create(new_author_links)
+        tag_links.objects.bulk_create(new_tag_links)
+        return outcome
+
+    def results(self, outcome=None):
+        """Per-item results: the written article, or the validation errors"""
+        if outcome is None:
+            return [
+                {'status': 'invalid', 'errors': errors} if errors else {'status': 'valid'}
+                for errors in self.errors
+            ]
+        articles = Article.objects.prefetch_related('authors', 'tags').in_bulk([pk for _, pk in outcome])
+        return [
+            {'status': item_status, 'article': ArticleSerializer(articles[pk]).data}
+            for item_status, pk in outcome
+        ]
@@ -0,0 +1,306 @@
+import csv
+import datetime
+from django.core.management.color import no_style
+from django.db import connection, transaction
+from django.db.models import CharField, Value
+from django.db.models.functions import Concat
+from api.cache_versions import bump_model_version
+from api.models import User
+from api.tags.models import Tag
+from .models import Article
+
+# Column layout of the CSV export, which the import reads back
+CSV_COLUMNS = ['ID', 'title', 'abstract', 'authors', 'tags', 'publication_date']
+# Separator of the author and tag names inside one cell
+NAME_SEPARATOR = ', '
+
+
+class CSVImportError(Exception):
+    """The file cannot be imported at all (as opposed to a rejected row)"""
+
+
+class ImportRow:
+    __slots__ = ('line', 'id', 'title', 'abstract', 'authors', 'tags', 'publication_date',
+                 'author_ids', 'tag_ids')
+
+    def __init__(self, line, id, title, abstract, authors, tags, publication_date):
+        self.line = line
+        self.id = id
+        self.title = title
+        self.abstract = abstract
+        self.authors = authors
+        self.tags = tags
+        self.publication_date = publication_date
+
+
+class ArticleCSVImporter:
+    """
+    Load articles from the CSV export format.
+    The file is read as a stream and written in batches, each in its own transaction,
+    so memory stays bounded whatever the file size. Rows with an existing ID update
+    that article, other rows are inserted (keeping their ID when one is given).
+    Authors are matched by full name, unknown tags are created.
+    """
+    max_reported_errors = 100
+
+    def __init__(self, stream, batch_size=5000, use_copy=None):
+        self.stream = stream
+        self.batch_size = batch_size
+        # COPY into a staging table is used on PostgreSQL, batched ORM writes elsewhere
+        self.use_copy = connection.vendor == 'postgresql' if use_copy is None else use_copy
+        self.inserted = self.updated = self.rejected = 0
+        self.errors = []
+
+    def run(self):
+        reader = csv.reader(self.stream)
+        header = next(reader, None)
+        if header != CSV_COLUMNS:
+            raise CSVImportError(f"Expected the columns {', '.join(CSV_COLUMNS)}")
+
+        if self.use_copy:
+            self.create_staging_table()
+        batch = []
+        for row in reader:
+            parsed = self.parse_row(row, reader.line_num)
+            if parsed is not None:
+                batch.append(parsed)
+            if len(batch) >= self.batch_size:
+                self.import_batch(batch)
+                batch = []
+        if batch:
+            self.import_batch(batch)
+        if self.use_copy:
+            with connection.cursor() as cursor:
+                cursor.execute("DROP TABLE article_import_staging")
+        return self.summary()
+
+    def create_staging_table(self):
+        """
+        The temporary table every COPY batch goes through, created once per run and emptied
+        before each batch. It lives until the end of the session, or of an enclosing
+        transaction that rolls back; a run that failed may have left it behind.
+        """
+        with connection.cursor() as cursor:
+            cursor.execute(
+                "CREATE TEMPORARY TABLE IF NOT EXISTS article_import_staging ("
+                " id bigint, title varchar(200), abstract text, publication_date date,"
+                " author_ids bigint[], tag_ids bigint[]"
+                ")"
+            )
+
+    def summary(self):
+        return {
+            'inserted': self.inserted,
+            'updated': self.updated,
+            'rejected': self.rejected,
+            # Parse errors are found before batch errors, report them in file order
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+        }
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({'line': line, 'error': message})
+
+    def parse_row(self, row, line):
+        if len(row) != len(CSV_COLUMNS):
+            return self.reject(line, f"Expected {len(CSV_COLUMNS)} columns, got {len(row)}")
+        article_id, title, abstract, authors, tags, publication_date = row
+        try:
+            article_id = int(article_id) if article_id else None
+            if article_id is not None and article_id < 1:
+                raise ValueError
+        except ValueError:
+            return self.reject(line, f"Invalid ID '{article_id}'")
+        if not title or len(title) > Article._meta.get_field('title').max_length:
+            return self.reject(line, "Title is empty or too long")
+        try:
+            publication_date = (
+                datetime.date.fromisoformat(publication_date) if publication_date else datetime.date.today()
+            )
+        except ValueError:
+            return self.reject(line, f"Invalid publication date '{publication_date}'")
+        tags = list(dict.fromkeys(split_names(tags)))
+        if any(len(tag) > Tag._meta.get_field('name').max_length for tag in tags):
+            return self.reject(line, "Tag name is too long")
+        return ImportRow(line, article_id, title, abstract, list(dict.fromkeys(split_names(authors))), tags,
+                         publication_date)
+
+    def import_batch(self, rows):
+        rows = self.drop_duplicate_ids(rows)
+        with transaction.atomic():
+            rows = self.resolve_authors(rows)
+            rows = self.resolve_tags(rows)
+            if not rows:
+                return
+            if self.use_copy:
+                inserted, updated = self.write_with_copy(rows)
+            else:
+                inserted, updated = self.write_with_orm(rows)
+        self.inserted += inserted
+        self.updated += updated
+        bump_model_version(Article)
+
+    def drop_duplicate_ids(self, rows):
+        """A later row with the same ID replaces an earlier one of the batch"""
+        last_line = {row.id: row.line for row in rows if row.id is not None}
+        kept = []
+        for row in rows:
+            if row.id is not None and last_line[row.id] != row.line:
+                self.reject(row.line, f"ID {row.id} is repeated on line {last_line[row.id]}, which replaces it")
+            else:
+                kept.append(row)
+        return kept
+
+    def resolve_authors(self, rows):
+        """Match author names with one query per batch, names must identify exactly one user"""
+        names = {name for row in rows for name in row.authors}
+        users = {}
+        matches = User.objects.annotate(
+            full_name=Concat('first_name', Value(' '), 'last_name', output_field=CharField())
+        ).filter(full_name__in=names).values_list('full_name', 'id')
+        for full_name, user_id in matches:
+            users.setdefault(full_name, []).append(user_id)
+
+        resolved = []
+        for row in rows:
+            unknown = [name for name in row.authors if len(users.get(name, ())) != 1]
+            if unknown:
+                self.reject(row.line, f"Unknown or ambiguous author(s): {', '.join(unknown)}")
+                continue
+            row.author_ids = list(dict.fromkeys(users[name][0] for name in row.authors))
+            resolved.append(row)
+        return resolved
+
+    def resolve_tags(self, rows):
+        """Look up tags with one query per batch, creating the missing ones in bulk"""
+        names = {name for row in rows for name in row.tags}
+        tags = dict(Tag.objects.filter(name__in=names).values_list('name', 'id'))
+        missing = names - tags.keys()
+        if missing:
+            Tag.objects.bulk_create([Tag(name=name) for name in missing], ignore_conflicts=True)
+            tags.update(Tag.objects.filter(name__in=missing).values_list('name', 'id'))
+            bump_model_version(Tag)
+        for row in rows:
+            row.tag_ids = [tags[name] for name in row.tags]
+        return rows
+
+    def write_with_copy(self, rows):
+        """
+        COPY the batch into a staging table, then upsert articles and replace their
+        author/tag links with a few set-based statements
+        """
+        quote = connection.ops.quote_name
+        article_table = quote(Article._meta.db_table)
+        author_links = Article.authors.through._meta
+        tag_links = Article.tags.through._meta
+        authors_field = Article._meta.get_field('authors')
+        tags_field = Article._meta.get_field('tags')
+
+        with connection.cursor() as cursor:
+            cursor.execute("TRUNCATE article_import_staging")
+            with cursor.copy(
+                "COPY article_import_staging (id, title, abstract, publication_date, author_ids, tag_ids)"
+                " FROM STDIN"
+            ) as copy:
+                for row in rows:
+                    copy.write_row((row.id, row.title, row.abstract, row.publication_date,
+                                    row.author_ids, row.tag_ids))
+
+            # Explicit IDs may be ahead of the sequence, move it past them before drawing new ones
+            cursor.execute(
+                "SELECT setval(pg_get_serial_sequence(%s, 'id'),"
+                " GREATEST(MAX(id), nextval(pg_get_serial_sequence(%s, 'id'))))"
+                " FROM article_import_staging HAVING COUNT(id) > 0",
+                [article_table, article_table],
+            )
+            cursor.execute(
+                "UPDATE article_import_staging SET id = nextval(pg_get_serial_sequence(%s, 'id'))"
+                " WHERE id IS NULL",
+                [article_table],
+            )
+            cursor.execute(
+                f"WITH upserted AS ("
+                f" INSERT INTO {article_table} (id, title, abstract, publication_date, updated_at, comment_count)"
+                f" SELECT id, title, abstract, publication_date, now(), 0 FROM article_import_staging"
+                f" ON CONFLICT (id) DO UPDATE SET title = EXCLUDED.title, abstract = EXCLUDED.abstract,"
+                f" publication_date = EXCLUDED.publication_date, updated_at = EXCLUDED.updated_at"
+                f" RETURNING (xmax = 0) AS inserted"
+                f") SELECT COUNT(*) FILTER (WHERE inserted), COUNT(*) FILTER (WHERE NOT inserted) FROM upserted"
+            )
+            inserted, updated = cursor.fetchone()
+
+            for links, field, ids_column in (
+                (author_links, authors_field, 'author_ids'),
+                (tag_links, tags_field, 'tag_ids'),
+            ):
+                table = quote(links.db_table)
+                source = quote(field.m2m_column_name())
+                target = quote(field.m2m_reverse_name())
+                cursor.execute(
+                    f"DELETE FROM {table} WHERE {source} IN (SELECT id FROM article_import_staging)"
+                )
+                cursor.execute(
+                    f"INSERT INTO {table} ({source}, {target})"
+                    f" SELECT s.id, related.id FROM article_import_staging s"
+                    f" CROSS JOIN LATERAL unnest(s.{ids_column}) AS related(id)"
+                    f" ON CONFLICT DO NOTHING"
+                )
+            cursor.execute("SELECT id FROM article_import_staging")
+            ids = [article_id for article_id, in cursor.fetchall()]
+
+        Article.objects.filter(pk__in=ids).update_search_vector()
+        return inserted, updated
+
+    def write_with_orm(self, rows):
+        """Batched ORM fallback for databases without COPY"""
+        existing = Article.objects.in_bulk([row.id for row in rows if row.id is not None])
+        to_update, with_id, without_id = [], [], []
+        for row in rows:
+            if row.id in existing:
+                article = existing[row.id]
+                article.title, article.abstract = row.title, row.abstract
+                article.publication_date = row.publication_date
+                to_update.append((row, article))
+            else:
+                article = Article(id=row.id, title=row.title, abstract=row.abstract)
+                (with_id if row.id is not None else without_id).append((row, article))
+
+        if to_update:
+            Article.objects.bulk_update([article for _, article in to_update],
+                                        ['title', 'abstract', 'publication_date'])
+        created = []
+        for group in (with_id, without_id):
+            if group:
+                Article.objects.bulk_create([article for _, article in group])
+                created.extend(group)
+            if group is with_id and with_id:
+                # Explicit IDs may be ahead of the sequence
+                with connection.cursor() as cursor:
+                    for sql in connection.ops.sequence_reset_sql(no_style(), [Article]):
+                        cursor.execute(sql)
+        if created:
+            # bulk_create applies auto_now, put back the imported dates
+            for row, article in created:
+                article.publication_date = row.publication_date
+            Article.objects.bulk_update([article for _, article in created], ['publication_date'])
+
+        written = to_update + created
+        article_ids = [article.id for _, article in written]
+        author_links = Article.authors.through
+        tag_links = Article.tags.through
+        author_links.objects.filter(article_id__in=article_ids).delete()
+        tag_links.objects.filter(article_id__in=article_ids).delete()
+        author_links.objects.bulk_create([
+            author_links(article_id=article.id, user_id=user_id)
+            for row, article in written for user_id in row.author_ids
+        ])
+        tag_links.objects.bulk_create([
+            tag_links(article_id=article.id, tag_id=tag_id)
+            for row, article in written for tag_id in row.tag_ids
+        ])
+        return len(created), len(to_update)
+
+
+def split_names(cell):
+    return [name.strip() for name in cell.split(NAME_SEPARATOR) if name.strip()]
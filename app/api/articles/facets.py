@@ -0,0 +1,41 @@
+from django.db.models import Count, Value
+from django.db.models.functions import Concat, ExtractMonth, ExtractYear
+from .models import Article
+
+
+def tag_facets(article_ids, limit):
+    """Most used tags among the articles, with their article counts"""
+    rows = Article.tags.through.objects.filter(article_id__in=article_ids).values(
+        'tag_id', 'tag__name'
+    ).annotate(count=Count('article_id')).order_by('-count', 'tag__name', 'tag_id')[:limit]
+    return [{'id': row['tag_id'], 'name': row['tag__name'], 'count': row['count']} for row in rows]
+
+
+def author_facets(article_ids, limit):
+    """Authors with the most articles among the articles, with their article counts"""
+    rows = Article.authors.through.objects.filter(article_id__in=article_ids).values(
+        'user_id', name=Concat('user__first_name', Value(' '), 'user__last_name')
+    ).annotate(count=Count('article_id')).order_by('-count', 'name', 'user_id')[:limit]
+    return [{'id': row['user_id'], 'name': row['name'], 'count': row['count']} for row in rows]
+
+
+def date_facets(queryset, limit):
+    """Publication year/month buckets of the articles, newest first"""
+    return list(queryset.order_by().values(
+        year=ExtractYear('publication_date'), month=ExtractMonth('publication_date')
+    ).annotate(count=Count('pk')).order_by('-year', '-month')[:limit])
+
+
+def article_facets(queryset, limit):
+    """
+    Counts of the filtered articles per tag, author and publication month (top limit of
+    each), in one grouped query per facet. The through tables are joined against the
+    matching article ids as a subquery, so no article row is loaded in Python.
+    """
+    article_ids = queryset.order_by().values('pk')
+    return {
+        'count': queryset.order_by().count(),
+        'tags': tag_facets(article_ids, limit),
+        'authors': author_facets(article_ids, limit),
+        'dates': date_facets(queryset, limit),
+    }
@@ -1,22 +1,48 @@
+from django.db.models import Exists, OuterRef
 from django_filters import rest_framework as filters
+from django_filters.constants import EMPTY_VALUES
+from api.publication_date_filters import IntegerFilter, PublicationDateFilterSet
 from .models import Article
 
-class ArticleFilter(filters.FilterSet):
+
+class M2MExistsInFilter(filters.BaseInFilter):
+    """
+    `in` filter on a many-to-many field applied as an EXISTS subquery on the through table,
+    so a matching article is returned once and the queryset needs no DISTINCT
+    """
+    def filter(self, qs, value):
+        if value in EMPTY_VALUES:
+            return qs
+        field = qs.model._meta.get_field(self.field_name)
+        related_rows = field.remote_field.through.objects.filter(**{
+            field.m2m_field_name(): OuterRef('pk'),
+            f'{field.m2m_reverse_field_name()}__in': value,
+        })
+        return qs.filter(Exists(related_rows))
+
+
+class ArticleFilter(PublicationDateFilterSet):
     strict = True
-    year = filters.NumberFilter(field_name="publication_date", lookup_expr='year')
-    month = filters.NumberFilter(field_name="publication_date", lookup_expr='month')
-    authors = filters.BaseInFilter(field_name='authors',lookup_expr='in')
-    tags = filters.BaseInFilter(field_name='tags',lookup_expr='in')
+    authors = M2MExistsInFilter(field_name='authors')
+    tags = M2MExistsInFilter(field_name='tags')
+    min_comments = IntegerFilter(field_name='comment_count', lookup_expr='gte', min_value=0)
+    max_comments = IntegerFilter(field_name='comment_count', lookup_expr='lte', min_value=0)
+    editable = filters.BooleanFilter(method='filter_editable')
     class Meta:
         model = Article
-        fields = ['year', 'month','authors','tags']
+        fields = ['year', 'month','authors','tags','min_comments','max_comments','editable']
+
+    def filter_editable(self, queryset, name, value):
+        """Articles the requesting user can (editable=true) or cannot (false) edit"""
+        editable = queryset.editable_by(self.request.user)
+        if value:
+            return editable
+        return queryset.exclude(pk__in=editable.values('pk'))
 
-class ArticleCSVFilter(filters.FilterSet):
+class ArticleCSVFilter(PublicationDateFilterSet):
     strict = True
-    year = filters.NumberFilter(field_name="publication_date", lookup_expr='year')
-    month = filters.NumberFilter(field_name="publication_date", lookup_expr='month')
-    authors = filters.BaseInFilter(field_name='authors',lookup_expr='in')
-    tags = filters.BaseInFilter(field_name='tags',lookup_expr='in')
+    authors = M2MExistsInFilter(field_name='authors')
+    tags = M2MExistsInFilter(field_name='tags')
     ids = filters.BaseInFilter(field_name='id',lookup_expr='in')
     class Meta:
         model = Article
@@ -0,0 +1,29 @@
+import time
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.articles.csv_import import ArticleCSVImporter, CSVImportError
+
+
+class Command(BaseCommand):
+    help = "Import articles from a file in the CSV export format"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV file to import')
+        parser.add_argument('--batch-size', type=int, default=settings.ARTICLES_CSV_IMPORT_BATCH_SIZE,
+                            help='Number of rows written per transaction')
+
+    def handle(self, *args, **options):
+        started = time.perf_counter()
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                summary = ArticleCSVImporter(stream, batch_size=options['batch_size']).run()
+        except (OSError, CSVImportError, UnicodeDecodeError) as error:
+            raise CommandError(str(error))
+        elapsed = time.perf_counter() - started
+
+        for error in summary['errors']:
+            self.stderr.write(f"Line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {elapsed:.1f}s: {summary['inserted']} inserted, "
+            f"{summary['updated']} updated, {summary['rejected']} rejected"
+        ))
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db.models import Count, F, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from api.articles.models import Article
+from api.comments.models import Comment
+
+
+class Command(BaseCommand):
+    help = "Recompute the article comment counters that drifted, in primary key batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of articles checked per statement')
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        actual = Coalesce(Subquery(
+            Comment.objects.filter(article=OuterRef('pk')).order_by().values('article').annotate(
+                count=Count('pk')
+            ).values('count')
+        ), Value(0))
+
+        repaired = checked = 0
+        last_pk = 0
+        while True:
+            # Walk the primary key so each statement stays short and locks few rows
+            pks = list(Article.objects.filter(pk__gt=last_pk).order_by('pk').values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            drifted = Article.objects.filter(pk__in=pks).annotate(actual=actual).exclude(comment_count=F('actual'))
+            drifted_pks = list(drifted.values_list('pk', flat=True))
+            if drifted_pks:
+                repaired += Article.objects.filter(pk__in=drifted_pks).update(comment_count=actual)
+            checked += len(pks)
+            last_pk = pks[-1]
+            self.stdout.write(f"Checked {checked} articles, repaired {repaired}")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {repaired} article comment counts repaired"))
@@ -1,18 +1,139 @@
+from django.conf import settings
 from django.db import models
+from django.db.models import Exists, F, OuterRef, Subquery, Value
+from django.utils import timezone
+from django.db.models.functions import Coalesce, Concat, ExtractMonth, Greatest, Now
+from django.contrib.postgres.aggregates import StringAgg
+from django.contrib.postgres.expressions import ArraySubquery
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from api.models import User
 from api.tags.models import Tag
+from api.cache_versions import bump_model_version
+from api.search_vector import SearchVectorModelMixin, SearchVectorQuerySet
 
-    
-class Article(models.Model):
+
+# Columns indexed by the stored search vector, and their weight labels in it
+SEARCH_VECTOR_FIELDS = ('title', 'abstract')
+SEARCH_VECTOR_WEIGHTS = {'title': 'A', 'abstract': 'B'}
+
+
+class ArticleQuerySet(SearchVectorQuerySet):
+    """
+    QuerySet that keeps the stored search vector and the response cache in sync on bulk writes
+    """
+    search_vector_fields = SEARCH_VECTOR_FIELDS
+    search_vector_weights = SEARCH_VECTOR_WEIGHTS
+
+    def get_search_rank_weights(self):
+        # Labels C and D are unused, they keep the PostgreSQL defaults
+        weights = settings.ARTICLES_SEARCH_WEIGHTS
+        return [0.1, 0.2, weights['abstract'], weights['title']]
+
+    def update(self, **kwargs):
+        # auto_now is not applied by update()
+        kwargs.setdefault('updated_at', Now())
+        rows = super().update(**kwargs)
+        # Bulk writes send no signals, invalidate cached responses here
+        bump_model_version(self.model)
+        return rows
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        bump_model_version(self.model)
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        if 'updated_at' not in fields:
+            now = timezone.now()
+            for obj in objs:
+                obj.updated_at = now
+            fields = [*fields, 'updated_at']
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        bump_model_version(self.model)
+        return rows
+
+    def adjust_comment_count(self, delta):
+        """
+        Add delta to the comment counters in one atomic UPDATE. A counter that drifted below
+        the real count stops at 0 instead of breaking the unsigned column's check.
+        """
+        return self.update(comment_count=Greatest(F('comment_count') + delta, 0))
+
+    def with_export_names(self):
+        """
+        Annotate author_names and tag_names (comma separated, ordered by id)
+        with correlated subqueries, so exporting needs no per-row queries
+        """
+        authors = self.model.authors.through.objects.filter(
+            article_id=OuterRef('pk')
+        ).order_by().values('article_id').annotate(
+            names=StringAgg(
+                Concat('user__first_name', Value(' '), 'user__last_name'), ', ', ordering='user_id'
+            )
+        ).values('names')
+        tags = self.model.tags.through.objects.filter(
+            article_id=OuterRef('pk')
+        ).order_by().values('article_id').annotate(
+            names=StringAgg('tag__name', ', ', ordering='tag_id')
+        ).values('names')
+        return self.annotate(
+            author_names=Coalesce(Subquery(authors), Value(''), output_field=models.TextField()),
+            tag_names=Coalesce(Subquery(tags), Value(''), output_field=models.TextField()),
+        )
+
+    def editable_by(self, user):
+        """
+        Articles the user may edit: every article for admins, otherwise the ones the user
+        authored, matched with an EXISTS on the (article_id, user_id) unique index
+        """
+        if user.is_staff:
+            return self
+        return self.filter(Exists(self.model.authors.through.objects.filter(
+            article_id=OuterRef('pk'), user_id=user.pk
+        )))
+
+    def with_related_arrays(self):
+        """
+        Annotate author_ids and tag_names as arrays built by correlated subqueries,
+        ordered by id like the User and Tag default ordering
+        """
+        authors = self.model.authors.through.objects.filter(
+            article_id=OuterRef('pk')
+        ).order_by('user_id').values('user_id')
+        tags = self.model.tags.through.objects.filter(
+            article_id=OuterRef('pk')
+        ).order_by('tag_id').values('tag__name')
+        return self.annotate(author_ids=ArraySubquery(authors), tag_names=ArraySubquery(tags))
+
+
+class Article(SearchVectorModelMixin, models.Model):
      publication_date = models.DateField(auto_now=True)
      authors = models.ManyToManyField(User)
      abstract = models.TextField()
      tags = models.ManyToManyField(Tag)
      title = models.CharField(max_length=200)
+     # Stored tsvector of abstract and title, used by the keyword search
+     search_vector = SearchVectorField(null=True, editable=False)
+     # Change marker used as the HTTP validator (ETag / Last-Modified)
+     updated_at = models.DateTimeField(auto_now=True)
+     # Number of comments, maintained on comment create/delete (see recount_comments)
+     comment_count = models.PositiveIntegerField(default=0, editable=False)
+
+     objects = ArticleQuerySet.as_manager()
 
      def __str__(self):
         return self.title
-   
+
      class Meta:
         db_table = 'Article'
-        ordering = ['id']
\ No newline at end of file
+        ordering = ['id']
+        indexes = [
+            GinIndex(fields=['search_vector'], name='article_search_vector_idx'),
+            # Keyset pagination seeks on (ordering key, id)
+            models.Index(fields=['publication_date', 'id'], name='article_pub_date_id_idx'),
+            # Month filters without a year match EXTRACT(MONTH FROM publication_date)
+            models.Index(ExtractMonth('publication_date'), name='article_pub_month_idx'),
+            models.Index(fields=['title', 'id'], name='article_title_id_idx'),
+            models.Index(fields=['comment_count', 'id'], name='article_comment_count_id_idx'),
+        ]
@@ -11,5 +11,16 @@ class ArticleSerializer(serializers.ModelSerializer):
 
     class Meta:
         model = Article
-        fields = '__all__'
+        exclude = ['search_vector', 'updated_at']
 
+
+class ArticleBulkItemSerializer(serializers.Serializer):
+    """
+    One article of a bulk write. Authors and tags stay raw ids/names here,
+    they are resolved for the whole batch at once.
+    """
+    id = serializers.IntegerField(required=False)
+    title = serializers.CharField(max_length=200)
+    abstract = serializers.CharField()
+    authors = serializers.ListField(child=serializers.IntegerField())
+    tags = serializers.ListField(child=serializers.CharField(max_length=50))
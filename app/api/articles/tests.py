@@ -4,9 +4,19 @@ from rest_framework.test import APITestCase
 from api.models import User
 from api.tags.models import Tag
 from .models import Article
+from api.comments.models import Comment
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 import csv
+import datetime
 import io
+import msgpack
+import time
+from unittest import mock
 
 class ArticleAPITestCase(APITestCase):
     def setUp(self):
@@ -239,7 +249,7 @@ class ArticleCSVViewTest(ArticleAPITestCase):
         self.authenticate_user()
         url = reverse('articles_csv')  # Added CSV view URL
         response = self.client.get(url)
-        csv_file = io.StringIO(response.content.decode("utf-8"))
+        csv_file = io.StringIO(b"".join(response.streaming_content).decode("utf-8"))
         reader = csv.reader(csv_file)
 
         # Validate headers
@@ -252,4 +262,802 @@ class ArticleCSVViewTest(ArticleAPITestCase):
         self.assertEqual(row[1], "Test Article")
         self.assertEqual(row[2], "This is a test abstract for the article")
         self.assertEqual(row[3], "Author User")
-        self.assertEqual(row[4], "Test Tag")
\ No newline at end of file
+        self.assertEqual(row[4], "Test Tag")
+
+    def export_rows(self, **params):
+        """Stream the export and return its rows and the queries it ran"""
+        self.authenticate_user()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('articles_csv'), params)
+            content = b"".join(response.streaming_content).decode("utf-8")
+        return list(csv.reader(io.StringIO(content))), len(queries)
+
+    def test_csv_query_count_is_constant(self):
+        """Test that the export query count does not grow with the row count"""
+        self.export_rows()  # the first request also fills the authentication cache
+        _, single_article_queries = self.export_rows()
+
+        second_tag = Tag.objects.create(name="Second Tag")
+        for i in range(5):
+            article = Article.objects.create(title=f"Article {i}", abstract="Abstract")
+            article.authors.set([self.author, self.user])
+            article.tags.set([self.tag, second_tag])
+
+        rows, many_articles_queries = self.export_rows()
+        self.assertEqual(len(rows), 7)
+        self.assertEqual(many_articles_queries, single_article_queries)
+        self.assertEqual(rows[-1][3], "Author User, Regular User")
+        self.assertEqual(rows[-1][4], "Test Tag, Second Tag")
+
+    def test_csv_applies_filters_and_ordering(self):
+        """Test that filters and ordering still apply to the streamed export"""
+        other = Article.objects.create(title="Another Article", abstract="Other abstract")
+        rows, _ = self.export_rows(ids=f"{self.article.id},{other.id}", ordering='title')
+        self.assertEqual([row[1] for row in rows[1:]], ["Another Article", "Test Article"])
+        self.assertEqual(rows[1][3], "")
+
+class ArticleKeywordSearchTest(ArticleAPITestCase):
+    def test_keyword_search_uses_stored_vector(self):
+        """Test that keyword search matches through the stored search vector"""
+        Article.objects.create(title="Unrelated", abstract="Nothing to see here")
+        self.authenticate_user()
+        response = self.client.get(reverse('articles_list'), {'keyword': 'abstract'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['id'] for a in response.data['results']], [self.article.id])
+        self.assertNotIn('search_vector', response.data['results'][0])
+
+    def test_keyword_search_ranks_matches(self):
+        """Test that results are ordered by rank"""
+        better = Article.objects.create(title="Quantum quantum", abstract="Quantum computing")
+        self.article.abstract = "A note on quantum"
+        self.article.save()
+        self.authenticate_user()
+        response = self.client.get(reverse('articles_list'), {'keyword': 'quantum'})
+        self.assertEqual([a['id'] for a in response.data['results']], [better.id, self.article.id])
+
+    def test_bulk_paths_keep_vector_in_sync(self):
+        """Test that update, bulk_create and bulk_update refresh the stored vector"""
+        Article.objects.filter(pk=self.article.pk).update(title="Astronomy")
+        self.assertTrue(Article.objects.filter(search_vector='astronomy').exists())
+
+        created = Article.objects.bulk_create([Article(title="Biology", abstract="Cells")])
+        self.assertTrue(Article.objects.filter(pk=created[0].pk, search_vector='cells').exists())
+
+        created[0].abstract = "Genetics"
+        Article.objects.bulk_update(created, ['abstract'])
+        self.assertTrue(Article.objects.filter(pk=created[0].pk, search_vector='genetics').exists())
+        self.assertFalse(Article.objects.filter(pk=created[0].pk, search_vector='cells').exists())
+
+    def test_backfill_command(self):
+        """Test that the backfill command fills missing vectors"""
+        Article.objects.update(search_vector=None)
+        call_command('update_search_vectors', batch_size=1, stdout=io.StringIO())
+        self.assertFalse(Article.objects.filter(search_vector__isnull=True).exists())
+        self.assertTrue(Article.objects.filter(search_vector='abstract').exists())
+
+
+class ArticleCursorPaginationTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for title in ["Delta", "Alpha", "Charlie", "Alpha", "Bravo"]:
+            Article.objects.create(title=title, abstract="Abstract")
+        self.authenticate_user()
+
+    def walk(self, params):
+        """Follow next links from the first cursor page and return the visited ids"""
+        response = self.client.get(reverse('articles_list'), {**params, 'cursor': ''})
+        ids = []
+        while True:
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('count', response.data)
+            ids.extend(article['id'] for article in response.data['results'])
+            if response.data['next'] is None:
+                return ids, response
+            response = self.client.get(response.data['next'])
+
+    def test_cursor_walk_matches_ordering(self):
+        """Test that walking with cursors visits every row once in the requested order"""
+        for ordering in ['title', '-title', '-publication_date', 'id', '-id']:
+            # Ties on the ordering key are broken by id in the same direction
+            tiebreak = '-id' if ordering.startswith('-') else 'id'
+            expected = list(Article.objects.order_by(ordering, tiebreak).values_list('id', flat=True))
+            ids, _ = self.walk({'ordering': ordering, 'limit': 2})
+            self.assertEqual(ids, expected, ordering)
+
+    def test_descending_ordering_uses_index(self):
+        """Test that a descending key and its id tiebreak are ordered the same way, so the index applies"""
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('articles_list'), {'ordering': '-title', 'limit': 2, 'cursor': ''})
+        sql = next(query['sql'] for query in queries if 'ORDER BY' in query['sql'] and 'LIMIT 3' in query['sql'])
+        self.assertIn('ORDER BY "Article"."title" DESC, "Article"."id" DESC', sql)
+
+    def test_cursor_previous_link(self):
+        """Test that the previous link returns the preceding page"""
+        first = self.client.get(reverse('articles_list'), {'ordering': 'title', 'limit': 2, 'cursor': ''})
+        self.assertIsNone(first.data['previous'])
+        second = self.client.get(first.data['next'])
+        previous = self.client.get(second.data['previous'])
+        self.assertEqual(previous.data['results'], first.data['results'])
+        self.assertIsNone(previous.data['previous'])
+
+    def test_invalid_cursor(self):
+        """Test that a malformed cursor is rejected"""
+        response = self.client.get(reverse('articles_list'), {'cursor': 'not-a-cursor'})
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_limit_offset_still_supported(self):
+        """Test that requests without a cursor keep limit/offset pagination"""
+        response = self.client.get(reverse('articles_list'), {'limit': 2, 'offset': 4})
+        self.assertEqual(response.data['count'], 6)
+        self.assertEqual(len(response.data['results']), 2)
+
+
+class ArticleQueryCountTest(ArticleAPITestCase):
+    def list_queries(self, limit):
+        self.authenticate_user()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('articles_list'), {'limit': limit})
+        self.assertEqual(len(response.data['results']), limit)
+        return len(queries)
+
+    def test_list_query_count_is_constant(self):
+        """Test that the list endpoint query count does not depend on the page size"""
+        second_tag = Tag.objects.create(name="Second Tag")
+        for i in range(6):
+            article = Article.objects.create(title=f"Article {i}", abstract="Abstract")
+            article.authors.set([self.author, self.user])
+            article.tags.set([self.tag, second_tag])
+        self.list_queries(2)  # the first request also fills the authentication cache
+        self.assertEqual(self.list_queries(1), self.list_queries(6))
+
+
+class ArticleM2MFilterTest(ArticleAPITestCase):
+    def test_filter_by_several_authors_returns_each_article_once(self):
+        """Test that an article matching several filter values is not duplicated"""
+        self.article.authors.add(self.user)
+        second_tag = Tag.objects.create(name="Second Tag")
+        self.article.tags.add(second_tag)
+        Article.objects.create(title="Other", abstract="No authors")
+        self.authenticate_user()
+        response = self.client.get(reverse('articles_list'), {
+            'authors': f'{self.author.id},{self.user.id}',
+            'tags': f'{self.tag.id},{second_tag.id}',
+        })
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual([a['id'] for a in response.data['results']], [self.article.id])
+
+    def test_filter_without_match(self):
+        """Test that articles without the requested tag are excluded"""
+        other_tag = Tag.objects.create(name="Other Tag")
+        self.authenticate_user()
+        response = self.client.get(reverse('articles_list'), {'tags': str(other_tag.id)})
+        self.assertEqual(response.data['count'], 0)
+
+
+class ArticleDateFilterTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        dates = {
+            self.article: datetime.date(2024, 4, 30),
+            Article.objects.create(title="May", abstract="May"): datetime.date(2024, 5, 1),
+            Article.objects.create(title="Next April", abstract="April"): datetime.date(2025, 4, 1),
+            Article.objects.create(title="December", abstract="December"): datetime.date(2024, 12, 31),
+        }
+        for article, date in dates.items():
+            # update() bypasses auto_now
+            Article.objects.filter(pk=article.pk).update(publication_date=date)
+        self.authenticate_user()
+
+    def titles(self, **params):
+        response = self.client.get(reverse('articles_list'), {**params, 'ordering': 'id'})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [article['title'] for article in response.data['results']]
+
+    def test_year_filter(self):
+        self.assertEqual(self.titles(year=2024), ["Test Article", "May", "December"])
+
+    def test_year_and_month_filter(self):
+        self.assertEqual(self.titles(year=2024, month=4), ["Test Article"])
+        self.assertEqual(self.titles(year=2024, month=12), ["December"])
+
+    def test_month_filter_without_year(self):
+        self.assertEqual(self.titles(month=4), ["Test Article", "Next April"])
+
+    def test_invalid_month(self):
+        response = self.client.get(reverse('articles_list'), {'month': 13})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+
+class ArticleResponseCacheTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.authenticate_user()
+
+    def test_repeated_get_is_served_from_cache(self):
+        """Test that an identical GET is a cache hit, whatever the parameter order"""
+        url = reverse('articles_list')
+        first = self.client.get(url, {'ordering': 'title', 'limit': 5})
+        self.assertEqual(first['X-Cache'], 'MISS')
+        with self.assertNumQueries(0):  # validators come from the versions, the user from the cache
+            second = self.client.get(f'{url}?limit=5&ordering=title')
+        self.assertEqual(second['X-Cache'], 'HIT')
+        self.assertEqual(second.data, first.data)
+
+    def test_writes_invalidate_cached_responses(self):
+        """Test that saves and m2m changes make cached entries unreachable"""
+        self.client.get(self.url)
+        self.article.tags.add(Tag.objects.create(name="Added Tag"))
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['tags'], ["Test Tag", "Added Tag"])
+
+        tag = Tag.objects.get(name="Added Tag")
+        tag.name = "Renamed Tag"
+        tag.save()
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['tags'], ["Test Tag", "Renamed Tag"])
+
+        Article.objects.filter(pk=self.article.pk).update(title="Bulk Updated")
+        response = self.client.get(self.url)
+        self.assertEqual(response['X-Cache'], 'MISS')
+        self.assertEqual(response.data['title'], "Bulk Updated")
+
+    def test_write_transaction_bumps_again_on_commit(self):
+        """Test that a response cached while a write is uncommitted is invalidated by the commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                Article.objects.filter(pk=self.article.pk).update(title="Uncommitted")
+                # Another request caching under the first bump
+                self.client.get(self.url)
+                self.assertEqual(self.client.get(self.url)['X-Cache'], 'HIT')
+        self.assertEqual(self.client.get(self.url)['X-Cache'], 'MISS')
+
+    def test_cache_stats(self):
+        """Test that hit/miss statistics are exposed to admins only"""
+        self.client.get(self.url)
+        self.client.get(self.url)
+        response = self.client.get(reverse('response_cache_stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+        self.user.is_admin = True
+        self.user.save()
+        response = self.client.get(reverse('response_cache_stats'))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['views']['RetrieveUpdateDeleteArticle'], {'hits': 1, 'misses': 1})
+
+
+class ArticleConditionalGetTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.authenticate_user()
+
+    def test_detail_not_modified(self):
+        """Test that a matching If-None-Match gets a 304 without a query"""
+        response = self.client.get(self.url)
+        self.assertIn('ETag', response)
+        self.assertIn('Last-Modified', response)
+        with self.assertNumQueries(0):  # validators come from the versions, the user from the cache
+            not_modified = self.client.get(self.url, HTTP_IF_NONE_MATCH=response['ETag'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+        self.assertEqual(not_modified['ETag'], response['ETag'])
+
+        not_modified = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=response['Last-Modified'])
+        self.assertEqual(not_modified.status_code, status.HTTP_304_NOT_MODIFIED)
+
+    def test_validators_change_on_write(self):
+        """Test that updates, m2m changes and related renames change the ETag"""
+        etag = self.client.get(self.url)['ETag']
+        self.article.tags.add(Tag.objects.create(name="Another Tag"))
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+        etag = response['ETag']
+        self.tag.name = "Renamed Tag"
+        self.tag.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+
+    def test_list_validator_covers_filtered_set(self):
+        """Test that the list ETag depends on the filtered rows and the parameters"""
+        url = reverse('articles_list')
+        other = Article.objects.create(title="Other", abstract="Other")
+        params = {'authors': str(self.author.id)}
+        etag = self.client.get(url, params)['ETag']
+        self.assertNotEqual(self.client.get(url)['ETag'], etag)
+
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        other.authors.add(self.author)
+        response = self.client.get(url, params, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 2)
+
+    def test_last_modified_moves_on_deletes_and_related_renames(self):
+        """Test that If-Modified-Since misses after a list delete or a related rename"""
+        url = reverse('articles_list')
+        other = Article.objects.create(title="Other", abstract="Other")
+        list_modified = self.client.get(url)['Last-Modified']
+        detail_modified = self.client.get(self.url)['Last-Modified']
+        # Validators have a one second resolution, the writes happen later
+        with mock.patch('time.time_ns', return_value=time.time_ns() + 10 ** 10):
+            other.delete()
+            response = self.client.get(url, HTTP_IF_MODIFIED_SINCE=list_modified)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.tag.name = "Renamed Tag"
+            self.tag.save()
+            response = self.client.get(self.url, HTTP_IF_MODIFIED_SINCE=detail_modified)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertEqual(response.data['tags'], ["Renamed Tag"])
+
+    @override_settings(CACHES={'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}})
+    def test_without_a_cache(self):
+        """Test that responses are served without validators when the cache keeps no versions"""
+        for url in (reverse('articles_list'), self.url, reverse('articles_list_async')):
+            response = self.client.get(url)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            self.assertNotIn('ETag', response)
+
+    def test_user_scoped_etag(self):
+        """Test that ?editable responses of different users never share an ETag"""
+        other = Article.objects.create(title="Other", abstract="Other")
+        other.authors.set([self.user])
+        Article.objects.update(updated_at=self.article.updated_at)
+        url = reverse('articles_list')
+        etag = self.client.get(url, {'editable': 'true'})['ETag']
+        self.authenticate_author()
+        response = self.client.get(url, {'editable': 'true'}, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual([a['id'] for a in response.data['results']], [self.article.id])
+
+
+class ArticleBulkViewTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.bulk_url = reverse('articles_bulk')
+        self.authenticate_author()
+
+    def test_bulk_create_and_update(self):
+        """Test creating and updating articles in one request"""
+        payload = [
+            {'title': 'Bulk 1', 'abstract': 'First', 'authors': [self.user.id], 'tags': [self.tag.name]},
+            {'title': 'Bulk 2', 'abstract': 'Second', 'authors': [], 'tags': []},
+            {'id': self.article.id, 'title': 'Bulk Updated', 'abstract': 'Updated',
+             'authors': [self.author.id, self.user.id], 'tags': []},
+        ]
+        response = self.client.post(self.bulk_url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        results = response.data['results']
+        self.assertEqual([result['status'] for result in results], ['created', 'created', 'updated'])
+        self.assertEqual(results[0]['article']['authors'], [self.author.id, self.user.id])
+        self.assertEqual(results[0]['article']['tags'], [self.tag.name])
+        self.assertEqual(results[1]['article']['authors'], [self.author.id])
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.title, 'Bulk Updated')
+        self.assertEqual(list(self.article.tags.all()), [])
+        self.assertEqual(set(self.article.authors.all()), {self.author, self.user})
+        self.assertTrue(Article.objects.filter(title='Bulk 1', search_vector='first').exists())
+
+    def test_query_count_does_not_depend_on_batch_size(self):
+        """Test that references are resolved per batch, not per item"""
+        def post_batch(size):
+            payload = [
+                {'title': f'Batch {i}', 'abstract': 'Text', 'authors': [self.user.id], 'tags': [self.tag.name]}
+                for i in range(size)
+            ]
+            with CaptureQueriesContext(connection) as queries:
+                response = self.client.post(self.bulk_url, payload, format='json')
+            self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+            return len(queries)
+        post_batch(1)  # the first request also fills the authentication cache
+        self.assertEqual(post_batch(1), post_batch(20))
+
+    def test_invalid_item_rejects_the_batch(self):
+        """Test that per-item errors are reported and nothing is written"""
+        payload = [
+            {'title': 'Valid', 'abstract': 'Valid', 'authors': [], 'tags': []},
+            {'title': 'Unknown refs', 'abstract': 'Text', 'authors': [999999], 'tags': ['Missing']},
+            {'abstract': 'No title', 'authors': [], 'tags': []},
+        ]
+        response = self.client.post(self.bulk_url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        results = response.data['results']
+        self.assertEqual(results[0], {'status': 'valid'})
+        self.assertEqual(set(results[1]['errors']), {'authors', 'tags'})
+        self.assertIn('title', results[2]['errors'])
+        self.assertFalse(Article.objects.filter(title='Valid').exists())
+
+    def test_update_requires_authorship(self):
+        """Test that a non-author cannot update an article through the bulk endpoint"""
+        self.authenticate_user()
+        payload = [{'id': self.article.id, 'title': 'Hijacked', 'abstract': 'x', 'authors': [], 'tags': []}]
+        response = self.client.post(self.bulk_url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+        self.assertIn('id', response.data['results'][0]['errors'])
+
+    @override_settings(ARTICLES_BULK_MAX_BATCH_SIZE=2)
+    def test_batch_size_limit(self):
+        """Test that batches above the configured maximum are rejected"""
+        payload = [{'title': 'x', 'abstract': 'x', 'authors': [], 'tags': []}] * 3
+        response = self.client.post(self.bulk_url, payload, format='json')
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+class ArticleCSVImportTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.import_url = reverse('articles_csv_import')
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', first_name='Admin', last_name='User', password='adminpassword123'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def export(self):
+        response = self.client.get(reverse('articles_csv'))
+        return b"".join(response.streaming_content)
+
+    def upload(self, content):
+        upload = io.BytesIO(content.encode('utf-8') if isinstance(content, str) else content)
+        upload.name = 'articles.csv'
+        return self.client.post(self.import_url, {'file': upload}, format='multipart')
+
+    def test_export_import_roundtrip(self):
+        """Test that importing an export restores the same articles"""
+        other = Article.objects.create(title="Second Article", abstract="Second abstract")
+        other.authors.set([self.author, self.user])
+        Article.objects.filter(pk=other.pk).update(publication_date=datetime.date(2020, 5, 17))
+        exported = self.export()
+        Article.objects.all().delete()
+
+        response = self.upload(exported)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data, {'inserted': 2, 'updated': 0, 'rejected': 0, 'errors': []})
+        self.assertEqual(self.export(), exported)
+        self.assertTrue(Article.objects.filter(pk=other.pk, search_vector='second').exists())
+
+        # New articles continue after the imported IDs
+        self.assertGreater(Article.objects.create(title="New", abstract="New").pk, other.pk)
+
+    def test_import_updates_and_reports_rejected_rows(self):
+        """Test updates, created tags and per-line errors"""
+        content = (
+            "ID,title,abstract,authors,tags,publication_date\n"
+            f"{self.article.id},Updated,New abstract,Regular User,\"Test Tag, Brand New\",2021-01-02\n"
+            ",Fresh,Fresh abstract,,,\n"
+            ",Unknown author,x,Nobody Here,,\n"
+            "abc,Bad id,x,,,\n"
+            ",Bad date,x,,,2021-13-01\n"
+        )
+        response = self.upload(content)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual((response.data['inserted'], response.data['updated'], response.data['rejected']), (1, 1, 3))
+        self.assertEqual([error['line'] for error in response.data['errors']], [4, 5, 6])
+
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.title, "Updated")
+        self.assertEqual(self.article.publication_date, datetime.date(2021, 1, 2))
+        self.assertEqual(list(self.article.authors.all()), [self.user])
+        self.assertEqual({tag.name for tag in self.article.tags.all()}, {"Test Tag", "Brand New"})
+
+    def test_orm_fallback_matches_copy(self):
+        """Test that the batched ORM path writes the same rows as the COPY path"""
+        from .csv_import import ArticleCSVImporter
+        exported = self.export().decode('utf-8')
+        Article.objects.all().delete()
+        summary = ArticleCSVImporter(io.StringIO(exported), batch_size=1, use_copy=False).run()
+        self.assertEqual(summary['inserted'], 1)
+        self.assertEqual(self.export().decode('utf-8'), exported)
+
+    def test_copy_batches_in_one_transaction(self):
+        """Test that several COPY batches reuse the staging table inside an enclosing transaction"""
+        from .csv_import import ArticleCSVImporter
+        content = "ID,title,abstract,authors,tags,publication_date\n" + "".join(
+            f",Batch {i},Abstract {i},,,2021-01-0{i}\n" for i in range(1, 4)
+        )
+        with transaction.atomic():
+            summary = ArticleCSVImporter(io.StringIO(content), batch_size=1, use_copy=True).run()
+        self.assertEqual((summary['inserted'], summary['rejected']), (3, 0))
+        self.assertEqual(Article.objects.filter(title__startswith="Batch ").count(), 3)
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT to_regclass('pg_temp.article_import_staging')")
+            self.assertIsNone(cursor.fetchone()[0])
+
+    def test_requires_admin_and_valid_header(self):
+        """Test that only admins can import and the header must match the export"""
+        self.assertEqual(self.upload("id,name\n1,x\n").status_code, status.HTTP_400_BAD_REQUEST)
+        self.authenticate_author()
+        self.assertEqual(self.upload(self.export()).status_code, status.HTTP_403_FORBIDDEN)
+
+class ArticleAsyncViewTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for i in range(3):
+            article = Article.objects.create(title=f"Async {i}", abstract="Async abstract")
+            article.authors.set([self.author, self.user])
+            article.tags.set([self.tag])
+        self.authenticate_user()
+
+    def test_list_matches_sync_view(self):
+        """Test that the async list returns the same page as the sync view"""
+        params = {'limit': 2, 'offset': 1, 'ordering': '-title'}
+        sync_response = self.client.get(reverse('articles_list'), params)
+        async_response = self.client.get(reverse('articles_list_async'), params)
+        self.assertEqual(async_response.status_code, status.HTTP_200_OK)
+        self.assertEqual(async_response.json()['results'], sync_response.json()['results'])
+        self.assertEqual(async_response.json()['count'], 4)
+
+    def test_cursor_pagination_and_filters(self):
+        """Test keyset pagination and filters on the async list"""
+        url = reverse('articles_list_async')
+        response = self.client.get(url, {'cursor': '', 'limit': 2, 'authors': self.user.id})
+        self.assertEqual([article['title'] for article in response.json()['results']], ["Async 0", "Async 1"])
+        response = self.client.get(response.json()['next'])
+        self.assertEqual([article['title'] for article in response.json()['results']], ["Async 2"])
+
+    def test_detail_and_errors(self):
+        """Test the async detail view, its 404 and the authentication check"""
+        response = self.client.get(reverse('article_details_async', kwargs={'article_id': self.article.id}))
+        self.assertEqual(response.json(), self.client.get(self.url).json())
+        self.assertIn('ETag', response)
+
+        response = self.client.get(reverse('article_details_async', kwargs={'article_id': 999999}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+        self.clear_credentials()
+        response = self.client.get(reverse('articles_list_async'))
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_conditional_get(self):
+        """Test that the async view answers a matching If-None-Match with 304"""
+        url = reverse('articles_list_async')
+        etag = self.client.get(url)['ETag']
+        response = self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+class ArticleFastListTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        second_tag = Tag.objects.create(name="Second Tag")
+        for i in range(4):
+            article = Article.objects.create(title=f"Fast {i}", abstract=f"Fast abstract {i}")
+            article.authors.set([self.user, self.author] if i % 2 else [])
+            article.tags.set([second_tag, self.tag])
+            for _ in range(i):
+                Comment.objects.create(text="Comment", author=self.user, article=article)
+        self.authenticate_user()
+
+    def get_both(self, url, params):
+        responses = []
+        for fast in (False, True):
+            cache.clear()
+            with override_settings(ARTICLES_FAST_LIST=fast):
+                responses.append(self.client.get(url, params))
+        return responses
+
+    def test_fast_path_matches_serializer(self):
+        """Test that the fast path renders byte-identical pages"""
+        cases = [
+            {},
+            {'limit': 2, 'offset': 1, 'ordering': '-title'},
+            {'keyword': 'fast'},
+            {'cursor': '', 'limit': 2, 'ordering': '-updated_at'},
+            {'cursor': '', 'limit': 2, 'ordering': '-comment_count', 'min_comments': 1},
+            {'tags': self.tag.id, 'year': datetime.date.today().year},
+        ]
+        for params in cases:
+            serialized, fast = self.get_both(reverse('articles_list'), params)
+            self.assertEqual(fast.status_code, status.HTTP_200_OK)
+            self.assertEqual(fast.content, serialized.content, params)
+
+        cache.clear()
+        with override_settings(ARTICLES_FAST_LIST=True), CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse('articles_list'))
+        # Authors and tags come from array subqueries, nothing is prefetched
+        self.assertTrue(any('ARRAY(' in query['sql'] for query in queries.captured_queries))
+        self.assertFalse(any('"Article_tags"."article_id" IN' in query['sql'] for query in queries.captured_queries))
+
+    def test_async_fast_path_matches_serializer(self):
+        """Test that the async list uses the fast path with the same output"""
+        serialized, fast = self.get_both(reverse('articles_list_async'), {'limit': 3})
+        self.assertEqual(fast.content, serialized.content)
+
+class ArticleRendererTest(ArticleAPITestCase):
+    def test_msgpack_accept_header(self):
+        """Test that 'Accept: application/msgpack' returns the list as MessagePack"""
+        self.authenticate_user()
+        json_response = self.client.get(reverse('articles_list'))
+        response = self.client.get(reverse('articles_list'), HTTP_ACCEPT='application/msgpack')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response['Content-Type'], 'application/msgpack')
+        self.assertEqual(msgpack.unpackb(response.content), json_response.json())
+        # The ETag differs per representation
+        self.assertNotEqual(response['ETag'], json_response['ETag'])
+
+class ArticleCommentCountTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.busy = Article.objects.create(title="Busy", abstract="Busy")
+        for text in ("One", "Two", "Three"):
+            Comment.objects.create(text=text, author=self.user, article=self.busy)
+        Comment.objects.create(text="Only", author=self.user, article=self.article)
+        self.authenticate_user()
+
+    def test_count_is_exposed_filterable_and_orderable(self):
+        """Test the comment_count field, its filters and ordering"""
+        response = self.client.get(reverse('articles_list'), {'ordering': '-comment_count'})
+        self.assertEqual([(a['title'], a['comment_count']) for a in response.data['results']],
+                         [("Busy", 3), ("Test Article", 1)])
+        response = self.client.get(reverse('articles_list'), {'min_comments': 2})
+        self.assertEqual([a['title'] for a in response.data['results']], ["Busy"])
+        response = self.client.get(reverse('articles_list'), {'max_comments': 2})
+        self.assertEqual([a['title'] for a in response.data['results']], ["Test Article"])
+
+        # The counter is read-only
+        self.authenticate_author()
+        self.client.patch(self.url, {'comment_count': 100}, format='json')
+        self.article.refresh_from_db()
+        self.assertEqual(self.article.comment_count, 1)
+
+    def test_recount_comments_repairs_drift(self):
+        """Test that the repair command recomputes drifted counters only"""
+        Article.objects.filter(pk=self.busy.pk).update(comment_count=10)
+        Comment.objects.filter(article=self.article).delete()
+        Article.objects.filter(pk=self.article.pk).update(comment_count=1)
+        out = io.StringIO()
+        call_command('recount_comments', batch_size=1, stdout=out)
+        self.assertIn("2 article comment counts repaired", out.getvalue())
+        self.assertEqual(dict(Article.objects.values_list('title', 'comment_count')),
+                         {"Busy": 3, "Test Article": 0})
+
+
+class ArticleFacetsTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.other_tag = Tag.objects.create(name="Other Tag")
+        dates = [datetime.date(2024, 4, 30), datetime.date(2024, 5, 1), datetime.date(2024, 5, 2)]
+        Article.objects.filter(pk=self.article.pk).update(publication_date=dates[0])
+        for title, date in zip(["Quantum one", "Quantum two"], dates[1:]):
+            article = Article.objects.create(title=title, abstract="Qubits")
+            article.tags.set([self.tag, self.other_tag])
+            article.authors.set([self.user])
+            Article.objects.filter(pk=article.pk).update(publication_date=date)
+        self.url = reverse('articles_facets')
+        self.authenticate_user()
+
+    def test_facets(self):
+        """Test the counts of every facet, most frequent tags and authors first"""
+        response = self.client.get(self.url)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['count'], 3)
+        self.assertEqual(response.data['tags'], [
+            {'id': self.tag.id, 'name': "Test Tag", 'count': 3},
+            {'id': self.other_tag.id, 'name': "Other Tag", 'count': 2},
+        ])
+        self.assertEqual(response.data['authors'], [
+            {'id': self.user.id, 'name': "Regular User", 'count': 2},
+            {'id': self.author.id, 'name': "Author User", 'count': 1},
+        ])
+        self.assertEqual(response.data['dates'], [
+            {'year': 2024, 'month': 5, 'count': 2},
+            {'year': 2024, 'month': 4, 'count': 1},
+        ])
+
+    def test_facets_follow_filters_and_keyword(self):
+        """Test that the facets count only the filtered articles"""
+        response = self.client.get(self.url, {'keyword': 'quantum', 'month': 5, 'facet_limit': 1})
+        self.assertEqual(response.data['count'], 2)
+        self.assertEqual(response.data['tags'], [{'id': self.other_tag.id, 'name': "Other Tag", 'count': 2}])
+        self.assertEqual(response.data['authors'], [{'id': self.user.id, 'name': "Regular User", 'count': 2}])
+
+        response = self.client.get(self.url, {'authors': self.author.id})
+        self.assertEqual(response.data['count'], 1)
+        self.assertEqual(response.data['dates'], [{'year': 2024, 'month': 4, 'count': 1}])
+
+    def test_grouped_queries_and_cache(self):
+        """Test that the facets cost one query each, and repeated requests hit the cache"""
+        with self.assertNumQueries(5):  # authentication, count and the three facets
+            response = self.client.get(self.url, {'tags': self.tag.id})
+        self.assertEqual(response['X-Cache'], 'MISS')
+        response = self.client.get(self.url, {'tags': self.tag.id})
+        self.assertEqual(response['X-Cache'], 'HIT')
+
+    def test_invalid_parameters(self):
+        """Test that invalid facet limits and unknown parameters are rejected"""
+        for params in ({'facet_limit': 0}, {'facet_limit': 'x'}, {'facet_limit': 1000}, {'unknown': 1}):
+            response = self.client.get(self.url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST, params)
+
+
+class ArticleWeightedSearchTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.in_title = Article.objects.create(title="Quantum", abstract="Computing with qubits")
+        self.in_abstract = Article.objects.create(title="Physics", abstract="Computing quantum states")
+        self.authenticate_user()
+
+    def search(self, **params):
+        response = self.client.get(reverse('articles_list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return response.data['results']
+
+    def ids(self, **params):
+        return [article['id'] for article in self.search(**params)]
+
+    def test_title_matches_rank_first(self):
+        """Test that a title match outranks an abstract match, following the weight settings"""
+        self.assertEqual(self.ids(keyword='quantum'), [self.in_title.id, self.in_abstract.id])
+        cache.clear()
+        with override_settings(ARTICLES_SEARCH_WEIGHTS={'title': 0.1, 'abstract': 1.0}):
+            self.assertEqual(self.ids(keyword='quantum'), [self.in_abstract.id, self.in_title.id])
+
+    def test_search_types(self):
+        """Test the phrase and websearch query syntaxes"""
+        self.assertEqual(self.ids(keyword='computing quantum', search_type='phrase'), [self.in_abstract.id])
+        self.assertEqual(self.ids(keyword='quantum -qubits', search_type='websearch'), [self.in_abstract.id])
+        self.assertEqual(len(self.ids(keyword='computing quantum')), 2)
+        response = self.client.get(reverse('articles_list'), {'keyword': 'quantum', 'search_type': 'raw'})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_snippets(self):
+        """Test that snippets highlight the match, on both list paths, only when requested"""
+        for fast in (True, False):
+            with override_settings(ARTICLES_FAST_LIST=fast):
+                cache.clear()
+                results = self.search(keyword='quantum', snippet='true')
+                self.assertEqual(results[1]['snippet'], "Computing <mark>quantum</mark> states")
+                self.assertEqual(results[0]['snippet'], "Computing with qubits")
+                self.assertNotIn('snippet', self.search(keyword='quantum')[0])
+                self.assertNotIn('snippet', self.search(snippet='true')[0])
+
+    def test_snippets_run_on_the_page_only(self):
+        """Test that ts_headline is computed in one query restricted to the page ids"""
+        with CaptureQueriesContext(connection) as queries:
+            self.search(keyword='quantum', snippet='true', limit=1)
+        headline_sql = [q['sql'] for q in queries if 'ts_headline' in q['sql']]
+        self.assertEqual(len(headline_sql), 1)
+        self.assertIn(f'IN ({self.in_title.id})', headline_sql[0])
+
+
+class ArticleAuthorshipTest(ArticleAPITestCase):
+    def setUp(self):
+        super().setUp()
+        cache.clear()
+        self.other = Article.objects.create(title="Other", abstract="Other")
+        self.other.authors.set([self.user])
+
+    def test_permission_is_one_exists_query(self):
+        """Test that the authorship check is a single EXISTS on the through table"""
+        self.authenticate_author()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.patch(self.url, {'title': "Patched"}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        checks = [q['sql'] for q in queries if 'LIMIT 1' in q['sql'] and '"article_id" =' in q['sql']]
+        self.assertEqual(len(checks), 1)
+        self.assertIn('"user_id" =', checks[0])
+
+        response = self.client.delete(reverse('article_details', kwargs={'article_id': self.other.id}))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_editable_by(self):
+        """Test the queryset variant for authors and admins"""
+        self.assertEqual(list(Article.objects.editable_by(self.author)), [self.article])
+        self.user.is_admin = True
+        self.assertEqual(Article.objects.editable_by(self.user).count(), 2)
+
+    def test_editable_filter(self):
+        """Test that ?editable lists the articles of the requesting user, cached per user"""
+        for fast in (True, False):
+            with override_settings(ARTICLES_FAST_LIST=fast):
+                cache.clear()
+                self.authenticate_author()
+                response = self.client.get(reverse('articles_list'), {'editable': 'true'})
+                self.assertEqual([a['id'] for a in response.data['results']], [self.article.id])
+                self.authenticate_user()
+                response = self.client.get(reverse('articles_list'), {'editable': 'true'})
+                self.assertEqual([a['id'] for a in response.data['results']], [self.other.id])
+                response = self.client.get(reverse('articles_list'), {'editable': 'false'})
+                self.assertEqual([a['id'] for a in response.data['results']], [self.article.id])
@@ -1,9 +1,18 @@
 from django.urls import path
-from .views import ArticleView,RetrieveUpdateDeleteArticle,ArticleCSVView
+from api.async_views import AsyncReadView
+from api.comments.views import ArticleCommentsView
+from .views import ArticleView,RetrieveUpdateDeleteArticle,ArticleCSVView,ArticleBulkView,ArticleCSVImportView,ArticleFacetsView
 
 urlpatterns = [
     # Token auth endpoint
     path('', ArticleView.as_view(), name='articles_list'),
+    path('facets/', ArticleFacetsView.as_view(), name='articles_facets'),
+    path('bulk/', ArticleBulkView.as_view(), name='articles_bulk'),
     path('export/csv/', ArticleCSVView.as_view(), name='articles_csv'),
+    path('import/csv/', ArticleCSVImportView.as_view(), name='articles_csv_import'),
     path('<int:article_id>/', RetrieveUpdateDeleteArticle.as_view(), name='article_details'),
+    path('<int:article_id>/comments/', ArticleCommentsView.as_view(), name='article_comments'),
+    # Async GET handlers of the list and detail views, for ASGI deployments
+    path('async/', AsyncReadView.as_view(view_class=ArticleView), name='articles_list_async'),
+    path('async/<int:article_id>/', AsyncReadView.as_view(view_class=RetrieveUpdateDeleteArticle), name='article_details_async'),
 ]
\ No newline at end of file
@@ -1,19 +1,33 @@
-from rest_framework import generics,filters
+from rest_framework import generics,filters,status
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import ValidationError
 from rest_framework.permissions import IsAuthenticated,IsAdminUser,OR
 from .filters import ArticleFilter,ArticleCSVFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Article
-from django.http import HttpResponse
+from django.http import StreamingHttpResponse
 from api.tags.models import Tag
 from .serializers import ArticleSerializer
-from django.contrib.postgres.search import SearchQuery, SearchRank, SearchVector
+from .bulk import ArticleBulkWriter
+from .csv_import import ArticleCSVImporter,CSVImportError,CSV_COLUMNS
+from .facets import article_facets
+from django.conf import settings
+from django.contrib.postgres.search import SearchHeadline
 from api.custom_permissions import IsAnAuthor
 from api.query_parameters_mixin import QueryParamValidationMixin
+from api.queryset_optimizer_mixin import QuerysetOptimizerMixin
+from api.response_cache_mixin import ResponseCacheMixin
+from api.conditional_get_mixin import ConditionalGetMixin
+from api.fast_list_mixin import FastListMixin
+from api.keyword_search_mixin import KeywordSearchMixin
+from api.models import User
 import csv
+import io
+import itertools
 
 
-class ArticleView(QueryParamValidationMixin,generics.ListCreateAPIView):
+class ArticleView(ConditionalGetMixin,ResponseCacheMixin,FastListMixin,KeywordSearchMixin,QuerysetOptimizerMixin,QueryParamValidationMixin,generics.ListCreateAPIView):
     """
     Views for retrieving all articles
     """
@@ -23,35 +37,79 @@ class ArticleView(QueryParamValidationMixin,generics.ListCreateAPIView):
     """
     Get the current articles with filters,ordering,search
     """
-    queryset = Article.objects.all().distinct() # avoid duplicates
+    queryset = Article.objects.all() # m2m filters use EXISTS, so rows are never duplicated
     serializer_class = ArticleSerializer 
     filter_backends = [DjangoFilterBackend,filters.OrderingFilter]  # Enable filtering and searching
     ordering_fields = '__all__'
     filterset_class = ArticleFilter  # Use our custom filter
-    
-    def get_queryset(self):
+    cache_models = (Article, Tag, User)
+    user_scoped_params = ('editable',)
+    fast_list_setting = 'ARTICLES_FAST_LIST'
+    # ts_headline options of the optional search snippets
+    snippet_options = {'start_sel': '<mark>', 'stop_sel': '</mark>', 'max_words': 35, 'min_words': 15, 'max_fragments': 2}
+
+    def get_valid_filters(self):
+        return super().get_valid_filters() | {'snippet'}
+
+    def wants_snippets(self):
+        snippet = self.request.query_params.get('snippet', 'false').lower()
+        if snippet not in ('true', 'false', '1', '0'):
+            raise ValidationError({"error": "The 'snippet' parameter must be true or false"})
+        return snippet in ('true', '1')
+
+    def get_list_data(self, items):
+        data = super().get_list_data(items)
+        query = self.get_search_query()
+        if self.wants_snippets() and query is not None:
+            self.add_snippets(data, query)
+        return data
+
+    def add_snippets(self, data, query):
         """
-        Override get_queryset to apply filters first, then search
+        Add the highlighted abstract fragments matching the keyword to the page items.
+        ts_headline is costly, so it runs in a separate query over the page ids only.
         """
-        # Get the base queryset which will be filtered by our custom filters
-        queryset = super().get_queryset()
-        
-        # Get the keyword query parameter
-        search_query = self.request.query_params.get('keyword', None)
-        
-        # If there's a keyword term, apply the search after filtering
-        if search_query:
-            vector = SearchVector('abstract', 'title')
-            print(vector)
-            
-            query = SearchQuery(search_query)
-            print(query)
-            queryset = queryset.annotate(
-                rank=SearchRank(vector, query)
-            ).filter(rank__gt=0).order_by("-rank")
-        
-        return queryset
+        snippets = dict(Article.objects.filter(pk__in=[item['id'] for item in data]).order_by().annotate(
+            snippet=SearchHeadline('abstract', query, **self.snippet_options)
+        ).values_list('id', 'snippet')) if data else {}
+        for item in data:
+            item['snippet'] = snippets.get(item['id'])
     
+    def list_values(self, queryset):
+        """
+        Plain article rows for the fast list path. Ordering columns and annotations such
+        as the search rank are kept in the rows for the keyset pagination.
+        """
+        columns = {field.name for field in Article._meta.concrete_fields}
+        ordering = [term.lstrip('-') for term in queryset.query.order_by if isinstance(term, str)]
+        extra = [name for name in ordering if name in columns] + list(queryset.query.annotations)
+        return queryset.values('id', 'publication_date', 'abstract', 'title', 'comment_count', *extra)
+
+    def list_data(self, rows):
+        """
+        Add author ids and tag names with one query for the page. They are aggregated
+        after paging, an OFFSET would otherwise compute them for every skipped row too.
+        """
+        related = {
+            article_id: (author_ids, tag_names)
+            for article_id, author_ids, tag_names in Article.objects.filter(
+                pk__in=[row['id'] for row in rows]
+            ).order_by().with_related_arrays().values_list('id', 'author_ids', 'tag_names')
+        } if rows else {}
+        # Same keys, order and representations as ArticleSerializer
+        return [
+            {
+                'id': row['id'],
+                'authors': related[row['id']][0],
+                'tags': related[row['id']][1],
+                'publication_date': row['publication_date'].isoformat(),
+                'abstract': row['abstract'],
+                'title': row['title'],
+                'comment_count': row['comment_count'],
+            }
+            for row in rows
+        ]
+
     def perform_create(self, serializer):
         """
     Perform create to the serializer
@@ -63,12 +121,13 @@ class ArticleView(QueryParamValidationMixin,generics.ListCreateAPIView):
         authors_appended.append(self.request.user)
         serializer.save(authors=authors_appended)
     
-class RetrieveUpdateDeleteArticle(generics.RetrieveUpdateDestroyAPIView):
+class RetrieveUpdateDeleteArticle(ConditionalGetMixin,ResponseCacheMixin,QuerysetOptimizerMixin,generics.RetrieveUpdateDestroyAPIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = ArticleSerializer
-    queryset = Article.objects.all().distinct()
+    queryset = Article.objects.all()
     lookup_url_kwarg = 'article_id'
+    cache_models = (Article, Tag, User)
     filter_backends = [DjangoFilterBackend]
 
     def get_permissions(self):
@@ -77,13 +136,71 @@ class RetrieveUpdateDeleteArticle(generics.RetrieveUpdateDestroyAPIView):
         """
         if self.request.method == 'PUT' or self.request.method == 'PATCH':
             # Only authors can update
-            return [IsAuthenticated(), OR(IsAnAuthor(), IsAdminUser())]
+            return [IsAuthenticated(), OR(IsAdminUser(), IsAnAuthor())]
         elif self.request.method == 'DELETE':
-            # Only authors can delete
-            return [IsAuthenticated() , OR(IsAnAuthor(), IsAdminUser())]
+            # Only authors can delete (admins are checked first, they need no query)
+            return [IsAuthenticated() , OR(IsAdminUser(), IsAnAuthor())]
         # Default to the class-level permissions
         return super().get_permissions()
 
+class ArticleFacetsView(ResponseCacheMixin,KeywordSearchMixin,QueryParamValidationMixin,generics.ListAPIView):
+    """
+    Article counts per tag, author and publication month for the current filters and keyword
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = Article.objects.all()
+    filter_backends = [DjangoFilterBackend]
+    filterset_class = ArticleFilter
+    cache_models = (Article, Tag, User)
+    user_scoped_params = ('editable',)
+    # Popular filter combinations are served from the cache for a short time
+    cache_timeout_setting = 'ARTICLES_FACETS_CACHE_TIMEOUT'
+
+    def get_valid_filters(self):
+        return super().get_valid_filters() | {'facet_limit'}
+
+    def get_facet_limit(self, request):
+        max_limit = settings.ARTICLES_FACETS_MAX_LIMIT
+        try:
+            limit = int(request.query_params.get('facet_limit', settings.ARTICLES_FACETS_DEFAULT_LIMIT))
+            if not 1 <= limit <= max_limit:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"error": f"The 'facet_limit' parameter must be between 1 and {max_limit}"})
+        return limit
+
+    def list(self, request, *args, **kwargs):
+        limit = self.get_facet_limit(request)
+        queryset = self.filter_queryset(self.get_queryset())
+        return Response(article_facets(queryset, limit))
+
+
+class ArticleBulkView(generics.GenericAPIView):
+    """
+    View for creating and updating many articles in one request
+    """
+    permission_classes = [IsAuthenticated]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Validate a JSON array of articles together and write them in one transaction.
+        Items with an id update that article, the others are created.
+        """
+        items = request.data
+        if not isinstance(items, list) or not items:
+            return Response({"error": "Expected a non-empty list of articles"}, status=status.HTTP_400_BAD_REQUEST)
+        max_size = settings.ARTICLES_BULK_MAX_BATCH_SIZE
+        if len(items) > max_size:
+            return Response({"error": f"A batch can contain at most {max_size} articles"},
+                            status=status.HTTP_400_BAD_REQUEST)
+
+        writer = ArticleBulkWriter(items, request.user)
+        if not writer.is_valid():
+            # Nothing is written when any item is invalid
+            return Response({"results": writer.results()}, status=status.HTTP_400_BAD_REQUEST)
+        outcome = writer.save()
+        return Response({"results": writer.results(outcome)}, status=status.HTTP_201_CREATED)
+
 class ArticleCSVView(QueryParamValidationMixin,generics.ListAPIView):
     
     permission_classes = [IsAuthenticated]
@@ -91,41 +208,61 @@ class ArticleCSVView(QueryParamValidationMixin,generics.ListAPIView):
     """
     Get the current articles with filters,ordering,search
     """
-    queryset = Article.objects.all().distinct() # avoid duplicates
+    queryset = Article.objects.all() # m2m filters use EXISTS, so rows are never duplicated
     serializer_class = ArticleSerializer 
     filter_backends = [DjangoFilterBackend,filters.SearchFilter,filters.OrderingFilter]  # Enable filtering and searching
     search_fields = ['abstract', 'title'] # keyword search specific fields
     ordering_fields = '__all__'
     filterset_class = ArticleCSVFilter  # Use our custom filter
 
+    # Rows fetched per round-trip of the server-side cursor
+    chunk_size = 2000
+
     def get(self, request, *args, **kwargs):
 
-        """Generate CSV response """
-        response = HttpResponse(content_type='text/csv')
-        response['Content-Disposition'] = 'attachment; filename="articles.csv"'
-        # Create a csv writer to apply in the response
-        writer = csv.writer(response)
-        writer.writerow(['ID', 'title', 'abstract','authors', 'tags', 'publication_date'])  # CSV headers
+        """Generate a streaming CSV response """
         # Apply filters, ordering, and search BEFORE iterating through the articles
         filtered_queryset = self.filter_queryset(self.get_queryset())
-        for article in filtered_queryset:
-            writer.writerow([
-                article.id,
-                article.title,
-                article.abstract,
-                ", ".join([str(author) for author in article.authors.all()]),  # Handle Many-to-Many
-                ", ".join([str(tag) for tag in article.tags.all()]),  # Handle Many-to-Many
-                article.publication_date
-            ])
+        # Author and tag names are aggregated in SQL, so the export is a single query
+        rows = filtered_queryset.with_export_names().values_list(
+            'id', 'title', 'abstract', 'author_names', 'tag_names', 'publication_date'
+        ).iterator(chunk_size=self.chunk_size)
 
+        # Create a csv writer that hands every formatted line to the response
+        writer = csv.writer(Echo())
+        lines = (writer.writerow(row) for row in itertools.chain([CSV_COLUMNS], rows))
+        response = StreamingHttpResponse(lines, content_type='text/csv')
+        response['Content-Disposition'] = 'attachment; filename="articles.csv"'
         return response
 
-    
-        
-    
-
-
 
+class ArticleCSVImportView(generics.GenericAPIView):
+    """
+    View for loading articles from a file in the CSV export format
+    """
+    permission_classes = [IsAuthenticated,IsAdminUser]
+    parser_classes = [MultiPartParser]
 
+    def post(self, request, *args, **kwargs):
+        """
+        Import the uploaded 'file' and return how many rows were inserted, updated and rejected
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload the CSV as the 'file' field"}, status=status.HTTP_400_BAD_REQUEST)
+        # Decode the upload lazily, the importer reads it row by row
+        stream = io.TextIOWrapper(upload.file, encoding='utf-8-sig', newline='')
+        importer = ArticleCSVImporter(stream, batch_size=settings.ARTICLES_CSV_IMPORT_BATCH_SIZE)
+        try:
+            summary = importer.run()
+        except (CSVImportError, UnicodeDecodeError) as error:
+            return Response({"error": str(error), **importer.summary()}, status=status.HTTP_400_BAD_REQUEST)
+        return Response(summary, status=status.HTTP_200_OK)
 
 
+class Echo:
+    """
+    File-like object whose write() returns the line instead of buffering it
+    """
+    def write(self, value):
+        return value
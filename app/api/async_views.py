@@ -0,0 +1,163 @@
+from asgiref.sync import sync_to_async
+from django.conf import settings
+from django.core.cache import cache
+from django.http import Http404
+from django.utils.cache import get_conditional_response
+from django.views import View
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework.response import Response
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+from .authentication import CachedJWTAuthentication
+from .cache_versions import record_cache_result
+from .conditional_get_mixin import ConditionalGetMixin
+from .fast_list_mixin import FastListMixin
+from .response_cache_mixin import ResponseCacheMixin
+
+
+async def aauthenticate(request):
+    """
+    Async counterpart of DRF's Request._authenticate.
+    JWT users are loaded with the async ORM, other authenticators run in a thread.
+    """
+    for authenticator in request.authenticators:
+        try:
+            if isinstance(authenticator, JWTAuthentication):
+                user_auth_tuple = await jwt_aauthenticate(authenticator, request)
+            else:
+                user_auth_tuple = await sync_to_async(authenticator.authenticate)(request)
+        except Exception:
+            request._not_authenticated()
+            raise
+        if user_auth_tuple is not None:
+            request._authenticator = authenticator
+            request.user, request.auth = user_auth_tuple
+            return
+    request._not_authenticated()
+
+
+async def jwt_aauthenticate(authenticator, request):
+    header = authenticator.get_header(request)
+    if header is None:
+        return None
+    raw_token = authenticator.get_raw_token(header)
+    if raw_token is None:
+        return None
+    # Decoding and verifying the signature needs no I/O
+    validated_token = authenticator.get_validated_token(raw_token)
+    if isinstance(authenticator, CachedJWTAuthentication):
+        return await authenticator.aget_user(validated_token), validated_token
+    try:
+        user_id = validated_token[jwt_settings.USER_ID_CLAIM]
+    except KeyError:
+        raise InvalidToken("Token contained no recognizable user identification")
+    try:
+        user = await authenticator.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+    except authenticator.user_model.DoesNotExist:
+        raise AuthenticationFailed("User not found", code="user_not_found")
+    if jwt_settings.CHECK_USER_IS_ACTIVE and not user.is_active:
+        raise AuthenticationFailed("User is inactive", code="user_inactive")
+    if jwt_settings.CHECK_REVOKE_TOKEN and (
+        validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != get_md5_hash_password(user.password)
+    ):
+        raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+    return user, validated_token
+
+
+class AsyncReadView(View):
+    """
+    Async GET handler for a DRF generic view.
+    The DRF view still builds the queryset, filters, permissions, pagination links and
+    serializer, but every database round-trip goes through the async ORM, so a worker
+    keeps serving other requests while a query is running.
+    Use it as AsyncReadView.as_view(view_class=ArticleView).
+    """
+    view_class = None
+    http_method_names = ['get', 'options']
+
+    async def get(self, request, *args, **kwargs):
+        view = self.view_class(args=args, kwargs=kwargs, format_kwarg=None)
+        view.args, view.kwargs = args, kwargs
+        drf_request = view.initialize_request(request, *args, **kwargs)
+        view.request = drf_request
+        view.headers = view.default_response_headers
+        try:
+            await aauthenticate(drf_request)
+            # Content negotiation, permissions and throttles; the user is already loaded
+            view.initial(drf_request, *args, **kwargs)
+            response = await self.get_response(view, drf_request)
+        except Exception as exc:
+            response = view.handle_exception(exc)
+        response = view.finalize_response(drf_request, response, *args, **kwargs)
+        # 304 responses are plain HttpResponses, everything else is a DRF Response
+        return response.render() if isinstance(response, Response) else response
+
+    async def get_response(self, view, request):
+        validators = None
+        if isinstance(view, ConditionalGetMixin):
+            # The model versions come from the cache backend's blocking client
+            validators = await sync_to_async(view.get_validators)(request)
+            if validators is not None:
+                etag, last_modified = validators
+                response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+                if response is not None:
+                    return view.set_validators(response, etag, last_modified)
+
+        response = await self.get_cached_response(view, request)
+        if validators is not None and response.status_code == 200:
+            view.set_validators(response, *validators)
+        return response
+
+    async def get_cached_response(self, view, request):
+        if not isinstance(view, ResponseCacheMixin):
+            return Response(await self.get_data(view, request))
+
+        key = await sync_to_async(view.get_response_cache_key)(request)
+        data = await cache.aget(key)
+        name = type(view).__name__
+        if data is not None:
+            await sync_to_async(record_cache_result)(name, hit=True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        data = await self.get_data(view, request)
+        await sync_to_async(record_cache_result)(name, hit=False)
+        await cache.aset(key, data, view.get_response_cache_timeout())
+        response = Response(data)
+        response['X-Cache'] = 'MISS'
+        return response
+
+    async def get_data(self, view, request):
+        queryset = view.filter_queryset(view.get_queryset())
+        lookup_url_kwarg = view.lookup_url_kwarg or view.lookup_field
+        if lookup_url_kwarg in view.kwargs:
+            return await self.get_object_data(view, queryset, view.kwargs[lookup_url_kwarg])
+        return await self.get_list_data(view, queryset)
+
+    async def get_object_data(self, view, queryset, lookup_value):
+        try:
+            instance = await queryset.aget(**{view.lookup_field: lookup_value})
+        except queryset.model.DoesNotExist:
+            raise Http404
+        view.check_object_permissions(view.request, instance)
+        return view.get_serializer(instance).data
+
+    async def get_list_data(self, view, queryset):
+        if isinstance(view, FastListMixin):
+            queryset = view.get_list_queryset(queryset)
+            # The fast path runs one more query for the page, off the event loop
+            serialize = sync_to_async(view.get_list_data)
+        else:
+            async def serialize(items):
+                return view.get_serializer(items, many=True).data
+
+        paginator = view.paginator
+        if paginator is not None and hasattr(paginator, 'apaginate_queryset'):
+            page = await paginator.apaginate_queryset(queryset, view.request, view=view)
+            if page is not None:
+                return paginator.get_paginated_response(await serialize(page)).data
+        chunk_size = settings.REST_FRAMEWORK.get('PAGE_SIZE') or 100
+        return await serialize([item async for item in queryset.aiterator(chunk_size=chunk_size)])
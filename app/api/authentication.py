@@ -0,0 +1,184 @@
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt.authentication import JWTAuthentication
+from rest_framework_simplejwt.exceptions import InvalidToken
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.utils import get_md5_hash_password
+
+USER_CACHE_KEY = 'api:auth_user:{user_id}'
+# Removed on every write to the user. A shared entry is only used under the version it was
+# loaded with, so an entry loaded from a row that changed meanwhile is never served.
+USER_VERSION_KEY = 'api:auth_user_version:{user_id}'
+# Columns left out of the cached user, they are loaded on access. The password hash is
+# never cached, only the digest the token revocation check compares.
+UNCACHED_USER_FIELDS = ('password', 'last_login')
+
+# Per-process LRU copies of the shared entries: user id -> (expiry, entry)
+_local_users = OrderedDict()
+_local_users_lock = threading.Lock()
+
+
+def cached_user_fields(user_model):
+    """Names of the cached columns, in model order as Model.from_db() expects"""
+    return [field.attname for field in user_model._meta.concrete_fields if field.attname not in UNCACHED_USER_FIELDS]
+
+
+def user_cache_entry(user):
+    """What is cached for a user: its column values and its password digest"""
+    return {
+        'values': [getattr(user, name) for name in cached_user_fields(type(user))],
+        'password_digest': get_md5_hash_password(user.password),
+        'is_active': user.is_active,
+    }
+
+
+def forget_cached_user(user_id, using=DEFAULT_DB_ALIAS):
+    forget_cached_users([user_id], using)
+
+
+def forget_cached_users(user_ids, using=DEFAULT_DB_ALIAS):
+    """
+    Drop the cached users from the shared cache and from this process. Inside a transaction
+    they are dropped again on commit: a request may load the old rows in between.
+    """
+    user_ids = list(user_ids)
+    drop_cached_users(user_ids)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: drop_cached_users(user_ids), using=using, robust=True)
+
+
+def drop_cached_users(user_ids):
+    cache.delete_many([
+        key.format(user_id=user_id) for user_id in user_ids for key in (USER_CACHE_KEY, USER_VERSION_KEY)
+    ])
+    with _local_users_lock:
+        for user_id in user_ids:
+            _local_users.pop(user_id, None)
+
+
+def new_user_version():
+    # A version the user never had: entries loaded under an older one are stale
+    return time.time_ns()
+
+
+def get_shared_entry(user_id):
+    """
+    Return (entry, version): the shared entry, or None when it is missing or was loaded
+    under another version, and the version a newly loaded entry must be stored with
+    """
+    entry_key, version_key = USER_CACHE_KEY.format(user_id=user_id), USER_VERSION_KEY.format(user_id=user_id)
+    values = cache.get_many([entry_key, version_key])
+    version = values.get(version_key)
+    if version is None:
+        cache.add(version_key, new_user_version(), settings.AUTH_USER_CACHE_TIMEOUT)
+        version = cache.get(version_key)
+    entry = values.get(entry_key)
+    if entry is None or entry['version'] != version:
+        return None, version
+    return entry, version
+
+
+async def aget_shared_entry(user_id):
+    """Async counterpart of get_shared_entry"""
+    entry_key, version_key = USER_CACHE_KEY.format(user_id=user_id), USER_VERSION_KEY.format(user_id=user_id)
+    values = await cache.aget_many([entry_key, version_key])
+    version = values.get(version_key)
+    if version is None:
+        await cache.aadd(version_key, new_user_version(), settings.AUTH_USER_CACHE_TIMEOUT)
+        version = await cache.aget(version_key)
+    entry = values.get(entry_key)
+    if entry is None or entry['version'] != version:
+        return None, version
+    return entry, version
+
+
+def get_local_entry(user_id):
+    with _local_users_lock:
+        local = _local_users.get(user_id)
+        if local is None:
+            return None
+        if local[0] < time.monotonic():
+            del _local_users[user_id]
+            return None
+        _local_users.move_to_end(user_id)
+        return local[1]
+
+
+def set_local_entry(user_id, entry):
+    with _local_users_lock:
+        _local_users[user_id] = (time.monotonic() + settings.AUTH_USER_LOCAL_CACHE_TIMEOUT, entry)
+        _local_users.move_to_end(user_id)
+        while len(_local_users) > settings.AUTH_USER_LOCAL_CACHE_SIZE:
+            _local_users.popitem(last=False)
+
+
+class CachedJWTAuthentication(JWTAuthentication):
+    """
+    JWTAuthentication that resolves the token user from a cache instead of Postgres.
+    Entries live in a small per-process cache (AUTH_USER_LOCAL_CACHE_TIMEOUT seconds)
+    in front of the shared cache (AUTH_USER_CACHE_TIMEOUT seconds). Saving, updating or
+    deleting a user drops both, so other processes see the change after at most the local
+    timeout. The version read before loading a user guards the shared entry against a write
+    that lands between the load and the cache set.
+    request.user is a User instance built from the cached columns, without a query.
+    """
+
+    def get_user_id(self, validated_token):
+        try:
+            return validated_token[jwt_settings.USER_ID_CLAIM]
+        except KeyError:
+            raise InvalidToken("Token contained no recognizable user identification")
+
+    def load_entry(self, user_id):
+        try:
+            user = self.user_model.objects.get(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return user_cache_entry(user)
+
+    async def aload_entry(self, user_id):
+        try:
+            user = await self.user_model.objects.aget(**{jwt_settings.USER_ID_FIELD: user_id})
+        except self.user_model.DoesNotExist:
+            raise AuthenticationFailed("User not found", code="user_not_found")
+        return user_cache_entry(user)
+
+    def get_user(self, validated_token):
+        user_id = self.get_user_id(validated_token)
+        entry = get_local_entry(user_id)
+        if entry is None:
+            entry, version = get_shared_entry(user_id)
+            if entry is None:
+                entry = {**self.load_entry(user_id), 'version': version}
+                cache.set(USER_CACHE_KEY.format(user_id=user_id), entry, settings.AUTH_USER_CACHE_TIMEOUT)
+            set_local_entry(user_id, entry)
+        return self.build_user(entry, validated_token)
+
+    async def aget_user(self, validated_token):
+        """Async counterpart of get_user, for the async read views"""
+        user_id = self.get_user_id(validated_token)
+        entry = get_local_entry(user_id)
+        if entry is None:
+            entry, version = await aget_shared_entry(user_id)
+            if entry is None:
+                entry = {**await self.aload_entry(user_id), 'version': version}
+                await cache.aset(USER_CACHE_KEY.format(user_id=user_id), entry, settings.AUTH_USER_CACHE_TIMEOUT)
+            set_local_entry(user_id, entry)
+        return self.build_user(entry, validated_token)
+
+    def build_user(self, entry, validated_token):
+        """Check the cached user like JWTAuthentication does, then build the instance"""
+        if jwt_settings.CHECK_USER_IS_ACTIVE and not entry['is_active']:
+            raise AuthenticationFailed("User is inactive", code="user_inactive")
+        if jwt_settings.CHECK_REVOKE_TOKEN and (
+            validated_token.get(jwt_settings.REVOKE_TOKEN_CLAIM) != entry['password_digest']
+        ):
+            raise AuthenticationFailed("The user's password has been changed.", code="password_changed")
+        # A fresh instance per request, so nothing set on request.user leaks between requests
+        return self.user_model.from_db(DEFAULT_DB_ALIAS, cached_user_fields(self.user_model), entry['values'])
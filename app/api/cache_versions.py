@@ -0,0 +1,86 @@
+import time
+from django.core.cache import cache
+from django.db import DEFAULT_DB_ALIAS, connections, transaction
+
+# Version counters never expire, they are only ever bumped
+VERSION_TIMEOUT = None
+STATS_KEY = 'api:response_cache:{name}:{result}'
+
+
+def model_version_key(model):
+    return f'api:version:{model._meta.label_lower}'
+
+
+def get_model_versions(models):
+    """
+    Return the current version of each model (in order) with one cache round-trip.
+    A missing counter starts from the current time, so it can never fall back to a
+    version that cached entries were already stored under. A version is None when the
+    cache cannot keep the counter (DummyCache, or culled right after it was added).
+    """
+    keys = [model_version_key(model) for model in models]
+    versions = cache.get_many(keys)
+    for key in keys:
+        if key not in versions:
+            cache.add(key, time.time_ns(), VERSION_TIMEOUT)
+            versions[key] = cache.get(key)
+    return [versions[key] for key in keys]
+
+
+def bump_model_version(model, using=DEFAULT_DB_ALIAS):
+    """
+    Invalidate every cached entry that depends on model.
+    Inside a transaction the version is bumped now and again on commit: a concurrent
+    request can see the first bump while it still reads the old, uncommitted rows, and
+    what it caches under that version is dropped by the second one.
+    """
+    key = model_version_key(model)
+    increment_version(key)
+    if connections[using].in_atomic_block:
+        transaction.on_commit(lambda: increment_version(key), using=using, robust=True)
+
+
+def increment_version(key):
+    """
+    Move the version to the current time in nanoseconds, or one past it if that is later,
+    so a version also tells when the model last changed (see version_timestamp)
+    """
+    now = time.time_ns()
+    current = cache.get(key)
+    if current is None and cache.add(key, now, VERSION_TIMEOUT):
+        return
+    try:
+        cache.incr(key, max(1, now - (current or now)))
+    except ValueError:
+        cache.set(key, now, VERSION_TIMEOUT)
+
+
+def version_timestamp(version):
+    """The POSIX timestamp of the last change recorded by a version"""
+    return version / 1e9
+
+
+def record_cache_result(name, hit):
+    key = STATS_KEY.format(name=name, result='hits' if hit else 'misses')
+    if not cache.add(key, 1, None):
+        try:
+            cache.incr(key)
+        except ValueError:
+            cache.set(key, 1, None)
+
+
+def get_cache_stats(names):
+    """Hit/miss counters per name and in total"""
+    keys = {
+        (name, result): STATS_KEY.format(name=name, result=result)
+        for name in names for result in ('hits', 'misses')
+    }
+    values = cache.get_many(keys.values())
+    stats = {'hits': 0, 'misses': 0, 'views': {}}
+    for (name, result), key in keys.items():
+        count = values.get(key, 0)
+        stats['views'].setdefault(name, {})[result] = count
+        stats[result] += count
+    lookups = stats['hits'] + stats['misses']
+    stats['hit_ratio'] = round(stats['hits'] / lookups, 4) if lookups else None
+    return stats
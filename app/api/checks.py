@@ -0,0 +1,25 @@
+from django.conf import settings
+from django.core.checks import Error, Tags, register
+
+# Backends whose entries other server processes cannot see
+PROCESS_LOCAL_CACHES = (
+    'django.core.cache.backends.locmem.LocMemCache',
+    'django.core.cache.backends.dummy.DummyCache',
+)
+
+
+@register(Tags.caches, deploy=True)
+def check_shared_cache(app_configs, **kwargs):
+    """
+    The response cache versions, the authentication cache and the sign-in token buckets
+    live in the default cache. With a per-process backend a write only invalidates the
+    entries of the process that made it, so `check --deploy` rejects it.
+    """
+    if settings.CACHES['default']['BACKEND'] not in PROCESS_LOCAL_CACHES:
+        return []
+    return [Error(
+        "The default cache is private to each process, writes would not invalidate the "
+        "cached responses and users of the other server processes.",
+        hint="Set REDIS_URL, or silence api.E001 when a single process serves the API.",
+        id='api.E001',
+    )]
@@ -1,9 +1,8 @@
 from django_filters import rest_framework as filters
+from api.publication_date_filters import PublicationDateFilterSet
 from .models import Comment
 
-class CommentFilter(filters.FilterSet):
-    year = filters.NumberFilter(field_name="publication_date", lookup_expr='year')
-    month = filters.NumberFilter(field_name="publication_date", lookup_expr='month')
+class CommentFilter(PublicationDateFilterSet):
     author = filters.CharFilter(field_name='author',lookup_expr='exact')
     article = filters.CharFilter(field_name='article',lookup_expr='exact')
     class Meta:
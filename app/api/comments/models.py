@@ -1,15 +1,32 @@
 from django.db import models
+from django.db.models.functions import ExtractMonth
+from django.contrib.postgres.indexes import GinIndex
+from django.contrib.postgres.search import SearchVectorField
 from api.articles.models import Article
 from api.models import User
+from api.search_vector import SearchVectorModelMixin, SearchVectorQuerySet
 
 
+class CommentQuerySet(SearchVectorQuerySet):
+    """
+    QuerySet that keeps the stored search vector in sync on bulk writes
+    """
+    search_vector_fields = ('text',)
+
     
-class Comment(models.Model):
+class Comment(SearchVectorModelMixin, models.Model):
      
      publication_date = models.DateField(auto_now=True)
      author = models.ForeignKey(User,on_delete=models.CASCADE)
      text = models.TextField()
-     article = models.ForeignKey(Article,on_delete=models.CASCADE)
+     # Indexed by comment_article_id_idx, which also serves lookups on article_id alone
+     article = models.ForeignKey(Article,on_delete=models.CASCADE,db_index=False)
+     # Change marker used as the HTTP validator (ETag / Last-Modified)
+     updated_at = models.DateTimeField(auto_now=True)
+     # Stored tsvector of text, maintained by CommentQuerySet and save()
+     search_vector = SearchVectorField(null=True, editable=False)
+
+     objects = CommentQuerySet.as_manager()
 
      def __str__(self):
         return self.text
@@ -17,3 +34,14 @@ class Comment(models.Model):
      class Meta:
         db_table = 'Comment'
         ordering = ['id']
+        indexes = [
+            # Keyset pagination seeks on (ordering key, id)
+            models.Index(fields=['publication_date', 'id'], name='comment_pub_date_id_idx'),
+            # Comments of an article in id order (nested list endpoint, cascades, filters)
+            models.Index(fields=['article', 'id'], name='comment_article_id_idx'),
+            # Month filters without a year match EXTRACT(MONTH FROM publication_date)
+            models.Index(ExtractMonth('publication_date'), name='comment_pub_month_idx'),
+            # Keyword search matches the stored vector; scoped by article, the planner
+            # combines it with comment_article_id_idx (BitmapAnd)
+            GinIndex(fields=['search_vector'], name='comment_search_vector_idx'),
+        ]
@@ -9,5 +9,5 @@ class CommentSerializer(serializers.ModelSerializer):
     article = serializers.PrimaryKeyRelatedField(queryset=Article.objects.all())
     class Meta:
         model = Comment
-        fields = '__all__'
+        exclude = ['search_vector', 'updated_at']
 
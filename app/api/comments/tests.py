@@ -1,3 +1,4 @@
+import io
 from django.urls import reverse
 from rest_framework import status
 from rest_framework.test import APITestCase
@@ -6,6 +7,9 @@ from api.articles.models import Article
 from .models import Comment
 from api.tags.models import Tag
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from django.core.management import call_command
 
 class CommentAPITestCase(APITestCase):
     def setUp(self):
@@ -199,4 +203,200 @@ class CommentDetailsTest(CommentAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         
         # Verify comment still exists
-        self.assertTrue(Comment.objects.filter(id=self.comment.id).exists())
\ No newline at end of file
+        self.assertTrue(Comment.objects.filter(id=self.comment.id).exists())
+
+
+class CommentQueryCountTest(CommentAPITestCase):
+    def list_queries(self, limit):
+        self.authenticate_user()
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('comments_list'), {'limit': limit})
+        self.assertEqual(len(response.data['results']), limit)
+        return len(queries)
+
+    def test_list_query_count_is_constant(self):
+        """Test that the list endpoint query count does not depend on the page size"""
+        for i in range(5):
+            Comment.objects.create(text=f"Comment {i}", author=self.user, article=self.article)
+        self.list_queries(2)  # the first request also fills the authentication cache
+        self.assertEqual(self.list_queries(1), self.list_queries(6))
+
+
+class CommentConditionalGetTest(CommentAPITestCase):
+    def test_comment_not_modified_until_updated(self):
+        """Test that a comment answers 304 until it is changed"""
+        self.authenticate_author()
+        etag = self.client.get(self.url)['ETag']
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_304_NOT_MODIFIED)
+
+        self.comment.text = "Edited"
+        self.comment.save()
+        response = self.client.get(self.url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['text'], "Edited")
+
+class CommentAsyncViewTest(CommentAPITestCase):
+    def test_async_views_match_sync_views(self):
+        """Test that the async list and detail views return the sync responses"""
+        self.authenticate_user()
+        self.assertEqual(self.client.get(reverse('comments_list_async')).json(),
+                         self.client.get(reverse('comments_list')).json())
+        response = self.client.get(reverse('comment_details_async', kwargs={'comment_id': self.comment.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.client.get(self.url).json())
+
+class CommentCountTest(CommentAPITestCase):
+    def assertCommentCount(self, article, expected):
+        article.refresh_from_db()
+        self.assertEqual(article.comment_count, expected)
+
+    def test_create_and_delete_update_the_counter(self):
+        """Test that the article counter follows comments created and deleted through the API"""
+        self.assertCommentCount(self.article, 1)
+        self.authenticate_author()
+        response = self.client.post(reverse('comments_list'), {'text': 'Second', 'article': self.article.id})
+        self.assertEqual(response.status_code, status.HTTP_201_CREATED)
+        self.assertCommentCount(self.article, 2)
+
+        self.client.delete(self.url)
+        self.assertCommentCount(self.article, 1)
+
+    def test_delete_with_a_drifted_counter(self):
+        """Test that deleting a comment when the counter is already 0 keeps it at 0"""
+        Article.objects.filter(pk=self.article.pk).update(comment_count=0)
+        self.authenticate_author()
+        response = self.client.delete(self.url)
+        self.assertEqual(response.status_code, status.HTTP_204_NO_CONTENT)
+        self.assertCommentCount(self.article, 0)
+
+    def test_moving_a_comment_moves_the_count(self):
+        """Test that changing the comment article updates both counters"""
+        other = Article.objects.create(title="Other", abstract="Other")
+        self.authenticate_author()
+        response = self.client.put(self.url, {'text': 'Moved', 'article': other.id})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertCommentCount(self.article, 0)
+        self.assertCommentCount(other, 1)
+
+    def test_cascade_deletes(self):
+        """Test that comments deleted by a cascade are counted, and article deletes still work"""
+        Comment.objects.create(text="By user", author=self.user, article=self.article)
+        self.assertCommentCount(self.article, 2)
+        self.user.delete()
+        self.assertCommentCount(self.article, 1)
+
+        self.article.delete()
+        self.assertFalse(Comment.objects.exists())
+
+
+class CommentSearchTest(CommentAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_article = Article.objects.create(title="Other", abstract="Other")
+        self.match = Comment.objects.create(text="Great results on galaxies", author=self.user, article=self.article)
+        self.better = Comment.objects.create(
+            text="Galaxies, galaxies and more galaxies", author=self.author, article=self.article
+        )
+        self.elsewhere = Comment.objects.create(
+            text="Galaxies again", author=self.author, article=self.other_article
+        )
+        self.authenticate_user()
+
+    def search(self, **params):
+        response = self.client.get(reverse('comments_list'), params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [c['id'] for c in response.data['results']]
+
+    def test_keyword_search_ranks_matches(self):
+        """Test that keyword search matches the stored vector, ordered by rank"""
+        ids = self.search(keyword='galaxy')
+        self.assertEqual(ids[0], self.better.id)
+        self.assertCountEqual(ids, [self.match.id, self.better.id, self.elsewhere.id])
+        self.assertNotIn(self.comment.id, ids)
+
+    def test_keyword_search_combines_with_filters(self):
+        """Test that keyword search is scoped by the article and author filters"""
+        self.assertEqual(self.search(keyword='galaxies', article=self.other_article.id), [self.elsewhere.id])
+        self.assertEqual(self.search(keyword='galaxies', article=self.article.id, author=self.user.id),
+                         [self.match.id])
+
+    def test_keyword_search_uses_stored_vector(self):
+        """Test that the search query matches the stored column instead of scanning text"""
+        with CaptureQueriesContext(connection) as queries:
+            self.search(keyword='galaxies')
+        sql = ' '.join(query['sql'] for query in queries)
+        self.assertIn('"search_vector" @@', sql)
+        self.assertNotIn('UPPER', sql)
+
+    def test_edits_refresh_the_vector(self):
+        """Test that save and bulk writes keep the stored vector in sync"""
+        self.match.text = "Nebulae"
+        self.match.save()
+        Comment.objects.filter(pk=self.better.pk).update(text="Nebulae too")
+        self.assertEqual(self.search(keyword='galaxies'), [self.elsewhere.id])
+        self.assertCountEqual(self.search(keyword='nebula'), [self.match.id, self.better.id])
+
+    def test_backfill_command(self):
+        """Test that the backfill command fills missing comment vectors"""
+        Comment.objects.update(search_vector=None)
+        call_command('update_search_vectors', models=['comments'], batch_size=1, stdout=io.StringIO())
+        self.assertFalse(Comment.objects.filter(search_vector__isnull=True).exists())
+
+
+class ArticleCommentsTest(CommentAPITestCase):
+    def setUp(self):
+        super().setUp()
+        self.other_article = Article.objects.create(title="Other", abstract="Other")
+        Comment.objects.create(text="Elsewhere", author=self.user, article=self.other_article)
+        self.comments = [self.comment] + [
+            Comment.objects.create(text=f"Reply {i}", author=self.user, article=self.article)
+            for i in range(4)
+        ]
+        self.list_url = reverse('article_comments', kwargs={'article_id': self.article.id})
+        self.authenticate_user()
+
+    def test_lists_article_comments_with_cursor(self):
+        """Test that the pages walk the article's comments in id order"""
+        ids = []
+        url, params = self.list_url, {'limit': 2}
+        while url:
+            response = self.client.get(url, params)
+            self.assertEqual(response.status_code, status.HTTP_200_OK)
+            ids += [c['id'] for c in response.data['results']]
+            url, params = response.data['next'], None
+        self.assertEqual(ids, [c.id for c in self.comments])
+        self.assertEqual(response.data['results'][-1]['author'], str(self.user))
+
+    def test_missing_article(self):
+        """Test that an unknown article is a 404"""
+        response = self.client.get(reverse('article_comments', kwargs={'article_id': 0}))
+        self.assertEqual(response.status_code, status.HTTP_404_NOT_FOUND)
+
+    def test_invalid_parameter(self):
+        """Test that filters of the global comment list are rejected"""
+        response = self.client.get(self.list_url, {'author': self.user.id})
+        self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_page_queries(self):
+        """Test that a page seeks the (article_id, id) index with the author joined"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(self.list_url, {'limit': 2, 'cursor': ''})
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        page_sql = [q['sql'] for q in queries if 'FROM "Comment"' in q['sql'] and 'LIMIT 3' in q['sql']]
+        self.assertEqual(len(page_sql), 1)
+        self.assertIn('JOIN "User"', page_sql[0].replace('INNER ', ''))
+        self.assertIn('ORDER BY "Comment"."id" ASC', page_sql[0])
+
+    def test_page_is_the_only_query(self):
+        """Test that a page runs no aggregate over the article's comments nor an article lookup"""
+        self.client.get(self.list_url, {'limit': 2})  # the first request also fills the authentication cache
+        with self.assertNumQueries(1):
+            response = self.client.get(self.list_url, {'limit': 3})
+        self.assertEqual(len(response.data['results']), 3)
+        self.assertNotIn('ETag', response)
+
+        empty = Article.objects.create(title="Empty", abstract="Empty")
+        response = self.client.get(reverse('article_comments', kwargs={'article_id': empty.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.data['results'], [])
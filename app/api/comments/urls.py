@@ -1,8 +1,12 @@
 from django.urls import path
+from api.async_views import AsyncReadView
 from .views import CommentView,RetrieveUpdateDeleteComment
 
 urlpatterns = [
     # Token auth endpoint
     path('', CommentView.as_view(), name='comments_list'),
     path('<int:comment_id>/', RetrieveUpdateDeleteComment.as_view(), name='comment_details'),
+    # Async GET handlers of the list and detail views, for ASGI deployments
+    path('async/', AsyncReadView.as_view(view_class=CommentView), name='comments_list_async'),
+    path('async/<int:comment_id>/', AsyncReadView.as_view(view_class=RetrieveUpdateDeleteComment), name='comment_details_async'),
 ]
\ No newline at end of file
@@ -1,38 +1,73 @@
 from rest_framework import generics, filters
 from rest_framework.permissions import IsAuthenticated
-from rest_framework.exceptions import ValidationError
+from rest_framework.exceptions import NotFound, ValidationError
 from django_filters.rest_framework import DjangoFilterBackend
+from django.db import transaction
 from .models import Comment
 from .serializers import CommentSerializer
 from .filters import CommentFilter
 from api.query_parameters_mixin import QueryParamValidationMixin
+from api.queryset_optimizer_mixin import QuerysetOptimizerMixin
+from api.keyword_search_mixin import KeywordSearchMixin
+from api.response_cache_mixin import ResponseCacheMixin
+from api.conditional_get_mixin import ConditionalGetMixin
+from api.models import User
+from api.articles.models import Article
 from api.custom_permissions import IsAuthor
+from api.pagination import KeysetPagination
 
-class CommentView(QueryParamValidationMixin,generics.ListCreateAPIView):
+class CommentView(ConditionalGetMixin,ResponseCacheMixin,KeywordSearchMixin,QuerysetOptimizerMixin,QueryParamValidationMixin,generics.ListCreateAPIView):
     """
     View for retrieving and creating comments
     """
     permission_classes = [IsAuthenticated]
-    queryset = Comment.objects.all().distinct() # avoid duplicates
+    queryset = Comment.objects.all() # filters only follow foreign keys, so rows are never duplicated
     serializer_class = CommentSerializer
-    filter_backends = [DjangoFilterBackend, filters.SearchFilter,filters.OrderingFilter]
-    search_fields = ['text']
+    filter_backends = [DjangoFilterBackend,filters.OrderingFilter]
     ordering_fields = '__all__'
     filterset_class = CommentFilter
+    cache_models = (Comment, User)
 
     def perform_create(self, serializer):
         """
         Custom logic to associate the comment with the logged-in user
         """
-        
-        serializer.save(author=self.request.user)
+        # The article comment counter is updated in the same transaction
+        with transaction.atomic():
+            serializer.save(author=self.request.user)
 
-class RetrieveUpdateDeleteComment(generics.RetrieveUpdateDestroyAPIView):
+class ArticleCommentsView(ResponseCacheMixin,QuerysetOptimizerMixin,QueryParamValidationMixin,generics.ListAPIView):
+    """
+    Comments of one article in id order, with cursor pagination.
+    Every page is a range scan of the (article_id, id) index, whatever the size of the table.
+    """
+    permission_classes = [IsAuthenticated]
+    queryset = Comment.objects.all()
+    serializer_class = CommentSerializer
+    pagination_class = KeysetPagination
+    filter_backends = []
+    cache_models = (Comment, User, Article)
+
+    def get_valid_filters(self):
+        return {'limit', 'cursor'}
+
+    def list(self, request, *args, **kwargs):
+        response = super().list(request, *args, **kwargs)
+        # 404 for a missing article instead of an empty page, only empty pages need the lookup
+        if not response.data['results'] and not Article.objects.filter(pk=self.kwargs['article_id']).exists():
+            raise NotFound({"error": "Article not found"})
+        return response
+
+    def get_queryset(self):
+        return super().get_queryset().filter(article_id=self.kwargs['article_id'])
+
+class RetrieveUpdateDeleteComment(ConditionalGetMixin,ResponseCacheMixin,QuerysetOptimizerMixin,generics.RetrieveUpdateDestroyAPIView):
 
     permission_classes = [IsAuthenticated]
     serializer_class = CommentSerializer
     queryset = Comment.objects.all().distinct()
     lookup_url_kwarg = 'comment_id'
+    cache_models = (Comment, User)
     filter_backends = [DjangoFilterBackend]  # Enable filtering and searching
 
     def get_permissions(self):
@@ -47,3 +82,14 @@ class RetrieveUpdateDeleteComment(generics.RetrieveUpdateDestroyAPIView):
             return [IsAuthenticated() , IsAuthor()]
         # Default to the class-level permissions
         return super().get_permissions()
+
+    def perform_update(self, serializer):
+        """
+        Move the comment counter when the comment is moved to another article
+        """
+        previous_article_id = serializer.instance.article_id
+        with transaction.atomic():
+            comment = serializer.save()
+            if comment.article_id != previous_article_id:
+                Article.objects.filter(pk=previous_article_id).adjust_comment_count(-1)
+                Article.objects.filter(pk=comment.article_id).adjust_comment_count(1)
@@ -0,0 +1,55 @@
+import hashlib
+from django.utils.cache import get_conditional_response
+from django.utils.http import http_date
+from .cache_versions import version_timestamp
+from .response_cache_mixin import ResponseCacheMixin
+
+
+class ConditionalGetMixin:
+    """
+    ETag / Last-Modified for GET requests of a ResponseCacheMixin view, derived from the
+    model version counters without a query: the ETag changes whenever the response cache
+    key does, and Last-Modified is the last write to any of the cache_models.
+    Matching If-None-Match / If-Modified-Since requests get a 304 before the response
+    cache or the database is looked up.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        if not issubclass(cls, ResponseCacheMixin):
+            raise TypeError(f"{cls.__name__} must also inherit ResponseCacheMixin, its validators come from it")
+
+    def get(self, request, *args, **kwargs):
+        validators = self.get_validators(request)
+        if validators is not None:
+            etag, last_modified = validators
+            response = get_conditional_response(request, etag=etag, last_modified=last_modified)
+            if response is not None:
+                return self.set_validators(response, etag, last_modified)
+
+        response = super().get(request, *args, **kwargs)
+        if validators is not None and response.status_code == 200:
+            self.set_validators(response, *validators)
+        return response
+
+    def get_validators(self, request):
+        """
+        Return (etag, last modified timestamp) for the response, or None when the cache
+        could not keep a model version (a dummy backend, or culled right away): without it
+        a write could leave the validators unchanged
+        """
+        versions = self.get_cache_versions()
+        if None in versions:
+            return None
+        fingerprint = hashlib.md5(repr((
+            self.get_response_cache_key(request),
+            request.accepted_media_type,
+        )).encode('utf-8')).hexdigest()
+        timestamp = int(max(map(version_timestamp, versions))) if versions else None
+        return f'W/"{fingerprint}"', timestamp
+
+    def set_validators(self, response, etag, last_modified):
+        response['ETag'] = etag
+        if last_modified is not None:
+            response['Last-Modified'] = http_date(last_modified)
+        return response
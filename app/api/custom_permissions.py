@@ -2,8 +2,16 @@ from rest_framework.permissions import BasePermission
 
 class IsAnAuthor(BasePermission):
     def has_object_permission(self, request, view, obj):
-        # check if curr user is one of the author(s)
-        return request.user in obj.authors.all()
+        # check if curr user is one of the author(s), with one EXISTS query on the
+        # through table instead of loading every author, memoized for the request
+        checked = getattr(request, '_authored_articles', None)
+        if checked is None:
+            checked = request._authored_articles = {}
+        if obj.pk not in checked:
+            checked[obj.pk] = obj.authors.through.objects.filter(
+                article_id=obj.pk, user_id=request.user.pk
+            ).exists()
+        return checked[obj.pk]
     
 class IsAuthor(BasePermission):
     def has_object_permission(self, request, view, obj):
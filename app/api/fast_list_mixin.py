@@ -0,0 +1,41 @@
+from django.conf import settings
+from rest_framework.response import Response
+
+
+class FastListMixin:
+    """
+    Optional serializer-free path for read-only list requests.
+    The view pages over plain rows from list_values() and turns a page into the
+    response items with list_data(), which must return exactly what the serializer
+    would. fast_list_setting names the setting that turns the path on, views setting
+    it must define both hooks.
+    """
+    fast_list_setting = None
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        missing = [name for name in ('list_values', 'list_data') if not callable(getattr(cls, name, None))]
+        if cls.fast_list_setting and missing:
+            raise TypeError(f"{cls.__name__} sets fast_list_setting but does not define {', '.join(missing)}")
+
+    def use_fast_list(self):
+        return bool(self.fast_list_setting and getattr(settings, self.fast_list_setting, False))
+
+    def get_list_queryset(self, queryset):
+        if self.use_fast_list():
+            # Rows are dicts, prefetching has nothing to attach to
+            return self.list_values(queryset.prefetch_related(None))
+        return queryset
+
+    def get_list_data(self, items):
+        if self.use_fast_list():
+            return self.list_data(list(items))
+        return self.get_serializer(items, many=True).data
+
+    def list(self, request, *args, **kwargs):
+        queryset = self.get_list_queryset(self.filter_queryset(self.get_queryset()))
+
+        page = self.paginate_queryset(queryset)
+        if page is not None:
+            return self.get_paginated_response(self.get_list_data(page))
+        return Response(self.get_list_data(queryset))
@@ -0,0 +1,35 @@
+from django.contrib.postgres.search import SearchQuery
+from rest_framework.exceptions import ValidationError
+
+
+class KeywordSearchMixin:
+    """
+    Full-text search of ?keyword= over the stored search vector of a SearchVectorQuerySet,
+    applied after the filters. ?search_type= selects how the keyword is parsed: plain
+    (all words), phrase (words in sequence) or websearch ("quoted phrases", or, -word).
+    """
+    search_types = ('plain', 'phrase', 'websearch')
+
+    def get_valid_filters(self):
+        return super().get_valid_filters() | {'search_type'}
+
+    def get_search_type(self):
+        search_type = self.request.query_params.get('search_type', 'plain')
+        if search_type not in self.search_types:
+            raise ValidationError({"error": f"The 'search_type' parameter must be one of {', '.join(self.search_types)}"})
+        return search_type
+
+    def get_search_query(self):
+        """SearchQuery of the request, None without keyword"""
+        keyword = self.request.query_params.get('keyword', None)
+        if not keyword:
+            return None
+        return SearchQuery(keyword, search_type=self.get_search_type())
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        query = self.get_search_query()
+        if query is not None:
+            # Match through the GIN-indexed stored vector, then rank the matches
+            queryset = queryset.search(query)
+        return queryset
@@ -0,0 +1,43 @@
+import time
+
+from django.core.management.base import BaseCommand
+from django.db import transaction
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow
+
+
+class Command(BaseCommand):
+    help = "Delete expired outstanding and blacklisted tokens in primary key batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=1000,
+                            help='Number of outstanding tokens deleted per transaction')
+        parser.add_argument('--sleep', type=float, default=0,
+                            help='Seconds to pause between batches, to leave room for other writes')
+
+    def handle(self, *args, **options):
+        # Fixed for the whole run, so tokens expiring meanwhile are left for the next one
+        now = aware_utcnow()
+        expired = OutstandingToken.objects.filter(expires_at__lte=now).order_by('pk')
+
+        deleted = 0
+        blacklisted = 0
+        last_pk = 0
+        while True:
+            # Walk the primary key so each transaction stays short and locks few rows.
+            # Tokens expire in creation order, the expired ones are at the start of the index.
+            pks = list(expired.filter(pk__gt=last_pk).values_list('pk', flat=True)[:options['batch_size']])
+            if not pks:
+                break
+            with transaction.atomic():
+                # Blacklist rows first, in one DELETE, so the cascade has nothing left to collect
+                blacklisted += BlacklistedToken.objects.filter(token_id__in=pks).delete()[0]
+                deleted += OutstandingToken.objects.filter(pk__in=pks).only('pk').delete()[0]
+            last_pk = pks[-1]
+            self.stdout.write(f"Deleted {deleted} outstanding and {blacklisted} blacklisted tokens")
+            if options['sleep']:
+                time.sleep(options['sleep'])
+
+        self.stdout.write(self.style.SUCCESS(
+            f"Done: {deleted} outstanding and {blacklisted} blacklisted tokens deleted"
+        ))
@@ -0,0 +1,36 @@
+import time
+
+from django.core.management.base import BaseCommand, CommandError
+from api.seeding import seed_data
+
+
+class Command(BaseCommand):
+    help = "Bulk insert synthetic users, tags, articles and comments with Zipf-distributed fan-out"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--users', type=int, default=1000)
+        parser.add_argument('--tags', type=int, default=500)
+        parser.add_argument('--articles', type=int, default=10000)
+        parser.add_argument('--comments', type=int, default=20000)
+        parser.add_argument('--max-authors', type=int, default=5, help='Most authors of one article')
+        parser.add_argument('--max-tags', type=int, default=8, help='Most tags of one article')
+        parser.add_argument('--exponent', type=float, default=1.1,
+                            help='Zipf exponent of the author, tag and comment popularity')
+        parser.add_argument('--years', type=float, default=10, help='Publication dates span this many years back')
+        parser.add_argument('--password', help='Password of every seeded user (default: unusable)')
+        parser.add_argument('--seed', type=int, default=1, help='Random seed, the same seed gives the same data')
+        parser.add_argument('--batch-size', type=int, default=5000, help='Rows inserted per statement')
+
+    def handle(self, *args, **options):
+        if min(options['users'], options['tags'], options['articles'], options['comments']) < 0:
+            raise CommandError("Counts cannot be negative")
+        if options['max_authors'] < 1 or options['max_tags'] < 1:
+            raise CommandError("--max-authors and --max-tags must be at least 1")
+        started = time.perf_counter()
+        seed_data(
+            users=options['users'], tags=options['tags'], articles=options['articles'],
+            comments=options['comments'], max_authors=options['max_authors'], max_tags=options['max_tags'],
+            exponent=options['exponent'], years=options['years'], password=options['password'],
+            seed=options['seed'], batch_size=options['batch_size'], progress=self.stdout.write,
+        )
+        self.stdout.write(self.style.SUCCESS(f"Done in {time.perf_counter() - started:.1f}s"))
@@ -0,0 +1,44 @@
+from django.core.management.base import BaseCommand
+from api.articles.models import Article
+from api.comments.models import Comment
+
+# Models with a stored search vector, by command line name
+SEARCH_VECTOR_MODELS = {
+    'articles': Article,
+    'comments': Comment,
+}
+
+
+class Command(BaseCommand):
+    help = "Backfill the stored full-text search vectors in primary key batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=5000,
+                            help='Number of rows updated per statement')
+        parser.add_argument('--all', action='store_true',
+                            help='Recompute every row, not only rows without a vector')
+        parser.add_argument('--models', nargs='+', choices=list(SEARCH_VECTOR_MODELS),
+                            default=list(SEARCH_VECTOR_MODELS),
+                            help='Models to backfill (default: all)')
+
+    def handle(self, *args, **options):
+        for name in options['models']:
+            self.backfill(name, SEARCH_VECTOR_MODELS[name], options['batch_size'], options['all'])
+
+    def backfill(self, name, model, batch_size, recompute_all):
+        queryset = model.objects.order_by('pk')
+        if not recompute_all:
+            queryset = queryset.filter(search_vector__isnull=True)
+
+        updated = 0
+        last_pk = 0
+        while True:
+            # Walk the primary key so each statement stays short and locks few rows
+            pks = list(queryset.filter(pk__gt=last_pk).values_list('pk', flat=True)[:batch_size])
+            if not pks:
+                break
+            updated += model.objects.filter(pk__in=pks).update_search_vector()
+            last_pk = pks[-1]
+            self.stdout.write(f"Updated {updated} {name} search vectors")
+
+        self.stdout.write(self.style.SUCCESS(f"Done: {updated} {name} search vectors updated"))
@@ -4,14 +4,31 @@ from django.contrib.auth.models import (
     BaseUserManager, AbstractBaseUser
 )
 from django.utils import timezone
+from api.cache_versions import bump_model_version
 
 
+class UserQuerySet(models.QuerySet):
+    """
+    QuerySet that keeps the authentication and response caches in sync on bulk updates
+    """
 
-class CustomUserManager(BaseUserManager):
+    def update(self, **kwargs):
+        from api.authentication import forget_cached_users
 
-    def create_user(self, email, first_name, last_name, password=None):
+        user_ids = list(self.values_list('pk', flat=True))
+        rows = super().update(**kwargs)
+        # Bulk writes send no signals, invalidate the cached users here
+        forget_cached_users(user_ids, self.db)
+        bump_model_version(self.model, self.db)
+        return rows
+
+
+class CustomUserManager(BaseUserManager.from_queryset(UserQuerySet)):
+
+    def create_user(self, email, first_name, last_name, password=None, password_hash=None):
         """
         Creates and saves a User with the given email, first name, last name and password.
+        password_hash, when given, is an already hashed password stored as is.
         """
         if not email:
             raise ValueError('Users must have an email address')
@@ -26,7 +43,10 @@ class CustomUserManager(BaseUserManager):
             last_name=last_name,
         )
 
-        user.set_password(password)
+        if password_hash is not None:
+            user.password = password_hash
+        else:
+            user.set_password(password)
         user.save()
         return user
 
@@ -49,25 +69,17 @@ class CustomUserManager(BaseUserManager):
     
 
     def check_user_credentials(self,email, first_name, last_name, password):
-        
-        from django.contrib.auth import get_user_model
-    
-        User = get_user_model()
-    
-        try:
-        # First check if a user with this email exists
-            user = User.objects.get(email=email,first_name = first_name, last_name = last_name)
-        
-        # Then verify the password
-            if user.check_password(password):
-                return True, user
-            else:
-            # Email exists but password is wrong
-                return False, None
-            
-        except User.DoesNotExist:
-        # No user with this email exists
-            return False, None
+        """
+        Return (True, user) when the credentials match, else (False, None).
+        One query on the unique email index; the password is verified on the
+        bounded hashing pool, also when no user matches so timing reveals nothing.
+        """
+        from api.password_pool import get_password_pool
+
+        user = self.filter(email=email, first_name=first_name, last_name=last_name).first()
+        if get_password_pool().check_password(user, password):
+            return True, user
+        return False, None
 # Define the User Model
 
 class User(AbstractBaseUser):
@@ -0,0 +1,255 @@
+import datetime
+import json
+from base64 import urlsafe_b64decode, urlsafe_b64encode
+from decimal import Decimal
+
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Q
+from rest_framework.exceptions import NotFound, ValidationError
+from rest_framework.pagination import BasePagination, LimitOffsetPagination, _positive_int
+from rest_framework.response import Response
+from rest_framework.settings import api_settings
+from rest_framework.utils.urls import remove_query_param, replace_query_param
+
+
+def _encode_value(value):
+    """Make an ordering key value JSON serializable without losing precision"""
+    if isinstance(value, (datetime.date, datetime.time)):
+        return value.isoformat()
+    if isinstance(value, Decimal):
+        return str(value)
+    return value
+
+
+async def _alist(queryset, chunk_size):
+    """Evaluate a queryset with the async iterator, chunk_size also enables prefetch_related"""
+    return [item async for item in queryset.aiterator(chunk_size=max(chunk_size, 1))]
+
+
+class KeysetPagination(BasePagination):
+    """
+    Cursor pagination that seeks on the current ordering key plus the primary key.
+    Every page is an indexed range scan, however deep the client has walked.
+    """
+    cursor_query_param = 'cursor'
+    limit_query_param = 'limit'
+    default_limit = api_settings.PAGE_SIZE
+    max_limit = None
+    invalid_cursor_message = 'Invalid cursor'
+
+    def paginate_queryset(self, queryset, request, view=None):
+        return self.set_page(list(self.get_page_queryset(queryset, request)))
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset"""
+        return self.set_page(await _alist(self.get_page_queryset(queryset, request), self.limit + 1))
+
+    def get_page_queryset(self, queryset, request):
+        """Order and seek the queryset, limited to the page plus one row"""
+        self.request = request
+        self.limit = self.get_limit(request)
+        self.keys = self.get_ordering_keys(queryset)
+
+        cursor = self.decode_cursor(request)
+        self.reverse = cursor is not None and cursor['r']
+        self.seeking = cursor is not None and cursor['v'] is not None
+        keys = [(name, not descending) for name, descending in self.keys] if self.reverse else self.keys
+
+        queryset = queryset.order_by(*[('-' if descending else '') + name for name, descending in keys])
+        if self.seeking:
+            queryset = queryset.filter(self.seek_filter(keys, cursor['v']))
+        # Fetch one extra row to know whether another page follows
+        return queryset[:self.limit + 1]
+
+    def set_page(self, results):
+        has_more = len(results) > self.limit
+        results = results[:self.limit]
+        if self.reverse:
+            results.reverse()
+            self.has_next, self.has_previous = True, has_more
+        else:
+            self.has_next, self.has_previous = has_more, self.seeking
+
+        self.page = results
+        return results
+
+    def get_paginated_response(self, data):
+        return Response({
+            'next': self.get_next_link(),
+            'previous': self.get_previous_link(),
+            'results': data,
+        })
+
+    def get_paginated_response_schema(self, schema):
+        return {
+            'type': 'object',
+            'required': ['results'],
+            'properties': {
+                'next': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'previous': {'type': 'string', 'nullable': True, 'format': 'uri'},
+                'results': schema,
+            },
+        }
+
+    def get_limit(self, request):
+        try:
+            return _positive_int(
+                request.query_params[self.limit_query_param],
+                strict=True,
+                cutoff=self.max_limit
+            )
+        except (KeyError, ValueError):
+            return self.default_limit
+
+    def get_ordering_keys(self, queryset):
+        """
+        Return the queryset ordering as (column, descending) pairs ending with the primary key.
+        The primary key tiebreak follows the direction of the first key, so a (key, id)
+        index can serve both the ORDER BY and the seek, read forwards or backwards.
+        """
+        ordering = queryset.query.order_by or queryset.query.get_meta().ordering
+        pk_name = queryset.model._meta.pk.attname
+        keys = []
+        for term in ordering:
+            if not isinstance(term, str):
+                raise ValidationError({"error": "This ordering is not supported with cursor pagination"})
+            descending = term.startswith('-')
+            name = self.get_key_column(queryset, term.lstrip('-'))
+            keys.append((name, descending))
+            if name == pk_name:
+                # The primary key is unique, later terms never break a tie
+                return keys
+        keys.append((pk_name, keys[0][1] if keys else False))
+        return keys
+
+    def get_key_column(self, queryset, name):
+        """Resolve an ordering term to a column that can be compared against a cursor value"""
+        if name in queryset.query.annotations:
+            return name
+        meta = queryset.model._meta
+        try:
+            field = meta.pk if name == 'pk' else meta.get_field(name)
+        except FieldDoesNotExist:
+            field = None
+        if field is None or not field.concrete or field.many_to_many or field.null:
+            raise ValidationError({"error": f"Ordering by '{name}' is not supported with cursor pagination"})
+        # Foreign keys order by the related primary key, which is the local column
+        return field.attname
+
+    def seek_filter(self, keys, values):
+        """
+        Build the row comparison (k1, k2, ...) > (v1, v2, ...) honouring each key's direction.
+        The redundant bound on the first key lets the database start an index range scan.
+        """
+        first_name, first_descending = keys[0]
+        condition = Q()
+        for position, (name, descending) in enumerate(keys):
+            branch = Q(**{previous: value for (previous, _), value in zip(keys[:position], values)})
+            branch &= Q(**{f"{name}__{'lt' if descending else 'gt'}": values[position]})
+            condition |= branch
+        return Q(**{f"{first_name}__{'lte' if first_descending else 'gte'}": values[0]}) & condition
+
+    def get_key_values(self, item):
+        if isinstance(item, dict):
+            return [_encode_value(item[name]) for name, _ in self.keys]
+        return [_encode_value(getattr(item, name)) for name, _ in self.keys]
+
+    def decode_cursor(self, request):
+        """
+        Return the cursor dict of the request, or None when no cursor was given.
+        An empty cursor parameter starts keyset pagination from the first page.
+        """
+        encoded = request.query_params.get(self.cursor_query_param)
+        if encoded is None:
+            return None
+        if encoded == '':
+            return {'v': None, 'r': False}
+        try:
+            cursor = json.loads(urlsafe_b64decode(encoded.encode('ascii')))
+            valid = (
+                cursor['k'] == [name for name, _ in self.keys]
+                and len(cursor['v']) == len(self.keys)
+                and isinstance(cursor['r'], bool)
+            )
+        except (TypeError, ValueError, KeyError):
+            valid = False
+        if not valid:
+            raise NotFound(self.invalid_cursor_message)
+        return cursor
+
+    def encode_cursor(self, item, reverse):
+        cursor = {'k': [name for name, _ in self.keys], 'v': self.get_key_values(item), 'r': reverse}
+        encoded = urlsafe_b64encode(json.dumps(cursor, separators=(',', ':')).encode('ascii'))
+        url = remove_query_param(self.request.build_absolute_uri(), 'offset')
+        return replace_query_param(url, self.cursor_query_param, encoded.decode('ascii'))
+
+    def get_next_link(self):
+        if not self.has_next or not self.page:
+            return None
+        return self.encode_cursor(self.page[-1], reverse=False)
+
+    def get_previous_link(self):
+        if not self.has_previous or not self.page:
+            return None
+        return self.encode_cursor(self.page[0], reverse=True)
+
+    def get_schema_operation_parameters(self, view):
+        return [
+            {
+                'name': self.cursor_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'The pagination cursor value (empty for the first page).',
+                'schema': {'type': 'string'},
+            },
+            {
+                'name': self.limit_query_param,
+                'required': False,
+                'in': 'query',
+                'description': 'Number of results to return per page.',
+                'schema': {'type': 'integer'},
+            },
+        ]
+
+
+class CursorOrLimitOffsetPagination(LimitOffsetPagination):
+    """
+    Limit/offset pagination by default, keyset pagination when the request has a cursor parameter
+    """
+    keyset_class = KeysetPagination
+
+    def paginate_queryset(self, queryset, request, view=None):
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return self.keyset.paginate_queryset(queryset, request, view)
+        return super().paginate_queryset(queryset, request, view)
+
+    async def apaginate_queryset(self, queryset, request, view=None):
+        """Async counterpart of paginate_queryset, used by the async read views"""
+        self.keyset = None
+        if self.keyset_class.cursor_query_param in request.query_params:
+            self.keyset = self.keyset_class()
+            return await self.keyset.apaginate_queryset(queryset, request, view)
+
+        self.request = request
+        self.limit = self.get_limit(request)
+        if self.limit is None:
+            return None
+        self.count = await queryset.acount()
+        self.offset = self.get_offset(request)
+        if self.count > self.limit and self.template is not None:
+            self.display_page_controls = True
+        if self.count == 0 or self.offset > self.count:
+            return []
+        return await _alist(queryset[self.offset:self.offset + self.limit], self.limit)
+
+    def get_paginated_response(self, data):
+        if self.keyset is not None:
+            return self.keyset.get_paginated_response(data)
+        return super().get_paginated_response(data)
+
+    def get_schema_operation_parameters(self, view):
+        return super().get_schema_operation_parameters(view) + [
+            self.keyset_class().get_schema_operation_parameters(view)[0]
+        ]
@@ -0,0 +1,87 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, TimeoutError
+
+import django
+from django.conf import settings
+from django.contrib.auth.hashers import check_password, identify_hasher, make_password
+from rest_framework.exceptions import APIException
+
+
+class PasswordPoolBusy(APIException):
+    status_code = 503
+    default_detail = 'Too many sign-in requests in progress, retry shortly.'
+    default_code = 'password_pool_busy'
+
+
+class PasswordPool:
+    """
+    Bounded thread pool for password hashing. PBKDF2 runs in C without the GIL, so the
+    pool caps how many CPU cores sign-ins can take from the rest of the traffic.
+    At most workers + queue_size calls are admitted at once, the next ones fail fast
+    with PasswordPoolBusy instead of tying up request workers behind the queue.
+    """
+
+    def __init__(self, workers, queue_size, timeout):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='password')
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+        self.timeout = timeout
+
+    def run(self, function, *args):
+        if not self.slots.acquire(blocking=False):
+            raise PasswordPoolBusy()
+        try:
+            future = self.executor.submit(function, *args)
+        except BaseException:
+            self.slots.release()
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        try:
+            return future.result(timeout=self.timeout)
+        except TimeoutError:
+            raise PasswordPoolBusy()
+
+    def check_password(self, user, password):
+        """
+        Verify password against user's hash. Without a user a hash is still computed, so
+        the response time does not reveal whether the account exists.
+        """
+        if user is None:
+            self.run(make_password, password)
+            return False
+        valid = self.run(check_password, password, user.password)
+        # Like User.check_password, rehash with the current hasher settings when outdated
+        if valid and identify_hasher(user.password).must_update(user.password):
+            user.password = self.make_password(password)
+            user.save(update_fields=['password'])
+        return valid
+
+    def make_password(self, password):
+        return self.run(make_password, password)
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def get_password_pool():
+    """The process-wide pool, created on first use from the PASSWORD_HASHING_* settings"""
+    global _pool
+    if _pool is None:
+        with _pool_lock:
+            if _pool is None:
+                _pool = PasswordPool(
+                    workers=settings.PASSWORD_HASHING_WORKERS,
+                    queue_size=settings.PASSWORD_HASHING_QUEUE_SIZE,
+                    timeout=settings.PASSWORD_HASHING_TIMEOUT,
+                )
+    return _pool
+
+
+def setup_hashing_process():
+    """Initializer of spawned hashing processes: load the settings of the password hashers"""
+    django.setup()
+
+
+def make_passwords(passwords):
+    """Hash a chunk of passwords, in a process pool; empty ones become unusable passwords"""
+    return [make_password(password or None) for password in passwords]
@@ -0,0 +1,42 @@
+import datetime
+from django import forms
+from django_filters import rest_framework as filters
+
+
+class IntegerFilter(filters.NumberFilter):
+    field_class = forms.IntegerField
+
+
+class PublicationDateFilterSet(filters.FilterSet):
+    """
+    Base FilterSet with year/month filters on publication_date.
+    A year (or year and month) becomes one half-open date range that a B-tree index can serve,
+    a month without a year matches the EXTRACT(MONTH ...) expression index.
+    """
+    date_field = 'publication_date'
+
+    year = IntegerFilter(method='filter_year', min_value=1, max_value=9999)
+    month = IntegerFilter(method='filter_month', min_value=1, max_value=12)
+
+    def filter_year(self, queryset, name, value):
+        month = self.form.cleaned_data.get('month')
+        if month is None:
+            start = datetime.date(value, 1, 1)
+            end = datetime.date(value + 1, 1, 1) if value < 9999 else None
+        else:
+            start = datetime.date(value, month, 1)
+            if month < 12:
+                end = datetime.date(value, month + 1, 1)
+            else:
+                end = datetime.date(value + 1, 1, 1) if value < 9999 else None
+
+        queryset = queryset.filter(**{f'{self.date_field}__gte': start})
+        if end is not None:
+            queryset = queryset.filter(**{f'{self.date_field}__lt': end})
+        return queryset
+
+    def filter_month(self, queryset, name, value):
+        if self.form.cleaned_data.get('year') is not None:
+            # Already applied as part of the year range
+            return queryset
+        return queryset.filter(**{f'{self.date_field}__month': value})
@@ -7,7 +7,7 @@ class QueryParamValidationMixin:
         if hasattr(self, "filterset_class"):
              valid_filters.update(self.filterset_class.Meta.fields)
         # Add   other static fielda
-        valid_filters.update(['keyword','ordering','limit','offset'])
+        valid_filters.update(['keyword','ordering','limit','offset','cursor'])
         return valid_filters
 
     def get_queryset(self):
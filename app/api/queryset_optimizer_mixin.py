@@ -0,0 +1,84 @@
+from django.core.exceptions import FieldDoesNotExist
+from django.db.models import Prefetch
+from rest_framework.permissions import SAFE_METHODS
+from rest_framework.relations import ManyRelatedField, RelatedField, SlugRelatedField
+from rest_framework.serializers import BaseSerializer
+
+
+class QuerysetOptimizerMixin:
+    """
+    Apply select_related, prefetch_related and only() derived from the serializer fields,
+    so a page of results costs a fixed number of queries whatever its size.
+    """
+    # Plans are computed once per (serializer, model) pair
+    _queryset_plans = {}
+
+    def get_queryset(self):
+        queryset = super().get_queryset()
+        return self.optimize_queryset(queryset)
+
+    def optimize_queryset(self, queryset):
+        select, prefetch, only = self.get_queryset_plan(self.get_serializer_class(), queryset.model)
+        if select:
+            queryset = queryset.select_related(*select)
+        if prefetch:
+            queryset = queryset.prefetch_related(*prefetch)
+        # Writes save the loaded fields only, so restrict columns on reads only
+        if only is not None and self.request.method in SAFE_METHODS:
+            queryset = queryset.only(*only)
+        return queryset
+
+    @classmethod
+    def get_queryset_plan(cls, serializer_class, model):
+        key = (serializer_class, model)
+        if key not in cls._queryset_plans:
+            cls._queryset_plans[key] = cls.build_queryset_plan(serializer_class, model)
+        return cls._queryset_plans[key]
+
+    @staticmethod
+    def build_queryset_plan(serializer_class, model):
+        """
+        Return (select_related, prefetch_related, only) for the serializer.
+        only is None when a field reads something that is not a model column.
+        """
+        select, prefetch, only = [], [], []
+        for field in serializer_class().fields.values():
+            if field.write_only:
+                continue
+            try:
+                model_field = model._meta.get_field(field.source)
+            except FieldDoesNotExist:
+                # Properties, methods or dotted sources: keep every column
+                only = None
+                continue
+
+            if isinstance(field, ManyRelatedField):
+                prefetch.append(Prefetch(
+                    field.source,
+                    queryset=related_queryset(model_field.related_model, field.child_relation)
+                ))
+            elif model_field.many_to_one or model_field.one_to_one:
+                # Primary key relations read the local column, other ones need the row
+                pk_only = isinstance(field, RelatedField) and field.use_pk_only_optimization()
+                if not pk_only and (isinstance(field, (RelatedField, BaseSerializer))):
+                    select.append(field.source)
+                if only is not None:
+                    only.append(field.source)
+            elif model_field.concrete:
+                if only is not None:
+                    only.append(field.source)
+            else:
+                # Reverse relations serialized as a single object
+                prefetch.append(field.source)
+        return select, prefetch, only
+
+
+def related_queryset(related_model, relation):
+    """Queryset for a prefetched relation, limited to the columns the relation renders"""
+    queryset = related_model._default_manager.all()
+    pk_name = related_model._meta.pk.name
+    if relation.use_pk_only_optimization():
+        return queryset.only(pk_name)
+    if isinstance(relation, SlugRelatedField) and '__' not in relation.slug_field:
+        return queryset.only(pk_name, relation.slug_field)
+    return queryset
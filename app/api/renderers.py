@@ -0,0 +1,48 @@
+import msgpack
+import orjson
+from rest_framework import renderers
+from rest_framework.utils.encoders import JSONEncoder
+
+# Values orjson or msgpack cannot encode natively go through DRF's encoder
+_drf_encoder = JSONEncoder()
+
+
+class ORJSONRenderer(renderers.JSONRenderer):
+    """
+    Drop-in replacement of DRF's JSONRenderer backed by orjson.
+    The output is the same as JSONRenderer's for compact UTF-8 JSON (the default
+    settings) and indent=2, except for floats: exponents are written without sign or
+    padding (1e16 for 1e+16, the same value once parsed), and NaN and infinities
+    render as null where JSONRenderer's strict mode raises. Other indents,
+    ensure_ascii or non-compact separators fall back to the stdlib encoder.
+    """
+    # Datetimes, dates and times keep DRF's representation ('Z' suffix for UTC)
+    options = orjson.OPT_NON_STR_KEYS | orjson.OPT_PASSTHROUGH_DATETIME
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        indent = self.get_indent(accepted_media_type, renderer_context or {})
+        if self.ensure_ascii or indent not in (None, 2) or (indent is None and not self.compact):
+            return super().render(data, accepted_media_type, renderer_context)
+
+        options = self.options | (orjson.OPT_INDENT_2 if indent == 2 else 0)
+        ret = orjson.dumps(data, default=_drf_encoder.default, option=options)
+        # Same escaping as JSONRenderer, the output stays a strict javascript subset
+        return ret.replace('\u2028'.encode(), b'\\u2028').replace('\u2029'.encode(), b'\\u2029')
+
+
+class MessagePackRenderer(renderers.BaseRenderer):
+    """
+    MessagePack renderer for service-to-service clients, selected with
+    'Accept: application/msgpack'. Values are the ones the JSON renderers emit.
+    """
+    media_type = 'application/msgpack'
+    format = 'msgpack'
+    charset = None
+    render_style = 'binary'
+
+    def render(self, data, accepted_media_type=None, renderer_context=None):
+        if data is None:
+            return b''
+        return msgpack.packb(data, default=_drf_encoder.default, use_bin_type=True)
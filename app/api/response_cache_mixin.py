@@ -0,0 +1,71 @@
+import hashlib
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.response import Response
+from .cache_versions import get_model_versions, record_cache_result
+
+# Names of the views that use the response cache, for the statistics endpoint
+cached_view_names = set()
+
+
+class ResponseCacheMixin:
+    """
+    Cache successful GET responses keyed on the normalized query string, the permission
+    scope and the versions of cache_models. Any write to one of those models bumps its
+    version, so stale entries are never looked up again and simply expire.
+    """
+    # Models whose writes change the response of the view
+    cache_models = ()
+    # Name of the setting holding the entry lifetime in seconds
+    cache_timeout_setting = 'RESPONSE_CACHE_TIMEOUT'
+    # Query parameters whose results depend on the requesting user
+    user_scoped_params = ()
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        cached_view_names.add(cls.__name__)
+
+    def get(self, request, *args, **kwargs):
+        key = self.get_response_cache_key(request)
+        data = cache.get(key)
+        if data is not None:
+            record_cache_result(type(self).__name__, hit=True)
+            response = Response(data)
+            response['X-Cache'] = 'HIT'
+            return response
+
+        response = super().get(request, *args, **kwargs)
+        record_cache_result(type(self).__name__, hit=False)
+        if response.status_code == 200:
+            cache.set(key, response.data, self.get_response_cache_timeout())
+        response['X-Cache'] = 'MISS'
+        return response
+
+    def get_response_cache_timeout(self):
+        return getattr(settings, self.cache_timeout_setting)
+
+    def get_cache_scope(self, request):
+        """The permission scope the response was built for"""
+        if any(param in request.query_params for param in self.user_scoped_params):
+            return f'user-{request.user.pk}'
+        return 'admin' if request.user.is_staff else 'user'
+
+    def get_cache_versions(self):
+        """The versions of cache_models, read once per request"""
+        if not hasattr(self, '_cache_versions'):
+            self._cache_versions = get_model_versions(self.cache_models)
+        return self._cache_versions
+
+    def get_response_cache_key(self, request):
+        # Sort the parameters so equivalent query strings share an entry
+        query = sorted(request.query_params.lists())
+        versions = self.get_cache_versions()
+        fingerprint = hashlib.md5(
+            repr((request.get_host(), request.path, query)).encode('utf-8')
+        ).hexdigest()
+        return 'api:response:{view}:{scope}:{versions}:{fingerprint}'.format(
+            view=type(self).__name__,
+            scope=self.get_cache_scope(request),
+            versions='.'.join(map(str, versions)),
+            fingerprint=fingerprint,
+        )
@@ -0,0 +1,91 @@
+import functools
+import operator
+
+from django.contrib.postgres.search import SearchQuery, SearchQueryCombinable, SearchRank, SearchVector
+from django.db import models
+from django.db.models import F, Value
+
+
+def search_vector_expression(fields, new_values=None, weights=None):
+    """
+    Build the SearchVector over fields for a row, each field labelled with its weight
+    ('A' to 'D') from weights. Values given in new_values replace the matching columns,
+    so an UPDATE can compute the vector from the values it is about to write.
+    """
+    new_values = new_values or {}
+    weights = weights or {}
+    vectors = []
+    for field_name in fields:
+        value = new_values.get(field_name, field_name)
+        if field_name in new_values and not hasattr(value, 'resolve_expression'):
+            value = Value(value)
+        vectors.append(SearchVector(value, weight=weights.get(field_name)))
+    return functools.reduce(operator.add, vectors)
+
+
+class SearchVectorQuerySet(models.QuerySet):
+    """
+    QuerySet that keeps a stored search_vector column in sync with search_vector_fields
+    on bulk writes (update, bulk_create, bulk_update)
+    """
+    search_vector_fields = ()
+    # Optional weight label of each field in the stored vector, e.g. {'title': 'A'}
+    search_vector_weights = {}
+
+    def get_search_vector_expression(self, new_values=None):
+        return search_vector_expression(self.search_vector_fields, new_values, self.search_vector_weights)
+
+    def get_search_rank_weights(self):
+        """ts_rank weights of the D, C, B and A labels, None for the database defaults"""
+        return None
+
+    def update_search_vector(self):
+        """
+        Recompute the stored search vector for every row of the queryset
+        """
+        return models.QuerySet.update(self, search_vector=self.get_search_vector_expression())
+
+    def search(self, query):
+        """
+        Rows matching query (a keyword or a SearchQuery) through the GIN-indexed
+        stored vector, best ranked first
+        """
+        if not isinstance(query, SearchQueryCombinable):
+            query = SearchQuery(query)
+        return self.filter(search_vector=query).annotate(
+            rank=SearchRank(F('search_vector'), query, weights=self.get_search_rank_weights())
+        ).filter(rank__gt=0).order_by('-rank', 'id')
+
+    def update(self, **kwargs):
+        # Compute the vector in the same statement, from the values being written
+        if 'search_vector' not in kwargs and set(self.search_vector_fields) & kwargs.keys():
+            kwargs['search_vector'] = self.get_search_vector_expression(kwargs)
+        return super().update(**kwargs)
+
+    def bulk_create(self, objs, *args, **kwargs):
+        objs = super().bulk_create(objs, *args, **kwargs)
+        pks = [obj.pk for obj in objs if obj.pk is not None]
+        if pks:
+            self.model._default_manager.filter(pk__in=pks).update_search_vector()
+        return objs
+
+    def bulk_update(self, objs, fields, *args, **kwargs):
+        rows = super().bulk_update(objs, fields, *args, **kwargs)
+        if set(self.search_vector_fields) & set(fields):
+            pks = [obj.pk for obj in objs]
+            self.model._default_manager.filter(pk__in=pks).update_search_vector()
+        return rows
+
+
+class SearchVectorModelMixin:
+    """
+    Model mixin refreshing the stored search vector on save when a searchable column
+    was written. The default manager must use a SearchVectorQuerySet.
+    """
+
+    def save(self, *args, **kwargs):
+        super().save(*args, **kwargs)
+        queryset = type(self)._default_manager.filter(pk=self.pk)
+        update_fields = kwargs.get('update_fields')
+        if update_fields is None or set(queryset.search_vector_fields) & set(update_fields):
+            queryset.update_search_vector()
@@ -0,0 +1,130 @@
+import datetime
+import itertools
+import random
+
+from django.contrib.auth.hashers import make_password
+from django.db import connection
+from django.db.models import Count, Max, OuterRef, Subquery, Value
+from django.db.models.functions import Coalesce
+from api.articles.models import Article
+from api.comments.models import Comment
+from api.models import User
+from api.tags.models import Tag
+
+WORDS = ['data', 'model', 'network', 'system', 'analysis', 'learning', 'energy', 'health',
+         'policy', 'climate', 'protein', 'market', 'quantum', 'graph', 'language', 'vision']
+
+
+class ZipfSampler:
+    """
+    Draw items with Zipf-distributed popularity: the item of rank r is picked with weight
+    1 / r**exponent. With shuffle, ranks are spread at random over the items, so popularity
+    does not follow insertion order; without, the first item is the most popular.
+    """
+
+    def __init__(self, items, exponent, rng, shuffle=True):
+        self.items = list(items)
+        if shuffle:
+            rng.shuffle(self.items)
+        self.cum_weights = list(itertools.accumulate(1 / rank ** exponent for rank in range(1, len(self.items) + 1)))
+        self.rng = rng
+
+    def draw(self, count):
+        """count items, with repetitions"""
+        return self.rng.choices(self.items, cum_weights=self.cum_weights, k=count)
+
+    def sample(self, count):
+        """Up to count distinct items (fewer when the draws repeat a popular one)"""
+        return list(dict.fromkeys(self.draw(count)))
+
+
+def random_date(rng, years):
+    return datetime.date.today() - datetime.timedelta(days=rng.randrange(max(1, int(365.25 * years))))
+
+
+def seed_data(users=1000, tags=500, articles=10000, comments=20000, max_authors=5, max_tags=8,
+              exponent=1.1, years=10, password=None, seed=1, batch_size=5000, progress=None):
+    """
+    Bulk insert users, tags, articles and comments with a deterministic random generator.
+    Authors, tags and commented articles are drawn with Zipf-distributed popularity, and
+    so are the number of authors and tags per article. Users are seed<n>@example.com named
+    First<n> Last<n>, numbered after the existing ones; password None makes them unusable.
+    Returns the ids of the created users, tags and articles; progress(message) is called
+    after every step.
+    """
+    rng = random.Random(seed)
+    report = progress or (lambda message: None)
+
+    # One hash for every user, hashing them one by one would dominate the run
+    password = make_password(password)
+    start = (User.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    user_ids = []
+    for offset in range(0, users, batch_size):
+        created = User.objects.bulk_create(
+            User(email=f'seed{i}@example.com', first_name=f'First{i}', last_name=f'Last{i}', password=password)
+            for i in range(start + offset, start + min(users, offset + batch_size))
+        )
+        user_ids.extend(user.id for user in created)
+    report(f"Created {len(user_ids)} users")
+
+    start = (Tag.objects.aggregate(last=Max('id'))['last'] or 0) + 1
+    tag_ids = [tag.id for tag in Tag.objects.bulk_create(
+        (Tag(name=f'tag-{i}') for i in range(start, start + tags)), batch_size=batch_size
+    )]
+    report(f"Created {len(tag_ids)} tags")
+
+    authors = ZipfSampler(user_ids, exponent, rng)
+    topics = ZipfSampler(tag_ids, exponent, rng)
+    # Fan-out: one author or tag is the most likely, the maximum the least
+    author_counts = ZipfSampler(range(1, max_authors + 1), exponent, rng, shuffle=False)
+    tag_counts = ZipfSampler(range(1, max_tags + 1), exponent, rng, shuffle=False)
+    author_links = Article.authors.through
+    tag_links = Article.tags.through
+    article_ids = []
+    for offset in range(0, articles, batch_size):
+        created = Article.objects.bulk_create([
+            Article(title=' '.join(rng.choices(WORDS, k=5)).capitalize(), abstract=' '.join(rng.choices(WORDS, k=120)))
+            for _ in range(min(batch_size, articles - offset))
+        ])
+        # auto_now dated every article today, spread them over the years
+        for article in created:
+            article.publication_date = random_date(rng, years)
+        Article.objects.bulk_update(created, ['publication_date'])
+        if user_ids:
+            author_links.objects.bulk_create([
+                author_links(article_id=article.id, user_id=user_id)
+                for article in created for user_id in authors.sample(author_counts.draw(1)[0])
+            ])
+        if tag_ids:
+            tag_links.objects.bulk_create([
+                tag_links(article_id=article.id, tag_id=tag_id)
+                for article in created for tag_id in topics.sample(tag_counts.draw(1)[0])
+            ])
+        article_ids.extend(article.id for article in created)
+        report(f"Created {len(article_ids)} articles")
+
+    if comments and article_ids and user_ids:
+        commented = ZipfSampler(article_ids, exponent, rng)
+        created_comments = 0
+        for offset in range(0, comments, batch_size):
+            count = min(batch_size, comments - offset)
+            created = Comment.objects.bulk_create([
+                Comment(article_id=article_id, author_id=author_id, text=' '.join(rng.choices(WORDS, k=30)))
+                for article_id, author_id in zip(commented.draw(count), authors.draw(count))
+            ])
+            for comment in created:
+                comment.publication_date = random_date(rng, years)
+            Comment.objects.bulk_update(created, ['publication_date'])
+            created_comments += count
+            report(f"Created {created_comments} comments")
+        # Bulk inserts send no signals, set the counters of the new articles in one statement
+        Article.objects.filter(pk__gte=article_ids[0]).update(comment_count=Coalesce(Subquery(
+            Comment.objects.filter(article=OuterRef('pk')).order_by().values('article').annotate(
+                count=Count('pk')
+            ).values('count')
+        ), Value(0)))
+
+    with connection.cursor() as cursor:
+        cursor.execute('ANALYZE')
+    report("Analyzed the tables")
+    return user_ids, tag_ids, article_ids
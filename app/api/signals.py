@@ -0,0 +1,57 @@
+from django.db.models.functions import Now
+from django.db.models.signals import m2m_changed, post_delete, post_save
+from django.dispatch import receiver
+from api.articles.models import Article
+from api.comments.models import Comment
+from api.models import User
+from api.tags.models import Tag
+from .authentication import forget_cached_user
+from .cache_versions import bump_model_version
+
+
+@receiver(post_save, sender=Article)
+@receiver(post_save, sender=Comment)
+@receiver(post_save, sender=Tag)
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=Article)
+@receiver(post_delete, sender=Comment)
+@receiver(post_delete, sender=Tag)
+@receiver(post_delete, sender=User)
+def bump_version_on_write(sender, **kwargs):
+    """Saving or deleting a row invalidates the cached responses built from its model"""
+    bump_model_version(sender)
+
+
+@receiver(post_save, sender=User)
+@receiver(post_delete, sender=User)
+def forget_authenticated_user(sender, instance, **kwargs):
+    """Profile, admin flag or password changes must reach the next authenticated request"""
+    forget_cached_user(instance.pk)
+
+
+@receiver(m2m_changed, sender=Article.authors.through)
+@receiver(m2m_changed, sender=Article.tags.through)
+def touch_article_on_m2m_change(sender, instance, action, reverse, pk_set, **kwargs):
+    """Authors and tags are part of the article representation, refresh its change marker"""
+    if not action.startswith('post_'):
+        return
+    if reverse:
+        articles = Article.objects.filter(pk__in=pk_set or ())
+    else:
+        articles = Article.objects.filter(pk=instance.pk)
+    # The queryset update also bumps the article cache version
+    articles.update(updated_at=Now())
+
+
+@receiver(post_save, sender=Comment)
+def count_created_comment(sender, instance, created, raw=False, **kwargs):
+    if created and not raw:
+        Article.objects.filter(pk=instance.article_id).adjust_comment_count(1)
+
+
+@receiver(post_delete, sender=Comment)
+def count_deleted_comment(sender, instance, origin=None, **kwargs):
+    # Comments deleted together with their article leave no counter to update
+    if isinstance(origin, Article) or getattr(origin, 'model', None) is Article:
+        return
+    Article.objects.filter(pk=instance.article_id).adjust_comment_count(-1)
@@ -1,6 +1,12 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_migrate
 
 
 class TagsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api.tags'
+
+    def ready(self):
+        # The trigram index of the autocomplete needs the pg_trgm extension
+        from .autocomplete import create_trigram_index
+        post_migrate.connect(create_trigram_index, sender=self)
@@ -0,0 +1,131 @@
+import logging
+import threading
+import time
+from collections import OrderedDict
+
+from django.conf import settings
+from django.contrib.postgres.search import TrigramWordSimilarity
+from django.db import DatabaseError, connections, transaction
+from django.db.models import BooleanField, ExpressionWrapper, Q
+from django.db.models.functions import Length, Upper
+from api.cache_versions import get_model_versions
+from .models import Tag
+
+logger = logging.getLogger(__name__)
+
+TRIGRAM_INDEX_NAME = 'tag_name_trgm_idx'
+
+# Per database alias: whether pg_trgm is installed
+_trigram_available = {}
+
+
+def trigram_available(using='default'):
+    """Whether the pg_trgm extension is installed (checked once per process)"""
+    if using not in _trigram_available:
+        connection = connections[using]
+        available = False
+        if connection.vendor == 'postgresql':
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT EXISTS (SELECT 1 FROM pg_extension WHERE extname = 'pg_trgm')")
+                available = cursor.fetchone()[0]
+        _trigram_available[using] = available
+    return _trigram_available[using]
+
+
+def create_trigram_index(using='default', **kwargs):
+    """
+    post_migrate handler: install pg_trgm and the trigram GIN index on UPPER(Tag.name).
+    The extension needs its own DDL that generated migrations do not contain. When it
+    cannot be installed, autocomplete falls back to indexed prefix matching.
+    """
+    connection = connections[using]
+    if connection.vendor != 'postgresql':
+        return
+    quote = connection.ops.quote_name
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute("CREATE EXTENSION IF NOT EXISTS pg_trgm")
+            cursor.execute(
+                f"CREATE INDEX IF NOT EXISTS {quote(TRIGRAM_INDEX_NAME)} ON {quote(Tag._meta.db_table)}"
+                f" USING gin (UPPER({quote('name')}) gin_trgm_ops)"
+            )
+    except DatabaseError as error:
+        logger.warning("pg_trgm is not available, tag autocomplete uses prefix matching only: %s", error)
+    _trigram_available.pop(using, None)
+
+
+def search_tags(query, limit, using='default'):
+    """
+    Top matching tags as (id, name) pairs. Prefix matches come first, then names that
+    contain the query or a word similar to it (typos included), by trigram similarity.
+    """
+    is_prefix = ExpressionWrapper(Q(name__istartswith=query), output_field=BooleanField())
+    tags = Tag.objects.using(using).annotate(is_prefix=is_prefix)
+    if not trigram_available(using):
+        # UPPER(name) LIKE 'QUERY%' is served by the tag_name_prefix_idx pattern index
+        tags = tags.filter(name__istartswith=query).order_by(Length('name'), 'name')
+        return list(tags.values_list('id', 'name')[:limit])
+
+    # Both conditions match UPPER(name), which the trigram GIN index covers
+    # (trigram similarity ignores case anyway)
+    tags = tags.alias(upper_name=Upper('name')).filter(
+        Q(name__icontains=query) | Q(upper_name__trigram_word_similar=query.upper())
+    ).annotate(
+        similarity=TrigramWordSimilarity(query.upper(), Upper('name'))
+    ).order_by('-is_prefix', '-similarity', Length('name'), 'name')
+    with transaction.atomic(using=using):
+        with connections[using].cursor() as cursor:
+            # %> compares with pg_trgm.word_similarity_threshold, whose default (0.6) rejects
+            # most typos; set_config(..., true) only lasts until the end of this transaction
+            cursor.execute(
+                "SELECT set_config('pg_trgm.word_similarity_threshold', %s, true)",
+                [str(settings.TAGS_AUTOCOMPLETE_SIMILARITY)],
+            )
+        return list(tags.values_list('id', 'name')[:limit])
+
+
+class PrefixCache:
+    """
+    Small thread-safe LRU cache of autocomplete results for this process.
+    Entries carry the Tag cache version, so any tag write invalidates them.
+    """
+
+    def __init__(self, maxsize=1024, timeout=60):
+        self.maxsize = maxsize
+        self.timeout = timeout
+        self.entries = OrderedDict()
+        self.lock = threading.Lock()
+
+    def get(self, key, version):
+        with self.lock:
+            entry = self.entries.get(key)
+            if entry is None:
+                return None
+            entry_version, expires, value = entry
+            if entry_version != version or expires < time.monotonic():
+                del self.entries[key]
+                return None
+            self.entries.move_to_end(key)
+            return value
+
+    def set(self, key, version, value):
+        with self.lock:
+            self.entries[key] = (version, time.monotonic() + self.timeout, value)
+            self.entries.move_to_end(key)
+            while len(self.entries) > self.maxsize:
+                self.entries.popitem(last=False)
+
+    def clear(self):
+        with self.lock:
+            self.entries.clear()
+
+
+def autocomplete(query, limit, cache):
+    """search_tags() through the in-process prefix cache"""
+    key = (query.casefold(), limit)
+    version = get_model_versions([Tag])[0]
+    results = cache.get(key, version)
+    if results is None:
+        results = search_tags(query, limit)
+        cache.set(key, version, results)
+    return results
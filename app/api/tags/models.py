@@ -1,4 +1,6 @@
+from django.contrib.postgres.indexes import OpClass
 from django.db import models
+from django.db.models.functions import Upper
 
 class Tag(models.Model):
     name = models.CharField(max_length=50, unique=True)
@@ -9,3 +11,8 @@ class Tag(models.Model):
     class Meta:
         db_table = 'Tag'
         ordering = ['id']
+        indexes = [
+            # Case-insensitive prefix matches (UPPER(name) LIKE 'ABC%') of the autocomplete.
+            # The trigram GIN index is created with pg_trgm after migrate, see autocomplete.py
+            models.Index(OpClass(Upper('name'), name='text_pattern_ops'), name='tag_name_prefix_idx'),
+        ]
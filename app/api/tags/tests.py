@@ -4,6 +4,9 @@ from rest_framework.test import APITestCase
 from api.models import User
 from .models import Tag
 from rest_framework_simplejwt.tokens import RefreshToken
+from django.db import connection
+from django.test.utils import CaptureQueriesContext
+from .autocomplete import trigram_available
 
 class TagAPITestCase(APITestCase):
     def setUp(self):
@@ -175,4 +178,59 @@ class TagDetailsTest(TagAPITestCase):
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
         
         # Verify tag still exists
-        self.assertTrue(Tag.objects.filter(id=self.tag.id).exists())
\ No newline at end of file
+        self.assertTrue(Tag.objects.filter(id=self.tag.id).exists())
+
+class TagAsyncViewTest(TagAPITestCase):
+    def test_async_views_match_sync_views(self):
+        """Test that the async list and detail views return the sync responses"""
+        self.authenticate_user()
+        self.assertEqual(self.client.get(reverse('tags_list_async')).json(),
+                         self.client.get(reverse('tags_list')).json())
+        response = self.client.get(reverse('tag_details_async', kwargs={'tag_id': self.tag.id}))
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(response.json(), self.client.get(self.url).json())
+
+class TagAutocompleteTest(TagAPITestCase):
+    def setUp(self):
+        super().setUp()
+        for name in ("Machine Learning", "Machining", "Mach", "Deep Machine", "Biology"):
+            Tag.objects.create(name=name)
+        self.autocomplete_url = reverse('tags_autocomplete')
+        self.authenticate_user()
+
+    def names(self, **params):
+        response = self.client.get(self.autocomplete_url, params)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        return [tag['name'] for tag in response.data]
+
+    def test_prefix_matches_come_first(self):
+        """Test that prefix matches are ranked first and the limit applies"""
+        names = self.names(q='mach')
+        self.assertEqual(names[0], "Mach")
+        self.assertEqual(set(names[:3]), {"Mach", "Machining", "Machine Learning"})
+        self.assertNotIn("Biology", names)
+        self.assertEqual(len(self.names(q='MACH', limit=2)), 2)
+
+    def test_results_are_cached_until_tags_change(self):
+        """Test that a repeated query is answered from the in-process cache"""
+        self.names(q='machi')
+        with CaptureQueriesContext(connection) as queries:
+            names = self.names(q='Machi')
+        # Neither the tags nor the user (authentication cache) are queried
+        self.assertEqual(len(queries), 0)
+        Tag.objects.create(name="Machinery")
+        self.assertIn("Machinery", self.names(q='machi'))
+        self.assertNotEqual(names, self.names(q='machi'))
+
+    def test_parameter_validation(self):
+        """Test that q is required and limit is bounded"""
+        for params in ({}, {'q': ' '}, {'q': 'mach', 'limit': 0}, {'q': 'mach', 'limit': 'x'}):
+            response = self.client.get(self.autocomplete_url, params)
+            self.assertEqual(response.status_code, status.HTTP_400_BAD_REQUEST)
+
+    def test_typo_tolerant_matches(self):
+        """Test that misspelled queries still match when pg_trgm is installed"""
+        if not trigram_available():
+            self.skipTest('pg_trgm is not installed')
+        self.assertIn("Machine Learning", self.names(q='machne lerning'))
+        self.assertIn("Deep Machine", self.names(q='machine'))
@@ -1,7 +1,12 @@
 from django.urls import path
-from .views import TagView,RetrieveUpdateDeleteTag
+from api.async_views import AsyncReadView
+from .views import TagView,RetrieveUpdateDeleteTag,TagAutocompleteView
 
 urlpatterns = [
     path('', TagView.as_view(), name='tags_list'),
     path('<int:tag_id>/', RetrieveUpdateDeleteTag.as_view(), name='tag_details'),
+    path('autocomplete/', TagAutocompleteView.as_view(), name='tags_autocomplete'),
+    # Async GET handlers of the list and detail views, for ASGI deployments
+    path('async/', AsyncReadView.as_view(view_class=TagView), name='tags_list_async'),
+    path('async/<int:tag_id>/', AsyncReadView.as_view(view_class=RetrieveUpdateDeleteTag), name='tag_details_async'),
 ]
\ No newline at end of file
@@ -1,13 +1,19 @@
 from rest_framework import generics,filters
+from rest_framework.exceptions import ValidationError
+from rest_framework.response import Response
+from django.conf import settings
 from rest_framework.permissions import IsAuthenticated,IsAdminUser
 from .filters import TagFilter
 from django_filters.rest_framework import DjangoFilterBackend
 from .models import Tag
 from .serializers import TagSerializer
 from api.query_parameters_mixin import QueryParamValidationMixin
+from api.queryset_optimizer_mixin import QuerysetOptimizerMixin
+from api.response_cache_mixin import ResponseCacheMixin
+from .autocomplete import PrefixCache, autocomplete
 
 # Create your views here.
-class TagView(QueryParamValidationMixin,generics.ListCreateAPIView):
+class TagView(ResponseCacheMixin,QuerysetOptimizerMixin,QueryParamValidationMixin,generics.ListCreateAPIView):
 
     
 
@@ -26,6 +32,7 @@ class TagView(QueryParamValidationMixin,generics.ListCreateAPIView):
     filterset_class = TagFilter  # Use our custom filter
     ordering_fields = '__all__'
     search_fields = ['name']
+    cache_models = (Tag,)
     
 
 
@@ -36,11 +43,12 @@ class TagView(QueryParamValidationMixin,generics.ListCreateAPIView):
         # Save article
         serializer.save()
 
-class RetrieveUpdateDeleteTag(generics.RetrieveUpdateDestroyAPIView):
+class RetrieveUpdateDeleteTag(ResponseCacheMixin,QuerysetOptimizerMixin,generics.RetrieveUpdateDestroyAPIView):
 
     serializer_class = TagSerializer
     queryset = Tag.objects.all().distinct()
     lookup_url_kwarg = 'tag_id'
+    cache_models = (Tag,)
     filter_backends = [DjangoFilterBackend]  # Enable filtering and searching
 
     def get_permissions(self):
@@ -54,4 +62,31 @@ class RetrieveUpdateDeleteTag(generics.RetrieveUpdateDestroyAPIView):
             # Only authors can delete
             return [IsAuthenticated() , IsAdminUser()]
         # Default to the class-level permissions
-        return super().get_permissions()
\ No newline at end of file
+        return super().get_permissions()
+
+
+class TagAutocompleteView(generics.GenericAPIView):
+    """
+    Top-N tags matching what the user typed so far, for the tag picker
+    """
+    permission_classes = [IsAuthenticated]
+    # Results of recent queries, shared by the requests of this process
+    prefix_cache = PrefixCache(
+        maxsize=settings.TAGS_AUTOCOMPLETE_CACHE_SIZE,
+        timeout=settings.TAGS_AUTOCOMPLETE_CACHE_TIMEOUT,
+    )
+
+    def get(self, request, *args, **kwargs):
+        query = request.query_params.get('q', '').strip()
+        if not query or len(query) > Tag._meta.get_field('name').max_length:
+            raise ValidationError({"error": "The 'q' parameter must be between 1 and 50 characters"})
+        max_limit = settings.TAGS_AUTOCOMPLETE_MAX_LIMIT
+        try:
+            limit = int(request.query_params.get('limit', 10))
+            if not 1 <= limit <= max_limit:
+                raise ValueError
+        except ValueError:
+            raise ValidationError({"error": f"The 'limit' parameter must be between 1 and {max_limit}"})
+
+        results = autocomplete(query, limit, self.prefix_cache)
+        return Response([{'id': tag_id, 'name': name} for tag_id, name in results])
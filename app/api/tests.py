@@ -1,3 +1,320 @@
-from django.test import TestCase
+import datetime
+import decimal
+import json
+import time
+import uuid
+from io import StringIO
+from unittest import mock
 
-# Create your tests here.
+import msgpack
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection, transaction
+from django.db.models import Count
+from django.test import SimpleTestCase, override_settings
+from django.test.utils import CaptureQueriesContext
+from django.urls import reverse
+from django.utils.translation import gettext_lazy
+from rest_framework import status
+from rest_framework.renderers import JSONRenderer
+from rest_framework.test import APITestCase
+from rest_framework.utils.serializer_helpers import ReturnDict
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.tokens import RefreshToken
+from rest_framework_simplejwt.utils import aware_utcnow
+from . import authentication, token_blacklist
+from .authentication import USER_CACHE_KEY, CachedJWTAuthentication
+from .checks import check_shared_cache
+from .fast_list_mixin import FastListMixin
+from .articles.models import Article
+from .comments.models import Comment
+from .models import User
+from .tags.models import Tag
+from .renderers import MessagePackRenderer, ORJSONRenderer
+from .token_blacklist import BlacklistPrefilter, BloomFilter
+
+
+class RendererTest(SimpleTestCase):
+    data = {
+        'id': 1,
+        'title': 'Café   line',
+        'tags': ['a', 'b'],
+        'ratio': 0.1,
+        'nested': ReturnDict({'ok': True, 'missing': None}, serializer=None),
+        'created': datetime.datetime(2024, 5, 17, 12, 30, 45, 123456, tzinfo=datetime.timezone.utc),
+        'day': datetime.date(2024, 5, 17),
+        'amount': decimal.Decimal('1.50'),
+        'uuid': uuid.UUID('12345678-1234-5678-1234-567812345678'),
+        'label': gettext_lazy('Lazy'),
+        7: 'integer key',
+    }
+
+    def test_orjson_matches_json_renderer(self):
+        """Test that the orjson renderer emits the same bytes as DRF's JSONRenderer"""
+        for media_type in ('application/json', 'application/json; indent=2', 'application/json; indent=4'):
+            self.assertEqual(
+                ORJSONRenderer().render(self.data, media_type),
+                JSONRenderer().render(self.data, media_type),
+                media_type,
+            )
+        self.assertEqual(ORJSONRenderer().render(None), b'')
+
+    def test_orjson_floats(self):
+        """Test that floats parse to the same values, and that non-finite ones become null"""
+        data = {'values': [1e16, 1.5e-7, 0.1, 1.2345678901234568e+17]}
+        rendered = ORJSONRenderer().render(data)
+        self.assertEqual(rendered, b'{"values":[1e16,1.5e-7,0.1,1.2345678901234568e17]}')
+        self.assertEqual(json.loads(rendered), json.loads(JSONRenderer().render(data)))
+        self.assertEqual(ORJSONRenderer().render([float('nan'), float('inf')]), b'[null,null]')
+        with self.assertRaises(ValueError):
+            JSONRenderer().render([float('nan')])
+
+    def test_msgpack_renders_json_values(self):
+        """Test that MessagePack carries the values the JSON renderer emits"""
+        data = {key: value for key, value in self.data.items() if key != 7}
+        unpacked = msgpack.unpackb(MessagePackRenderer().render(data))
+        self.assertEqual(unpacked['created'], '2024-05-17T12:30:45.123456Z')
+        self.assertEqual(unpacked['uuid'], str(data['uuid']))
+        self.assertEqual(unpacked['label'], 'Lazy')
+        self.assertEqual(unpacked['nested'], {'ok': True, 'missing': None})
+
+
+class FastListMixinTest(SimpleTestCase):
+    def test_hooks_are_required(self):
+        """Test that a view turning the fast path on must define both hooks"""
+        with self.assertRaisesMessage(TypeError, 'does not define list_data'):
+            type('View', (FastListMixin,), {'fast_list_setting': 'FAST_LIST', 'list_values': lambda self, qs: qs})
+        # Without the setting the serializer path needs neither
+        type('View', (FastListMixin,), {})
+
+
+class SharedCacheCheckTest(SimpleTestCase):
+    def test_process_local_cache_outside_development(self):
+        """Test that the deploy check rejects a per-process default cache"""
+        local = {'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache'}}
+        redis = {'default': {'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+                             'LOCATION': 'redis://localhost:6379/0'}}
+        with override_settings(CACHES=local):
+            self.assertEqual([error.id for error in check_shared_cache(None)], ['api.E001'])
+        with override_settings(CACHES=redis):
+            self.assertEqual(check_shared_cache(None), [])
+
+
+class CachedJWTAuthenticationTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com', first_name='Regular', last_name='User', password='userpassword123'
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', first_name='Admin', last_name='User', password='adminpassword123'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+
+    def test_cache_hit_needs_no_query(self):
+        """Test that an authenticated request after the first one does not query the user"""
+        self.client.get(reverse('user_profile'))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(reverse('user_profile'))
+        self.assertEqual(len(queries), 0)
+        self.assertEqual(response.data['email'], 'user@example.com')
+        self.assertEqual(response.data['date_joined'][:10], self.user.date_joined.isoformat()[:10])
+
+    def test_user_writes_invalidate_the_cache(self):
+        """Test that updates through the API, admin flag changes and deletes apply immediately"""
+        self.client.get(reverse('user_profile'))
+        admin_client = self.client_class()
+        admin_client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+        response = admin_client.patch(
+            reverse('user_details', kwargs={'user_id': self.user.id}), {'first_name': 'Renamed'}, format='json'
+        )
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(self.client.get(reverse('user_profile')).data['first_name'], 'Renamed')
+
+        self.assertEqual(self.client.get(reverse('response_cache_stats')).status_code, status.HTTP_403_FORBIDDEN)
+        self.user.is_admin = True
+        self.user.save()
+        self.assertEqual(self.client.get(reverse('response_cache_stats')).status_code, status.HTTP_200_OK)
+
+        self.user.delete()
+        self.assertEqual(self.client.get(reverse('user_profile')).status_code, status.HTTP_401_UNAUTHORIZED)
+
+    def test_queryset_update_invalidates_the_cache(self):
+        """Test that bulk updates apply to the next authenticated request"""
+        self.assertEqual(self.client.get(reverse('response_cache_stats')).status_code, status.HTTP_403_FORBIDDEN)
+        User.objects.filter(pk=self.user.pk).update(is_admin=True)
+        self.assertEqual(self.client.get(reverse('response_cache_stats')).status_code, status.HTTP_200_OK)
+
+    def test_entry_loaded_before_a_write_is_not_served(self):
+        """Test that a user loaded before a concurrent write is not served from the shared cache"""
+        load_entry = CachedJWTAuthentication.load_entry
+
+        def load_then_promote(backend, user_id):
+            entry = load_entry(backend, user_id)
+            # Another request writes the user between the load and the cache set
+            User.objects.filter(pk=user_id).update(is_admin=True)
+            return entry
+
+        with mock.patch.object(CachedJWTAuthentication, 'load_entry', load_then_promote):
+            response = self.client.get(reverse('response_cache_stats'))
+        self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
+        # Another process, without a local copy
+        authentication._local_users.clear()
+        self.assertEqual(self.client.get(reverse('response_cache_stats')).status_code, status.HTTP_200_OK)
+
+    def test_writes_invalidate_again_on_commit(self):
+        """Test that an entry cached while a user write is uncommitted is dropped by the commit"""
+        with self.captureOnCommitCallbacks(execute=True):
+            with transaction.atomic():
+                self.user.first_name = 'Renamed'
+                self.user.save()
+                # A request caching the user under the version left by the first invalidation
+                self.client.get(reverse('user_profile'))
+                self.assertIsNotNone(cache.get(USER_CACHE_KEY.format(user_id=self.user.pk)))
+        self.assertIsNone(cache.get(USER_CACHE_KEY.format(user_id=self.user.pk)))
+
+
+class BloomFilterTest(SimpleTestCase):
+    def test_membership(self):
+        """Test that added values are always found and others rarely are"""
+        bloom = BloomFilter(capacity=1000, error_rate=0.01)
+        added = [str(uuid.uuid4()) for _ in range(1000)]
+        for value in added:
+            bloom.add(value)
+        self.assertTrue(all(value in bloom for value in added))
+        false_positives = sum(str(uuid.uuid4()) in bloom for _ in range(10000))
+        self.assertLess(false_positives, 300)
+
+
+class TokenBlacklistTest(APITestCase):
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com', first_name='Regular', last_name='User', password='userpassword123'
+        )
+        # A prefilter of its own, without the background thread: tests sync it themselves
+        self.previous_prefilter = token_blacklist._prefilter
+        token_blacklist._prefilter = BlacklistPrefilter(
+            capacity=100, error_rate=0.01, sync_interval=1, sync_overlap=60, confirmed_size=10
+        )
+
+    def tearDown(self):
+        token_blacklist._prefilter = self.previous_prefilter
+
+    def refresh(self, token):
+        return self.client.post(reverse('token_refresh'), {'refresh': str(token)}, format='json')
+
+    def test_rotation(self):
+        """Test that a refresh returns a new pair and that the old refresh token is then rejected"""
+        token_blacklist._prefilter.sync()
+        old = RefreshToken.for_user(self.user)
+        response = self.refresh(old)
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertEqual(set(response.data), {'access', 'refresh'})
+        self.assertTrue(BlacklistedToken.objects.filter(token__jti=old['jti']).exists())
+        self.assertTrue(OutstandingToken.objects.filter(token=response.data['refresh']).exists())
+
+        self.assertEqual(self.refresh(old).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertEqual(self.refresh(response.data['refresh']).status_code, status.HTTP_200_OK)
+
+    def test_rotation_queries(self):
+        """Test that a refresh skips the blacklist lookup and the user queries"""
+        token_blacklist._prefilter.sync()
+        response = self.refresh(RefreshToken.for_user(self.user))
+        with CaptureQueriesContext(connection) as queries:
+            response = self.refresh(response.data['refresh'])
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        # Blacklist the old token, outstand the new one
+        self.assertEqual(len(queries), 2)
+
+    def test_token_blacklisted_elsewhere(self):
+        """Test that tokens blacklisted without the prefilter are caught, by a query, the filter or the insert"""
+        prefilter = token_blacklist._prefilter
+        # Before the filter is built, checks query
+        token = RefreshToken.for_user(self.user)
+        token.blacklist()
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        token = RefreshToken.for_user(self.user)
+        token.blacklist()
+        prefilter.sync()
+        self.assertIn(token['jti'], prefilter.bloom)
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+
+        # Between two syncs, the conditional insert catches it
+        token = RefreshToken.for_user(self.user)
+        token.blacklist()
+        self.assertFalse(prefilter.is_blacklisted(token['jti']))
+        self.assertEqual(self.refresh(token).status_code, status.HTTP_401_UNAUTHORIZED)
+        self.assertTrue(prefilter.is_blacklisted(token['jti']))
+
+    def test_sync_reads_rows_committed_out_of_order(self):
+        """Test that a sync adds rows committed after a later one, within the overlap"""
+        prefilter = token_blacklist._prefilter
+        late, early = RefreshToken.for_user(self.user), RefreshToken.for_user(self.user)
+        early.blacklist()
+        prefilter.sync()
+        count = prefilter.bloom.count
+        # Blacklisted before the previous sync but committed after it, with a lower id
+        BlacklistedToken.objects.create(
+            id=BlacklistedToken.objects.get().id - 1, token=OutstandingToken.objects.get(jti=late['jti']),
+        )
+        BlacklistedToken.objects.filter(token__jti=late['jti']).update(
+            blacklisted_at=aware_utcnow() - datetime.timedelta(seconds=30)
+        )
+        prefilter.sync()
+        self.assertIn(late['jti'], prefilter.bloom)
+        # The overlap reads early again, without counting it twice
+        self.assertEqual(prefilter.bloom.count, count + 1)
+
+    def test_background_sync(self):
+        """Test that the started prefilter builds its filter outside of the requests"""
+        prefilter = BlacklistPrefilter(capacity=100, error_rate=0.01, sync_interval=0.01, sync_overlap=60,
+                                       confirmed_size=10)
+        prefilter.start()
+        try:
+            for _ in range(500):
+                if prefilter.bloom is not None:
+                    break
+                time.sleep(0.01)
+        finally:
+            prefilter.stop()
+        self.assertIsNotNone(prefilter.bloom)
+        self.assertFalse(prefilter.thread.is_alive())
+
+    def test_purge_expired_tokens(self):
+        """Test that the purge deletes expired outstanding and blacklisted tokens only"""
+        live = RefreshToken.for_user(self.user)
+        live.blacklist()
+        expired = []
+        for _ in range(5):
+            token = RefreshToken.for_user(self.user)
+            token.blacklist()
+            expired.append(token['jti'])
+        OutstandingToken.objects.filter(jti__in=expired).update(expires_at=aware_utcnow())
+
+        output = StringIO()
+        call_command('purge_expired_tokens', batch_size=2, stdout=output)
+        self.assertIn('Done: 5 outstanding and 5 blacklisted tokens deleted', output.getvalue())
+        self.assertEqual(list(OutstandingToken.objects.values_list('jti', flat=True)), [live['jti']])
+        self.assertEqual(BlacklistedToken.objects.count(), 1)
+
+
+class SeedDataTest(APITestCase):
+    def test_seed_data(self):
+        """Test the seeded counts, fan-out limits and comment counters"""
+        output = StringIO()
+        call_command('seed_data', users=20, tags=10, articles=50, comments=120, max_authors=3, max_tags=4,
+                     batch_size=16, password='seeded', stdout=output)
+        self.assertIn('Created 50 articles', output.getvalue())
+        self.assertEqual((User.objects.count(), Tag.objects.count(), Article.objects.count(), Comment.objects.count()),
+                         (20, 10, 50, 120))
+        fan_out = Article.objects.annotate(
+            author_count=Count('authors', distinct=True), tag_count=Count('tags', distinct=True)
+        )
+        self.assertTrue(all(1 <= article.author_count <= 3 and 1 <= article.tag_count <= 4 for article in fan_out))
+        counts = Article.objects.annotate(actual=Count('comment')).values_list('comment_count', 'actual')
+        self.assertTrue(all(stored == actual for stored, actual in counts))
+        self.assertTrue(User.objects.order_by('id').first().check_password('seeded'))
+
+        # Seeding again numbers the new users and tags after the existing ones
+        call_command('seed_data', users=5, tags=2, articles=3, comments=0, stdout=StringIO())
+        self.assertEqual((User.objects.count(), Tag.objects.count()), (25, 12))
@@ -0,0 +1,68 @@
+import hashlib
+import time
+
+from django.conf import settings
+from django.core.cache import cache
+from rest_framework.throttling import BaseThrottle
+
+
+class TokenBucketThrottle(BaseThrottle):
+    """
+    Token bucket kept in the shared cache: a client may spend up to capacity requests
+    at once, refilled at refill_rate tokens per second. bucket_setting names a setting
+    holding (capacity, refill_rate), None turns the throttle off.
+    The read-modify-write is not atomic, concurrent requests of one client can spend
+    a token twice; this bounds bursts, it is not an exact quota.
+    """
+    scope = None
+    bucket_setting = None
+
+    def get_bucket(self):
+        return getattr(settings, self.bucket_setting)
+
+    def get_bucket_key(self, request, view):
+        """Key of the client's bucket, None when the request is not throttled"""
+        raise NotImplementedError
+
+    def allow_request(self, request, view):
+        bucket = self.get_bucket()
+        key = self.get_bucket_key(request, view)
+        if bucket is None or key is None:
+            return True
+        capacity, refill_rate = bucket
+        cache_key = f'api:throttle:{self.scope}:{key}'
+        now = time.time()
+        tokens, updated = cache.get(cache_key, (capacity, now))
+        tokens = min(capacity, tokens + (now - updated) * refill_rate)
+        self.retry_after = None
+        if tokens < 1:
+            self.retry_after = (1 - tokens) / refill_rate
+            return False
+        # Entries expire once the bucket would be full again
+        cache.set(cache_key, (tokens - 1, now), int(capacity / refill_rate) + 1)
+        return True
+
+    def wait(self):
+        return self.retry_after
+
+
+class AuthIPThrottle(TokenBucketThrottle):
+    """Sign-in and registration attempts per client address"""
+    scope = 'auth_ip'
+    bucket_setting = 'AUTH_IP_BUCKET'
+
+    def get_bucket_key(self, request, view):
+        return self.get_ident(request)
+
+
+class AuthEmailThrottle(TokenBucketThrottle):
+    """Sign-in and registration attempts per account email, whatever the address"""
+    scope = 'auth_email'
+    bucket_setting = 'AUTH_EMAIL_BUCKET'
+
+    def get_bucket_key(self, request, view):
+        email = request.data.get('email') if hasattr(request.data, 'get') else None
+        if not isinstance(email, str) or not email:
+            return None
+        # Hashed, so keys stay short and free of characters memcached rejects
+        return hashlib.md5(email.strip().lower().encode('utf-8')).hexdigest()
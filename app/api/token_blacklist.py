@@ -0,0 +1,278 @@
+import datetime
+import hashlib
+import logging
+import math
+import threading
+from collections import OrderedDict
+
+from django.conf import settings
+from django.db import connection, connections, models
+from django.utils.translation import gettext_lazy as _
+from rest_framework.exceptions import AuthenticationFailed
+from rest_framework_simplejwt import serializers, tokens
+from rest_framework_simplejwt.exceptions import TokenError
+from rest_framework_simplejwt.settings import api_settings as jwt_settings
+from rest_framework_simplejwt.token_blacklist.models import BlacklistedToken, OutstandingToken
+from rest_framework_simplejwt.utils import aware_utcnow, datetime_from_epoch
+
+from api.authentication import CachedJWTAuthentication
+
+logger = logging.getLogger(__name__)
+
+BLACKLISTED_AT_INDEX_NAME = 'api_blacklisted_at_idx'
+
+
+class BloomFilter:
+    """
+    Set membership in a fixed bit array: no false negatives, false positives at about
+    error_rate while at most capacity values were added. Values cannot be removed.
+    """
+
+    def __init__(self, capacity, error_rate):
+        self.capacity = capacity
+        self.size = max(64, math.ceil(-capacity * math.log(error_rate) / math.log(2) ** 2))
+        self.hashes = max(1, round(self.size / capacity * math.log(2)))
+        self.bits = bytearray((self.size + 7) // 8)
+        self.count = 0
+
+    def positions(self, value):
+        # Double hashing: the k positions come from the two halves of one digest
+        digest = hashlib.blake2b(value.encode('utf-8'), digest_size=16).digest()
+        first = int.from_bytes(digest[:8], 'little')
+        step = int.from_bytes(digest[8:], 'little') | 1
+        return [(first + i * step) % self.size for i in range(self.hashes)]
+
+    def add(self, value):
+        for position in self.positions(value):
+            self.bits[position >> 3] |= 1 << (position & 7)
+        self.count += 1
+
+    def __contains__(self, value):
+        return all(self.bits[position >> 3] & (1 << (position & 7)) for position in self.positions(value))
+
+
+class BlacklistPrefilter:
+    """
+    Answers "is this refresh token blacklisted?" mostly without a query.
+    A Bloom filter holds the jti of every blacklisted token: a jti it does not contain
+    is not blacklisted. A background thread builds the filter from the table, then
+    catches up with tokens blacklisted by other processes every sync_interval seconds,
+    reading the rows blacklisted since the previous sync minus sync_overlap seconds, so
+    rows committed a little after their blacklisted_at are not missed. Until the first
+    build is done every check queries. Filter hits are confirmed in the database,
+    confirmed jtis are kept in an LRU so replays of the same token do not query again.
+    The filter is rebuilt from the table once it holds more than its capacity.
+    Between two syncs a token blacklisted by another process can pass the filter, so the
+    refresh endpoint does not rely on it: rotation blacklists with a single conditional
+    insert that fails for a token already blacklisted.
+    """
+
+    def __init__(self, capacity, error_rate, sync_interval, sync_overlap, confirmed_size):
+        self.capacity = capacity
+        self.error_rate = error_rate
+        self.sync_interval = sync_interval
+        self.sync_overlap = datetime.timedelta(seconds=sync_overlap)
+        self.confirmed_size = confirmed_size
+        self.lock = threading.Lock()
+        self.bloom = None
+        # The next sync reads the rows blacklisted from this time on
+        self.synced_since = None
+        # jti -> blacklisted_at of the rows the next sync reads again, not to add them twice
+        self.recent = {}
+        # jti -> None, blacklisted tokens in least recently seen order
+        self.confirmed = OrderedDict()
+        self.stopped = threading.Event()
+        self.thread = None
+
+    def start(self):
+        """Build, then sync the filter in a background thread"""
+        self.thread = threading.Thread(target=self.run, name='token-blacklist-filter', daemon=True)
+        self.thread.start()
+
+    def stop(self):
+        self.stopped.set()
+        if self.thread is not None:
+            self.thread.join()
+
+    def run(self):
+        while True:
+            try:
+                self.sync()
+            except Exception:
+                logger.exception("Syncing the token blacklist filter failed")
+                # Reconnect on the next attempt, the connection may be broken
+                connections.close_all()
+            if self.stopped.wait(self.sync_interval):
+                break
+        connections.close_all()
+
+    @staticmethod
+    def read_rows(bloom, rows, seen, since):
+        """Add the (jti, blacklisted_at) rows not seen yet, return those blacklisted from since on"""
+        recent = {}
+        for jti, blacklisted_at in rows:
+            if jti not in seen:
+                bloom.add(jti)
+            if blacklisted_at >= since:
+                recent[jti] = blacklisted_at
+        return recent
+
+    def rebuild(self):
+        since = aware_utcnow() - self.sync_overlap
+        count = BlacklistedToken.objects.count()
+        bloom = BloomFilter(max(self.capacity, count * 2), self.error_rate)
+        rows = BlacklistedToken.objects.values_list('token__jti', 'blacklisted_at').iterator(chunk_size=10000)
+        recent = self.read_rows(bloom, rows, {}, since)
+        with self.lock:
+            self.bloom, self.recent, self.synced_since = bloom, recent, since
+
+    def sync(self):
+        """Build the filter, or add the tokens blacklisted since the last sync"""
+        if self.bloom is None or self.bloom.count > self.bloom.capacity:
+            self.rebuild()
+            return
+        since = aware_utcnow() - self.sync_overlap
+        rows = list(BlacklistedToken.objects.filter(blacklisted_at__gte=self.synced_since).values_list(
+            'token__jti', 'blacklisted_at'
+        ))
+        with self.lock:
+            self.recent = self.read_rows(self.bloom, rows, self.recent, since)
+            self.synced_since = since
+
+    def remember(self, jti):
+        with self.lock:
+            self.confirmed[jti] = None
+            self.confirmed.move_to_end(jti)
+            while len(self.confirmed) > self.confirmed_size:
+                self.confirmed.popitem(last=False)
+
+    def add(self, jti):
+        """Record a token this process just blacklisted"""
+        with self.lock:
+            if self.bloom is not None:
+                self.bloom.add(jti)
+        self.remember(jti)
+
+    def is_blacklisted(self, jti):
+        with self.lock:
+            if jti in self.confirmed:
+                self.confirmed.move_to_end(jti)
+                return True
+        bloom = self.bloom
+        if bloom is not None and jti not in bloom:
+            return False
+        blacklisted = BlacklistedToken.objects.filter(token__jti=jti).exists()
+        if blacklisted:
+            self.remember(jti)
+        return blacklisted
+
+
+def create_blacklisted_at_index(using='default', **kwargs):
+    """
+    post_migrate handler: index the blacklisted_at column the prefilter syncs on. The
+    table belongs to simplejwt's token_blacklist app, whose migrations do not index it.
+    """
+    connection = connections[using]
+    table = BlacklistedToken._meta.db_table
+    with connection.cursor() as cursor:
+        if table not in connection.introspection.table_names(cursor):
+            return
+        if BLACKLISTED_AT_INDEX_NAME in connection.introspection.get_constraints(cursor, table):
+            return
+    with connection.schema_editor() as schema_editor:
+        schema_editor.add_index(
+            BlacklistedToken, models.Index(fields=['blacklisted_at'], name=BLACKLISTED_AT_INDEX_NAME)
+        )
+
+
+_prefilter = None
+_prefilter_lock = threading.Lock()
+
+
+def get_blacklist_prefilter():
+    """The process-wide prefilter, created and started on first use from the TOKEN_BLACKLIST_* settings"""
+    global _prefilter
+    if _prefilter is None:
+        with _prefilter_lock:
+            if _prefilter is None:
+                _prefilter = BlacklistPrefilter(
+                    capacity=settings.TOKEN_BLACKLIST_FILTER_CAPACITY,
+                    error_rate=settings.TOKEN_BLACKLIST_FILTER_ERROR_RATE,
+                    sync_interval=settings.TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL,
+                    sync_overlap=settings.TOKEN_BLACKLIST_FILTER_SYNC_OVERLAP,
+                    confirmed_size=settings.TOKEN_BLACKLIST_CONFIRMED_CACHE_SIZE,
+                )
+                _prefilter.start()
+    return _prefilter
+
+
+class RefreshToken(tokens.RefreshToken):
+    """Refresh token checked against the blacklist prefilter instead of a query per check"""
+
+    def check_blacklist(self):
+        if get_blacklist_prefilter().is_blacklisted(self.payload[jwt_settings.JTI_CLAIM]):
+            raise TokenError(_("Token is blacklisted"))
+
+    def blacklist_once(self):
+        """
+        Blacklist the token with one INSERT ... SELECT that skips tokens already
+        blacklisted, TokenError when it was. Two requests refreshing the same token
+        concurrently cannot both succeed.
+        """
+        jti = self.payload[jwt_settings.JTI_CLAIM]
+        quote = connection.ops.quote_name
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f"INSERT INTO {quote(BlacklistedToken._meta.db_table)} ({quote('token_id')}, {quote('blacklisted_at')})"
+                f" SELECT {quote('id')}, %s FROM {quote(OutstandingToken._meta.db_table)} WHERE {quote('jti')} = %s"
+                f" ON CONFLICT ({quote('token_id')}) DO NOTHING RETURNING {quote('id')}",
+                [aware_utcnow(), jti],
+            )
+            inserted = cursor.fetchone() is not None
+        if not inserted:
+            if OutstandingToken.objects.filter(jti=jti).exists():
+                get_blacklist_prefilter().remember(jti)
+                raise TokenError(_("Token is blacklisted"))
+            # Not in the outstanding list (not created by for_user()), add it first
+            self.blacklist()
+        get_blacklist_prefilter().add(jti)
+
+    def outstand_for(self, user):
+        """outstand() for a new jti of a known user: a single INSERT"""
+        return OutstandingToken.objects.create(
+            user_id=user.pk,
+            jti=self.payload[jwt_settings.JTI_CLAIM],
+            token=str(self),
+            created_at=self.current_time,
+            expires_at=datetime_from_epoch(self.payload['exp']),
+        )
+
+
+class TokenRefreshSerializer(serializers.TokenRefreshSerializer):
+    """
+    TokenRefreshSerializer with the prefiltered blacklist check, the token user served
+    by the authentication cache and rotation done in two statements (blacklist the old
+    token, outstand the new one) instead of the seven queries of the stock serializer.
+    """
+    token_class = RefreshToken
+
+    def validate(self, attrs):
+        refresh = self.token_class(attrs['refresh'])
+        user = CachedJWTAuthentication().get_user(refresh)
+        if not jwt_settings.USER_AUTHENTICATION_RULE(user):
+            raise AuthenticationFailed(self.error_messages['no_active_account'], 'no_active_account')
+
+        data = {'access': str(refresh.access_token)}
+
+        if jwt_settings.ROTATE_REFRESH_TOKENS:
+            if jwt_settings.BLACKLIST_AFTER_ROTATION:
+                refresh.blacklist_once()
+
+            refresh.set_jti()
+            refresh.set_exp()
+            refresh.set_iat()
+            refresh.outstand_for(user)
+
+            data['refresh'] = str(refresh)
+
+        return data
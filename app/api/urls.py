@@ -1,9 +1,11 @@
 from django.urls import include,path
+from .views import ResponseCacheStatsView
 
 urlpatterns = [
     path('users/',include("api.users.urls")),
     path('articles/',include("api.articles.urls")),
     path('comments/',include("api.comments.urls")),
     path('tags/',include("api.tags.urls")),
+    path('cache/stats/', ResponseCacheStatsView.as_view(), name='response_cache_stats'),
     
 ]
@@ -0,0 +1,111 @@
+import logging
+import os
+import tempfile
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db import connections
+from rest_framework.exceptions import APIException
+from api.users.user_import import UserImporter, UserImportError
+
+logger = logging.getLogger(__name__)
+
+# State of an import job in the shared cache, so any server process can report it
+JOB_CACHE_KEY = 'api:users_import_job:{}'
+
+
+class ImportQueueFull(APIException):
+    status_code = 503
+    default_detail = 'Too many user imports in progress, retry later.'
+    default_code = 'import_queue_full'
+
+
+def set_job_state(job_id, state, summary=None):
+    cache.set(JOB_CACHE_KEY.format(job_id), {'id': job_id, 'status': state, **(summary or {})},
+              settings.USERS_IMPORT_JOB_TIMEOUT)
+
+
+def get_job_state(job_id):
+    return cache.get(JOB_CACHE_KEY.format(job_id))
+
+
+def run_job(job_id, path, file_format):
+    """Import the saved upload, recording the summary after every batch and at the end"""
+    try:
+        with open(path, encoding='utf-8-sig', newline='') as stream:
+            importer = UserImporter(
+                stream, format=file_format, batch_size=settings.USERS_IMPORT_BATCH_SIZE,
+                processes=settings.USERS_IMPORT_ENDPOINT_PROCESSES,
+                progress=lambda summary: set_job_state(job_id, 'running', summary),
+            )
+            set_job_state(job_id, 'running', importer.summary())
+            try:
+                set_job_state(job_id, 'done', importer.run())
+            except (UserImportError, UnicodeDecodeError) as error:
+                set_job_state(job_id, 'failed', {'error': str(error), **importer.summary()})
+    except Exception:
+        logger.exception("User import %s failed", job_id)
+        set_job_state(job_id, 'failed', {'error': "The import failed, see the server logs"})
+    finally:
+        os.remove(path)
+
+
+class ImportJobs:
+    """
+    Background imports of the uploaded user files. Hashing thousands of passwords takes
+    minutes, so the upload is saved to a temporary file and imported by a thread of the
+    web process while the request returns. At most workers imports run at once and
+    queue_size more wait for a thread, the next uploads fail fast with ImportQueueFull.
+    """
+
+    def __init__(self, workers, queue_size):
+        self.executor = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='users-import')
+        self.slots = threading.BoundedSemaphore(workers + queue_size)
+
+    def submit(self, upload, file_format):
+        """Queue the import of an uploaded file and return the id of its job"""
+        if not self.slots.acquire(blocking=False):
+            raise ImportQueueFull()
+        path = None
+        try:
+            handle, path = tempfile.mkstemp(prefix='users-import-')
+            with os.fdopen(handle, 'wb') as file:
+                for chunk in upload.chunks():
+                    file.write(chunk)
+            job_id = uuid.uuid4().hex
+            set_job_state(job_id, 'pending')
+            future = self.executor.submit(self.run, job_id, path, file_format)
+        except BaseException:
+            self.slots.release()
+            if path is not None:
+                os.remove(path)
+            raise
+        future.add_done_callback(lambda _: self.slots.release())
+        return job_id
+
+    def run(self, job_id, path, file_format):
+        try:
+            run_job(job_id, path, file_format)
+        finally:
+            # The connections opened by this thread are not closed at the end of a request
+            connections.close_all()
+
+
+_jobs = None
+_jobs_lock = threading.Lock()
+
+
+def get_import_jobs():
+    """The process-wide import threads, created on first use from the USERS_IMPORT_JOB_* settings"""
+    global _jobs
+    if _jobs is None:
+        with _jobs_lock:
+            if _jobs is None:
+                _jobs = ImportJobs(
+                    workers=settings.USERS_IMPORT_JOB_WORKERS,
+                    queue_size=settings.USERS_IMPORT_JOB_QUEUE_SIZE,
+                )
+    return _jobs
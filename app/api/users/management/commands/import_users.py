@@ -0,0 +1,41 @@
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from api.users.user_import import FORMATS, UserImporter, UserImportError, file_format_of
+
+
+class Command(BaseCommand):
+    help = "Create users from a CSV or JSON Lines file, hashing passwords on every core"
+
+    def add_arguments(self, parser):
+        parser.add_argument('path', help='CSV (email,first_name,last_name,password) or JSON Lines file')
+        parser.add_argument('--format', choices=FORMATS,
+                            help='File format (default: from the extension, csv unless .jsonl/.ndjson)')
+        parser.add_argument('--batch-size', type=int, default=settings.USERS_IMPORT_BATCH_SIZE,
+                            help='Number of users inserted per transaction')
+        parser.add_argument('--processes', type=int, default=settings.USERS_IMPORT_PROCESSES,
+                            help='Password hashing processes (default: one per core)')
+
+    def handle(self, *args, **options):
+        file_format = options['format'] or file_format_of(options['path'])
+        try:
+            with open(options['path'], encoding='utf-8-sig', newline='') as stream:
+                summary = UserImporter(
+                    stream, format=file_format, batch_size=options['batch_size'],
+                    processes=options['processes'], progress=self.report_progress,
+                ).run()
+        except (OSError, UserImportError, UnicodeDecodeError) as error:
+            raise CommandError(str(error))
+
+        for error in summary['errors']:
+            self.stderr.write(f"Line {error['line']}: {error['error']}")
+        self.stdout.write(self.style.SUCCESS(
+            f"Done in {summary['seconds']:.1f}s: {summary['inserted']} inserted, "
+            f"{summary['skipped']} skipped, {summary['rejected']} rejected "
+            f"({summary['users_per_second']} users/s)"
+        ))
+
+    def report_progress(self, summary):
+        self.stdout.write(
+            f"{summary['inserted']} inserted, {summary['skipped']} skipped, {summary['rejected']} rejected "
+            f"in {summary['seconds']:.1f}s ({summary['users_per_second']} users/s)"
+        )
@@ -1,7 +1,22 @@
+import io
+import json
+import os
+import tempfile
+import threading
+import time
+from unittest import mock
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import connection
+from django.test import override_settings
+from django.test.utils import CaptureQueriesContext
 from django.urls import reverse
 from rest_framework import status
-from rest_framework.test import APITestCase
+from rest_framework.test import APITestCase, APITransactionTestCase
+from api import password_pool
 from api.models import User
+from api.password_pool import PasswordPool, PasswordPoolBusy
+from api.users.import_jobs import ImportJobs
 from rest_framework_simplejwt.tokens import RefreshToken
 
 class UserAPITestCase(APITestCase):
@@ -181,4 +196,173 @@ class RetrieveUpdateDeleteUserTest(UserAPITestCase):
         self.authenticate_user()
         response = self.client.delete(url)
         self.assertEqual(response.status_code, status.HTTP_403_FORBIDDEN)
-        self.assertTrue(User.objects.filter(email='admin@example.com').exists())
\ No newline at end of file
+        self.assertTrue(User.objects.filter(email='admin@example.com').exists())
+
+class LoginRegisterTest(UserAPITestCase):
+    def setUp(self):
+        super().setUp()
+        # Throttle buckets live in the cache
+        cache.clear()
+        self.credentials = {
+            'email': 'user@example.com', 'first_name': 'Test', 'last_name': 'User', 'password': 'testpassword123'
+        }
+
+    def test_login_runs_one_user_query(self):
+        """Test that a successful login looks the user up once"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.post(reverse('login'), self.credentials, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertIn('access', response.data)
+        user_queries = [q for q in queries if q['sql'].startswith('SELECT') and 'FROM "User"' in q['sql']]
+        self.assertEqual(len(user_queries), 1)
+
+    def test_invalid_credentials(self):
+        """Test that a wrong password and an unknown email are both rejected with a 401"""
+        for changes in ({'password': 'wrongpassword'}, {'email': 'nobody@example.com'}, {'first_name': 'Wrong'}):
+            response = self.client.post(reverse('login'), {**self.credentials, **changes}, format='json')
+            self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED, changes)
+            self.assertIn('error', response.data)
+
+    def test_register(self):
+        """Test that registration stores a usable password hash"""
+        data = {'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User', 'password': 'newpassword123'}
+        response = self.client.post(reverse('register'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_200_OK)
+        self.assertTrue(User.objects.get(email='new@example.com').check_password('newpassword123'))
+        response = self.client.post(reverse('register'), data, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+
+    @override_settings(AUTH_IP_BUCKET=(4, 0.001), AUTH_EMAIL_BUCKET=(2, 0.001))
+    def test_token_buckets(self):
+        """Test that the email bucket, then the address bucket, reject requests with a 429
+        Every attempt spends an address token, the rejected ones included."""
+        wrong = {**self.credentials, 'password': 'wrongpassword'}
+        statuses = [self.client.post(reverse('login'), wrong, format='json').status_code for _ in range(3)]
+        self.assertEqual(statuses, [401, 401, 429])
+        response = self.client.post(reverse('login'), {**wrong, 'email': 'other@example.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_401_UNAUTHORIZED)
+        response = self.client.post(reverse('login'), {**wrong, 'email': 'third@example.com'}, format='json')
+        self.assertEqual(response.status_code, status.HTTP_429_TOO_MANY_REQUESTS)
+        self.assertIn('Retry-After', response)
+
+    def test_saturated_pool(self):
+        """Test that calls beyond the pool and its queue fail fast, with a 503 from the views"""
+        pool = PasswordPool(workers=1, queue_size=0, timeout=5)
+        release = threading.Event()
+        worker = threading.Thread(target=pool.run, args=(release.wait,))
+        worker.start()
+        previous, password_pool._pool = password_pool._pool, pool
+        try:
+            with self.assertRaises(PasswordPoolBusy):
+                pool.make_password('password')
+            response = self.client.post(reverse('login'), self.credentials, format='json')
+            self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+        finally:
+            password_pool._pool = previous
+            release.set()
+            worker.join()
+
+
+class UsersImportTest(APITransactionTestCase):
+    # Imports run in a background thread with its own connection, which must see the
+    # users committed by the test and commits its own
+    csv_content = (
+        "email,first_name,last_name,password\n"
+        "new1@example.com,New,One,password-one\n"
+        "user@example.com,Already,There,password\n"
+        "new2@example.com,New,Two,\n"
+        "new1@example.com,Repeated,One,password\n"
+        "not-an-email,Bad,Email,password\n"
+        "new3@example.com,,Name,password\n"
+    )
+
+    def setUp(self):
+        self.user = User.objects.create_user(
+            email='user@example.com', first_name='Test', last_name='User', password='testpassword123'
+        )
+        self.admin = User.objects.create_superuser(
+            email='admin@example.com', first_name='Admin', last_name='User', password='adminpassword123'
+        )
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.admin).access_token}')
+
+    def upload(self, content, name):
+        upload = io.BytesIO(content.encode('utf-8'))
+        upload.name = name
+        return self.client.post(reverse('users_import'), {'file': upload}, format='multipart')
+
+    def import_file(self, content, name):
+        """Upload the file and wait for its job to finish, returning its final state"""
+        response = self.upload(content, name)
+        self.assertEqual(response.status_code, status.HTTP_202_ACCEPTED)
+        self.assertEqual(response.data['status'], 'pending')
+        self.assertTrue(response['Location'].endswith(f"/import/{response.data['id']}/"))
+        for _ in range(200):
+            state = self.client.get(response['Location']).data
+            if state['status'] in ('done', 'failed'):
+                return state
+            time.sleep(0.05)
+        self.fail(f"The import did not finish: {state}")
+
+    def test_import_skips_existing_and_repeated_emails(self):
+        """Test that new users are created, duplicates skipped and invalid records reported"""
+        with mock.patch('api.users.user_import.ProcessPoolExecutor') as executor, \
+                mock.patch('api.users.user_import.multiprocessing.cpu_count', return_value=8):
+            state = self.import_file(self.csv_content, 'users.csv')
+        # The job hashes in its thread, without a process pool, whatever the cores
+        executor.assert_not_called()
+        self.assertEqual(state['status'], 'done')
+        self.assertEqual((state['inserted'], state['skipped'], state['rejected']), (2, 2, 2))
+        self.assertEqual([error['line'] for error in state['errors']], [6, 7])
+        self.assertTrue(User.objects.get(email='new1@example.com').check_password('password-one'))
+        self.assertFalse(User.objects.get(email='new2@example.com').has_usable_password())
+        self.assertEqual(User.objects.get(email='user@example.com').first_name, 'Test')
+
+    def test_import_jsonl_requires_admin(self):
+        """Test the JSON Lines format, failed jobs and that only admins can import"""
+        content = (
+            json.dumps({'email': 'new@example.com', 'first_name': 'New', 'last_name': 'User', 'password': 'secret'})
+            + "\n[1, 2]\n"
+        )
+        state = self.import_file(content, 'users.jsonl')
+        self.assertEqual((state['status'], state['inserted'], state['rejected']), ('done', 1, 1))
+        state = self.import_file("name,email\n", 'users.csv')
+        self.assertEqual(state['status'], 'failed')
+        self.assertIn('Expected the columns', state['error'])
+        self.assertEqual(self.client.get(reverse('users_import_status', kwargs={'job_id': 'unknown'})).status_code,
+                         status.HTTP_404_NOT_FOUND)
+
+        self.client.credentials(HTTP_AUTHORIZATION=f'Bearer {RefreshToken.for_user(self.user).access_token}')
+        self.assertEqual(self.upload(content, 'users.jsonl').status_code, status.HTTP_403_FORBIDDEN)
+
+    def test_queue_full(self):
+        """Test that uploads beyond the running and queued imports are refused with a 503"""
+        jobs = ImportJobs(workers=1, queue_size=0)
+        release = threading.Event()
+
+        def blocked_job(job_id, path, file_format):
+            release.wait(5)
+            os.remove(path)
+
+        with mock.patch('api.users.import_jobs.run_job', blocked_job), \
+                mock.patch('api.users.import_jobs._jobs', jobs):
+            try:
+                self.assertEqual(self.upload(self.csv_content, 'users.csv').status_code, status.HTTP_202_ACCEPTED)
+                response = self.upload(self.csv_content, 'users.csv')
+                self.assertEqual(response.status_code, status.HTTP_503_SERVICE_UNAVAILABLE)
+            finally:
+                release.set()
+                jobs.executor.shutdown()
+
+    def test_command_hashes_in_processes(self):
+        """Test the management command with a pool of hashing processes and small batches"""
+        handle, path = tempfile.mkstemp(suffix='.csv')
+        with os.fdopen(handle, 'w') as stream:
+            stream.write("email,first_name,last_name,password\n")
+            stream.writelines(f"bulk{i}@example.com,Bulk,User{i},password{i}\n" for i in range(6))
+        output = io.StringIO()
+        try:
+            call_command('import_users', path, batch_size=3, processes=2, stdout=output)
+        finally:
+            os.remove(path)
+        self.assertIn('6 inserted, 0 skipped, 0 rejected', output.getvalue())
+        self.assertTrue(User.objects.get(email='bulk5@example.com').check_password('password5'))
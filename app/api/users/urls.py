@@ -1,6 +1,6 @@
 from django.urls import path
 from rest_framework_simplejwt.views import TokenRefreshView
-from .views import RegisterView,LoginView, UserProfileView,UsersListView,RetrieveUpdateDeleteUser
+from .views import RegisterView,LoginView, UserProfileView,UsersListView,RetrieveUpdateDeleteUser,UsersImportView,UsersImportStatusView
 
 urlpatterns = [
     # Token auth endpoint
@@ -15,5 +15,8 @@ urlpatterns = [
 
     path('', UsersListView.as_view(), name='users_list'),
 
+    path('import/', UsersImportView.as_view(), name='users_import'),
+    path('import/<str:job_id>/', UsersImportStatusView.as_view(), name='users_import_status'),
+
     path('<int:user_id>/', RetrieveUpdateDeleteUser.as_view(), name='user_details'),
 ]
\ No newline at end of file
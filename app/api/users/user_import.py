@@ -0,0 +1,184 @@
+import csv
+import json
+import multiprocessing
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from django.core.exceptions import ValidationError
+from django.core.validators import validate_email
+from django.db import IntegrityError, transaction
+from api.cache_versions import bump_model_version
+from api.password_pool import make_passwords, setup_hashing_process
+from api.models import User
+
+# Fields of a user record, the header of the CSV format. An empty or missing password
+# creates the user with an unusable password.
+USER_COLUMNS = ['email', 'first_name', 'last_name', 'password']
+FORMATS = ('csv', 'jsonl')
+
+
+class UserImportError(Exception):
+    """The file cannot be imported at all (as opposed to a rejected record)"""
+
+
+class ImportRow:
+    __slots__ = ('line', 'email', 'first_name', 'last_name', 'password')
+
+    def __init__(self, line, email, first_name, last_name, password):
+        self.line = line
+        self.email = email
+        self.first_name = first_name
+        self.last_name = last_name
+        self.password = password
+
+
+def file_format_of(name):
+    """jsonl for .jsonl/.ndjson file names, csv otherwise"""
+    return 'jsonl' if name.lower().endswith(('.jsonl', '.ndjson')) else 'csv'
+
+
+class UserImporter:
+    """
+    Create users from CSV or JSON Lines records.
+    Records are read as a stream and written in batches: one query per batch finds
+    the emails that already exist, the passwords of the new users are hashed in a pool
+    of processes, then the users are inserted with one bulk_create per batch, each in
+    its own transaction. Existing and repeated emails are skipped, not updated.
+    """
+    max_reported_errors = 100
+
+    def __init__(self, stream, format='csv', batch_size=2000, processes=None, progress=None):
+        if format not in FORMATS:
+            raise UserImportError(f"The format must be one of {', '.join(FORMATS)}")
+        self.stream = stream
+        self.format = format
+        self.batch_size = batch_size
+        # 1 hashes in this process, None uses every core
+        self.processes = processes or multiprocessing.cpu_count()
+        # Called with the running summary after every batch
+        self.progress = progress
+        self.inserted = self.skipped = self.rejected = 0
+        self.errors = []
+        self.seen_emails = set()
+        self.started = None
+        self.executor = None
+
+    def run(self):
+        self.started = time.perf_counter()
+        if self.processes > 1:
+            # Spawned, not forked: the import may run in a threaded server process
+            self.executor = ProcessPoolExecutor(
+                self.processes, mp_context=multiprocessing.get_context('spawn'), initializer=setup_hashing_process
+            )
+        try:
+            batch = []
+            for row in self.read_rows():
+                batch.append(row)
+                if len(batch) >= self.batch_size:
+                    self.import_batch(batch)
+                    batch = []
+            if batch:
+                self.import_batch(batch)
+        finally:
+            if self.executor is not None:
+                self.executor.shutdown(cancel_futures=True)
+        return self.summary()
+
+    def summary(self):
+        elapsed = time.perf_counter() - self.started if self.started is not None else 0
+        return {
+            'inserted': self.inserted,
+            'skipped': self.skipped,
+            'rejected': self.rejected,
+            'seconds': round(elapsed, 3),
+            'users_per_second': round(self.inserted / elapsed, 1) if elapsed else 0,
+            'errors': sorted(self.errors, key=lambda error: error['line']),
+        }
+
+    def reject(self, line, message):
+        self.rejected += 1
+        if len(self.errors) < self.max_reported_errors:
+            self.errors.append({'line': line, 'error': message})
+
+    def read_rows(self):
+        records = self.read_csv() if self.format == 'csv' else self.read_jsonl()
+        for line, record in records:
+            row = self.parse_record(record, line)
+            if row is not None:
+                yield row
+
+    def read_csv(self):
+        reader = csv.DictReader(self.stream)
+        if reader.fieldnames is None or not set(USER_COLUMNS[:3]) <= set(reader.fieldnames):
+            raise UserImportError(f"Expected the columns {', '.join(USER_COLUMNS)}")
+        for record in reader:
+            yield reader.line_num, record
+
+    def read_jsonl(self):
+        for line, text in enumerate(self.stream, start=1):
+            if not text.strip():
+                continue
+            try:
+                record = json.loads(text)
+            except ValueError:
+                self.reject(line, "Invalid JSON")
+                continue
+            if not isinstance(record, dict):
+                self.reject(line, "Expected a JSON object")
+                continue
+            yield line, record
+
+    def parse_record(self, record, line):
+        values = {}
+        for field in USER_COLUMNS:
+            value = record.get(field) or ''
+            if not isinstance(value, str):
+                return self.reject(line, f"'{field}' must be a string")
+            values[field] = value if field == 'password' else value.strip()
+        try:
+            validate_email(values['email'])
+        except ValidationError:
+            return self.reject(line, f"Invalid email '{values['email']}'")
+        email = User.objects.normalize_email(values['email'])
+        for field in ('first_name', 'last_name'):
+            if not values[field] or len(values[field]) > User._meta.get_field(field).max_length:
+                return self.reject(line, f"'{field}' is empty or too long")
+        if email in self.seen_emails:
+            self.skipped += 1
+            return None
+        self.seen_emails.add(email)
+        return ImportRow(line, email, values['first_name'], values['last_name'], values['password'])
+
+    def hash_passwords(self, passwords):
+        if self.executor is None or len(passwords) < self.processes:
+            return make_passwords(passwords)
+        # A few chunks per process, so a slow chunk does not leave the others idle
+        size = -(-len(passwords) // (self.processes * 4))
+        chunks = [passwords[start:start + size] for start in range(0, len(passwords), size)]
+        return [hashed for chunk in self.executor.map(make_passwords, chunks) for hashed in chunk]
+
+    def import_batch(self, rows):
+        for attempt in range(2):
+            existing = set(User.objects.filter(email__in=[row.email for row in rows]).values_list('email', flat=True))
+            new_rows = [row for row in rows if row.email not in existing]
+            if attempt == 0:
+                hashes = dict(zip(
+                    (row.line for row in new_rows), self.hash_passwords([row.password for row in new_rows])
+                ))
+            try:
+                with transaction.atomic():
+                    User.objects.bulk_create([
+                        User(email=row.email, first_name=row.first_name, last_name=row.last_name,
+                             password=hashes[row.line])
+                        for row in new_rows
+                    ])
+                break
+            except IntegrityError:
+                # An email was registered since the lookup, look up again once
+                if attempt:
+                    raise
+        self.skipped += len(rows) - len(new_rows)
+        self.inserted += len(new_rows)
+        bump_model_version(User)
+        if self.progress is not None:
+            self.progress(self.summary())
@@ -1,10 +1,18 @@
 from rest_framework import status, views,generics
 from rest_framework.response import Response
+from rest_framework.parsers import MultiPartParser
+from rest_framework.exceptions import APIException
 from rest_framework.permissions import AllowAny, IsAuthenticated,IsAdminUser
 from rest_framework_simplejwt.tokens import RefreshToken
 from django_filters.rest_framework import DjangoFilterBackend
 from api.models import User
 from api.serializers import UserSerializer
+from api.queryset_optimizer_mixin import QuerysetOptimizerMixin
+from api.password_pool import get_password_pool
+from api.throttling import AuthEmailThrottle, AuthIPThrottle
+from api.users.import_jobs import get_import_jobs, get_job_state
+from api.users.user_import import file_format_of
+from django.urls import reverse
 
 class RegisterView(views.APIView):
     """
@@ -12,6 +20,8 @@ class RegisterView(views.APIView):
     """
     # doesn't need authentication to access this endpoint
     permission_classes = [AllowAny]
+    # Token buckets per client address and per email, checked before any hashing
+    throttle_classes = [AuthIPThrottle, AuthEmailThrottle]
     
     def post(self, request):
     
@@ -27,12 +37,12 @@ class RegisterView(views.APIView):
                     status=status.HTTP_401_UNAUTHORIZED
                 )
             else:
-            # Create new user
+            # Hash on the bounded pool, then create the new user
                 user = User.objects.create_user(
                 data['email'],
                 data['first_name'],
                 data['last_name'],
-                data['password']
+                password_hash=get_password_pool().make_password(data['password'])
             )
                 
             # Generate JWT tokens
@@ -43,6 +53,9 @@ class RegisterView(views.APIView):
                 'access': str(refresh.access_token),
             })
             
+        except APIException:
+            # Saturated hashing pool (503)
+            raise
         except Exception as e:
             return Response({"error": f"User creation failed: {str(e)}"}, 
                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -54,31 +67,31 @@ class LoginView(views.APIView):
     """
     # doesn't need authentication to access this endpoint
     permission_classes = [AllowAny]
+    # Token buckets per client address and per email, checked before any hashing
+    throttle_classes = [AuthIPThrottle, AuthEmailThrottle]
     
     def post(self, request):
     
         
-        # Create or update user
         try:
             data = request.data
-            # Check if user already exists
-            user_exists = User.objects.filter(email=data['email']).exists()
-            if user_exists:
-            # Authenticate existing user
-                check, user = User.objects.check_user_credentials(data['email'], data['first_name'], data['last_name'], data['password'])
-                if check is False:
-                    return Response(
-                    {"error": "Invalid credentials"}, 
-                    status=status.HTTP_401_UNAUTHORIZED
-                )
-                else: 
-                    # Generate JWT tokens
-                    refresh = RefreshToken.for_user(user)
-            
-                    return Response({
-                    'refresh': str(refresh),
-                    'access': str(refresh.access_token),
-                    })    
+            # One user query, the password is checked on the bounded hashing pool
+            check, user = User.objects.check_user_credentials(data['email'], data['first_name'], data['last_name'], data['password'])
+            if check is False:
+                return Response(
+                {"error": "Invalid credentials"}, 
+                status=status.HTTP_401_UNAUTHORIZED
+            )
+            # Generate JWT tokens
+            refresh = RefreshToken.for_user(user)
+    
+            return Response({
+            'refresh': str(refresh),
+            'access': str(refresh.access_token),
+            })
+        except APIException:
+            # Saturated hashing pool (503)
+            raise
         except Exception as e:
             return Response({"error": f"User login failed: {str(e)}"}, 
                            status=status.HTTP_500_INTERNAL_SERVER_ERROR)
@@ -98,7 +111,7 @@ class UserProfileView(views.APIView):
         return Response(serializer.data)
 
 
-class UsersListView(generics.ListAPIView):
+class UsersListView(QuerysetOptimizerMixin,generics.ListAPIView):
     """
     View for retrieving all users
     """
@@ -107,7 +120,7 @@ class UsersListView(generics.ListAPIView):
     filter_backends = [DjangoFilterBackend]  
     queryset = User.objects.all()
 
-class RetrieveUpdateDeleteUser(generics.RetrieveUpdateDestroyAPIView):
+class RetrieveUpdateDeleteUser(QuerysetOptimizerMixin,generics.RetrieveUpdateDestroyAPIView):
 
     serializer_class = UserSerializer
     queryset = User.objects.all().distinct()
@@ -125,4 +138,38 @@ class RetrieveUpdateDeleteUser(generics.RetrieveUpdateDestroyAPIView):
             # Only authors can delete
             return [IsAuthenticated() , IsAdminUser()]
         # Default to the class-level permissions
-        return super().get_permissions()
\ No newline at end of file
+        return super().get_permissions()
+
+
+class UsersImportView(generics.GenericAPIView):
+    """
+    View for creating users from a CSV or JSON Lines file
+    """
+    permission_classes = [IsAuthenticated,IsAdminUser]
+    parser_classes = [MultiPartParser]
+
+    def post(self, request, *args, **kwargs):
+        """
+        Queue the import of the uploaded 'file' (JSON Lines when named .jsonl/.ndjson, CSV
+        otherwise) and return its job, to be followed at the Location URL
+        """
+        upload = request.FILES.get('file')
+        if upload is None:
+            return Response({"error": "Upload the users as the 'file' field"}, status=status.HTTP_400_BAD_REQUEST)
+        job_id = get_import_jobs().submit(upload, file_format_of(upload.name or ''))
+        location = request.build_absolute_uri(reverse('users_import_status', kwargs={'job_id': job_id}))
+        return Response(get_job_state(job_id), status=status.HTTP_202_ACCEPTED, headers={'Location': location})
+
+
+class UsersImportStatusView(generics.GenericAPIView):
+    """
+    View for following an import job: pending, running, done or failed, with the
+    running summary of inserted, skipped and rejected users
+    """
+    permission_classes = [IsAuthenticated,IsAdminUser]
+
+    def get(self, request, job_id, *args, **kwargs):
+        state = get_job_state(job_id)
+        if state is None:
+            return Response({"error": "Import job not found"}, status=status.HTTP_404_NOT_FOUND)
+        return Response(state, status=status.HTTP_200_OK)
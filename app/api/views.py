@@ -1,4 +1,19 @@
 from django.http import JsonResponse
+from rest_framework import views
+from rest_framework.permissions import IsAdminUser, IsAuthenticated
+from rest_framework.response import Response
+from .cache_versions import get_cache_stats
+from .response_cache_mixin import cached_view_names
 
 def custom_404_view(request, exception):
-    return JsonResponse({'error': 'Page not found'}, status=404)
\ No newline at end of file
+    return JsonResponse({'error': 'Page not found'}, status=404)
+
+
+class ResponseCacheStatsView(views.APIView):
+    """
+    View for retrieving the response cache hit/miss statistics
+    """
+    permission_classes = [IsAuthenticated, IsAdminUser]
+
+    def get(self, request):
+        return Response(get_cache_stats(sorted(cached_view_names)))
@@ -89,16 +89,100 @@ DATABASES = {
     }
 }
 
+# Cache
+# https://docs.djangoproject.com/en/5.1/topics/cache/
+# The response cache versions, the authenticated users and the sign-in token buckets must
+# be seen by every server process: set REDIS_URL (redis://host:6379/0) whenever more than
+# one process serves the API. The local memory fallback is private to each process,
+# `manage.py check --deploy` rejects it (api.E001).
+
+if os.environ.get('REDIS_URL'):
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': os.environ['REDIS_URL'],
+        }
+    }
+else:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.locmem.LocMemCache',
+        }
+    }
+
+# Authenticated users: seconds kept in the shared cache, and seconds / entries of the
+# per-process copy (with a shared cache, other processes see user changes after at most
+# the local timeout)
+AUTH_USER_CACHE_TIMEOUT = 300
+AUTH_USER_LOCAL_CACHE_TIMEOUT = 5
+AUTH_USER_LOCAL_CACHE_SIZE = 10000
+
+# Password hashing pool of the sign-in endpoints: threads, calls allowed to wait for
+# one (more get a 503), and seconds a request waits for its result
+PASSWORD_HASHING_WORKERS = 2
+PASSWORD_HASHING_QUEUE_SIZE = 4
+PASSWORD_HASHING_TIMEOUT = 5
+
+# Bulk user import: users inserted per transaction, and password hashing processes of
+# the import_users command (None for one per core)
+USERS_IMPORT_BATCH_SIZE = 2000
+USERS_IMPORT_PROCESSES = None
+# Uploads to the import endpoint are imported by background threads of the web process:
+# threads, further imports allowed to wait for one (more get a 503), seconds the job
+# state is kept, and hashing processes per import (1 hashes in the job thread)
+USERS_IMPORT_JOB_WORKERS = 1
+USERS_IMPORT_JOB_QUEUE_SIZE = 4
+USERS_IMPORT_JOB_TIMEOUT = 86400
+USERS_IMPORT_ENDPOINT_PROCESSES = 1
+
+# Sign-in / registration token buckets: (capacity, tokens refilled per second), None disables
+AUTH_IP_BUCKET = (20, 0.5)
+AUTH_EMAIL_BUCKET = (5, 0.05)
+
+# Seconds a cached API response is kept (writes invalidate it immediately)
+RESPONSE_CACHE_TIMEOUT = 300
+
+# Build article list pages from SQL rows instead of running ArticleSerializer per row
+ARTICLES_FAST_LIST = True
+
+# Relevance of a keyword match in the article title and in the abstract (0 to 1)
+ARTICLES_SEARCH_WEIGHTS = {'title': 1.0, 'abstract': 0.4}
+
+# Article facets: default / largest 'facet_limit', and seconds a facets response is cached
+ARTICLES_FACETS_DEFAULT_LIMIT = 10
+ARTICLES_FACETS_MAX_LIMIT = 100
+ARTICLES_FACETS_CACHE_TIMEOUT = 30
+
+# Tag autocomplete: largest 'limit', and size / seconds of the per-process result cache
+TAGS_AUTOCOMPLETE_MAX_LIMIT = 50
+TAGS_AUTOCOMPLETE_CACHE_SIZE = 1024
+TAGS_AUTOCOMPLETE_CACHE_TIMEOUT = 60
+# Smallest pg_trgm word similarity of a typo-tolerant autocomplete match (0 to 1)
+TAGS_AUTOCOMPLETE_SIMILARITY = 0.3
+
+# Maximum number of articles accepted by one request to /api/articles/bulk/
+ARTICLES_BULK_MAX_BATCH_SIZE = 1000
+
+# Rows written per transaction by the CSV import
+ARTICLES_CSV_IMPORT_BATCH_SIZE = 5000
+
 REST_FRAMEWORK = {
     'DEFAULT_AUTHENTICATION_CLASSES': (
-        'rest_framework_simplejwt.authentication.JWTAuthentication',
+        # JWTAuthentication with the token user served from a cache
+        'api.authentication.CachedJWTAuthentication',
     ),
     'DEFAULT_PERMISSION_CLASSES': (
         'rest_framework.permissions.IsAuthenticated',
     ),
     'DEFAULT_FILTER_BACKENDS': (
         'django_filters.rest_framework.DjangoFilterBackend'),
-    'DEFAULT_PAGINATION_CLASS': 'rest_framework.pagination.LimitOffsetPagination',
+    'DEFAULT_PAGINATION_CLASS': 'api.pagination.CursorOrLimitOffsetPagination',
+    'DEFAULT_RENDERER_CLASSES': (
+        # orjson for application/json, MessagePack on 'Accept: application/msgpack'
+        'api.renderers.ORJSONRenderer',
+        'api.renderers.MessagePackRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ),
     'PAGE_SIZE': 100,
     'SEARCH_PARAM': 'keyword',
     'EXCEPTION_HANDLER': 'api.custom_exception_handler.custom_exception_handler',
@@ -118,8 +202,20 @@ SIMPLE_JWT = {
     'AUTH_HEADER_TYPES': ('Bearer',),
     'USER_ID_FIELD': 'id',
     'USER_ID_CLAIM': 'user_id',
+    'TOKEN_REFRESH_SERIALIZER': 'api.token_blacklist.TokenRefreshSerializer',
 }
 
+# Refresh token blacklist prefilter: tokens the Bloom filter is sized for (it is rebuilt
+# larger past that) and its false positive rate, seconds between the background catch-up
+# queries for tokens blacklisted by other processes, seconds each query reaches back
+# before the previous one (covers rows committed after their blacklisted_at), and
+# confirmed blacklisted tokens kept
+TOKEN_BLACKLIST_FILTER_CAPACITY = 100000
+TOKEN_BLACKLIST_FILTER_ERROR_RATE = 0.01
+TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL = 1
+TOKEN_BLACKLIST_FILTER_SYNC_OVERLAP = 60
+TOKEN_BLACKLIST_CONFIRMED_CACHE_SIZE = 10000
+
 # Password validation
 # https://docs.djangoproject.com/en/5.1/ref/settings/#auth-password-validators
 
@@ -0,0 +1,60 @@
+"""
+Compare the serializer and the serializer-free (ARTICLES_FAST_LIST) article list paths:
+latency of the full GET /api/articles/ view including JSON rendering, per page size.
+The response cache is disabled so every request builds its page.
+
+    python -m benchmarks.article_list_fast_path --articles 50000 --page-sizes 20 100
+"""
+import random
+
+from benchmarks.common import (
+    base_parser, benchmark_database, measure, seed_articles, setup_django, write_report
+)
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--page-sizes', type=int, nargs='+', default=[20, 100])
+    args = parser.parse_args()
+
+    setup_django()
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from api.articles.models import Article
+    from api.articles.views import ArticleView
+    from api.models import User
+
+    dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    with benchmark_database(keepdb=args.keepdb), override_settings(CACHES=dummy_cache):
+        if not Article.objects.exists():
+            seed_articles(args.articles, seed=args.seed)
+        user = User.objects.first()
+        factory = APIRequestFactory()
+        view = ArticleView.as_view()
+        total = Article.objects.count()
+
+        report = {'benchmark': 'article_list_fast_path', 'articles': total, 'page_sizes': {}}
+        for page_size in args.page_sizes:
+            case = {}
+            for name, fast in (('serializer', False), ('fast_path', True)):
+                rng = random.Random(args.seed)
+
+                def get_page(fast=fast, rng=rng):
+                    offset = rng.randrange(max(total - page_size, 1))
+                    request = factory.get('/api/articles/', {'limit': page_size, 'offset': offset},
+                                          HTTP_HOST='localhost')
+                    force_authenticate(request, user=user)
+                    with override_settings(ARTICLES_FAST_LIST=fast):
+                        response = view(request)
+                        response.render()
+                    assert response.status_code == 200, response.status_code
+
+                case[name] = measure(get_page, repeat=args.repeat)
+            case['speedup_p50'] = round(case['serializer']['p50_ms'] / case['fast_path']['p50_ms'], 2)
+            report['page_sizes'][page_size] = case
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,67 @@
+"""
+Compare the old DISTINCT + JOIN plan of the article author/tag filters with the
+EXISTS semi-join plan used by ArticleFilter, on a seeded dataset.
+
+    python -m benchmarks.article_m2m_filter --articles 200000 --explain
+"""
+from benchmarks.common import (
+    base_parser, benchmark_database, measure, seed_articles, setup_django, write_report
+)
+
+PAGE_SIZE = 100
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--articles', type=int, default=50000)
+    parser.add_argument('--users', type=int, default=2000)
+    parser.add_argument('--tags', type=int, default=500)
+    parser.add_argument('--explain', action='store_true', help='Include EXPLAIN ANALYZE output')
+    args = parser.parse_args()
+
+    setup_django()
+    from api.articles.filters import ArticleFilter
+    from api.articles.models import Article
+
+    with benchmark_database(keepdb=args.keepdb):
+        if not Article.objects.exists():
+            seed_articles(args.articles, users=args.users, tags=args.tags, seed=args.seed)
+        user_ids = list(Article.authors.through.objects.values_list('user_id', flat=True)[:3])
+        tag_ids = list(Article.tags.through.objects.values_list('tag_id', flat=True)[:3])
+
+        cases = {
+            'unfiltered': {},
+            'authors': {'authors': user_ids},
+            'tags': {'tags': tag_ids},
+            'authors_and_tags': {'authors': user_ids, 'tags': tag_ids},
+        }
+        report = {'benchmark': 'article_m2m_filter', 'articles': Article.objects.count(), 'cases': {}}
+        for name, values in cases.items():
+            # The previous plan: a DISTINCT over every column on top of the M2M joins
+            distinct_plan = Article.objects.all().distinct()
+            for field, ids in values.items():
+                distinct_plan = distinct_plan.filter(**{f'{field}__in': ids})
+            exists_plan = ArticleFilter(
+                {field: ','.join(map(str, ids)) for field, ids in values.items()},
+                queryset=Article.objects.all(),
+            ).qs
+
+            case = {}
+            for plan_name, queryset in (('distinct_join', distinct_plan), ('exists', exists_plan)):
+                def first_page(queryset=queryset):
+                    return list(queryset.order_by('id')[:PAGE_SIZE])
+
+                case[plan_name] = {
+                    'rows': queryset.count(),
+                    'count': measure(queryset.count, repeat=args.repeat),
+                    'first_page': measure(first_page, repeat=args.repeat),
+                }
+                if args.explain:
+                    case[plan_name]['explain'] = queryset.order_by('id')[:PAGE_SIZE].explain(analyze=True).splitlines()
+            report['cases'][name] = case
+
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
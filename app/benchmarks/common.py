@@ -0,0 +1,98 @@
+"""
+Shared helpers for the benchmark scripts.
+
+Benchmarks run against a throwaway test database created from the configured
+DATABASES settings, so they never touch real data. Run them from the app
+directory, for example:
+
+    python -m benchmarks.article_m2m_filter --articles 100000
+"""
+import argparse
+import json
+import os
+import statistics
+import sys
+import time
+from contextlib import contextmanager
+
+import django
+
+
+def setup_django():
+    os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'app.settings')
+    django.setup()
+
+
+def base_parser(description):
+    parser = argparse.ArgumentParser(description=description)
+    parser.add_argument('--repeat', type=int, default=20, help='Timed runs per case')
+    parser.add_argument('--seed', type=int, default=1, help='Random seed of the generated data')
+    parser.add_argument('--keepdb', action='store_true', help='Reuse the benchmark database between runs')
+    parser.add_argument('--output', help='Write the JSON report to this file instead of stdout')
+    return parser
+
+
+@contextmanager
+def benchmark_database(keepdb=False):
+    """Create (and afterwards destroy) a migrated test database"""
+    from django.db import connection
+    old_name = connection.settings_dict['NAME']
+    connection.creation.create_test_db(verbosity=0, autoclobber=True, keepdb=keepdb)
+    try:
+        yield connection
+    finally:
+        connection.creation.destroy_test_db(old_name, verbosity=0, keepdb=keepdb)
+
+
+def seed_articles(articles, users=1000, tags=500, authors_per_article=3, tags_per_article=4,
+                  seed=1, batch_size=5000):
+    """
+    Bulk insert users (password 'benchmark'), tags and articles with the seed_data command's
+    Zipf-distributed author/tag fan-out, without comments.
+    Returns the ids of the created users and tags.
+    """
+    from api.seeding import seed_data
+
+    user_ids, tag_ids, _ = seed_data(
+        users=users, tags=tags, articles=articles, comments=0, max_authors=authors_per_article,
+        max_tags=tags_per_article, password='benchmark', seed=seed, batch_size=batch_size,
+    )
+    return user_ids, tag_ids
+
+
+def measure(function, repeat=20, warmup=2):
+    """Run function repeatedly and return latency statistics in milliseconds"""
+    for _ in range(warmup):
+        function()
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        function()
+        timings.append((time.perf_counter() - start) * 1000)
+    timings.sort()
+    return {
+        'runs': repeat,
+        'mean_ms': round(statistics.fmean(timings), 3),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def percentile(sorted_values, percent):
+    if not sorted_values:
+        return 0.0
+    index = (len(sorted_values) - 1) * percent / 100
+    lower = int(index)
+    upper = min(lower + 1, len(sorted_values) - 1)
+    return sorted_values[lower] + (sorted_values[upper] - sorted_values[lower]) * (index - lower)
+
+
+def write_report(report, output=None):
+    text = json.dumps(report, indent=2, default=str)
+    if output:
+        with open(output, 'w') as handle:
+            handle.write(text + '\n')
+    else:
+        sys.stdout.write(text + '\n')
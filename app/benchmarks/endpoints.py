@@ -0,0 +1,121 @@
+"""
+Run every read endpoint at several data sizes and report latency percentiles and
+query counts as JSON, to compare across commits:
+
+    python -m benchmarks.endpoints --sizes 1000 10000 100000 --output before.json
+    git checkout other-branch
+    python -m benchmarks.endpoints --sizes 1000 10000 100000 --output after.json
+
+Each size is a number of articles; users, tags and comments scale with it (see
+--users-per-article etc.) and are added with the seed_data generator on top of the
+previous size. Requests go through the URL router and middleware with the response
+cache disabled, as an authenticated regular user.
+"""
+import subprocess
+
+from benchmarks.common import base_parser, benchmark_database, measure, setup_django, write_report
+
+
+def git_revision():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], capture_output=True, text=True, check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def endpoint_cases(article_id, tag_id, author_id):
+    """Name -> (path, query parameters, whether the response is streamed)"""
+    return {
+        'articles_list': ('/api/articles/', {'limit': 20}, False),
+        'articles_filter_tags': ('/api/articles/', {'tags': tag_id, 'limit': 20}, False),
+        'articles_filter_authors_year': ('/api/articles/', {'authors': author_id, 'year': 2020, 'limit': 20}, False),
+        'articles_keyword': ('/api/articles/', {'keyword': 'quantum network', 'limit': 20}, False),
+        'articles_ordering_title': ('/api/articles/', {'ordering': 'title', 'limit': 20}, False),
+        'articles_ordering_comments': ('/api/articles/', {'ordering': '-comment_count', 'limit': 20}, False),
+        'articles_deep_offset': ('/api/articles/', {'limit': 20, 'offset': 5000}, False),
+        'articles_facets': ('/api/articles/facets/', {}, False),
+        'articles_csv_export': ('/api/articles/export/csv/', {}, True),
+        'articles_csv_export_tag': ('/api/articles/export/csv/', {'tags': tag_id}, True),
+        'article_detail': (f'/api/articles/{article_id}/', {}, False),
+        'comments_list': ('/api/comments/', {'limit': 20}, False),
+        'comments_keyword': ('/api/comments/', {'keyword': 'climate', 'limit': 20}, False),
+        'article_comments': (f'/api/articles/{article_id}/comments/', {'limit': 20}, False),
+        'tags_autocomplete': ('/api/tags/autocomplete/', {'q': 'tag-1'}, False),
+    }
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--sizes', type=int, nargs='+', default=[1000, 10000, 50000], help='Article counts')
+    parser.add_argument('--users-per-article', type=float, default=0.1)
+    parser.add_argument('--tags-per-article', type=float, default=0.05)
+    parser.add_argument('--comments-per-article', type=float, default=3)
+    parser.add_argument('--cases', nargs='+', help='Only run these cases')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db import connection
+    from django.db.models import Count
+    from django.test import override_settings
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIClient
+    from api.articles.models import Article
+    from api.comments.models import Comment
+    from api.models import User
+    from api.seeding import seed_data
+    from api.tags.models import Tag
+
+    overrides = {
+        'CACHES': {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}},
+        'ALLOWED_HOSTS': ['*'],
+    }
+    report = {'benchmark': 'endpoints', 'revision': git_revision(), 'repeat': args.repeat, 'sizes': {}}
+    with benchmark_database(keepdb=args.keepdb), override_settings(**overrides):
+        seeded = Article.objects.count()
+        for size in sorted(args.sizes):
+            if size > seeded:
+                added = size - seeded
+                seed_data(
+                    users=max(1, round(added * args.users_per_article)),
+                    tags=max(1, round(added * args.tags_per_article)),
+                    articles=added, comments=round(added * args.comments_per_article),
+                    seed=args.seed + seeded,
+                )
+                seeded = size
+
+            # The most commented article, the most used tag and the most prolific author
+            article_id = Article.objects.order_by('-comment_count', 'id').values_list('id', flat=True).first()
+            tag_id = Tag.objects.annotate(uses=Count('article')).order_by('-uses', 'id').values_list('id', flat=True).first()
+            author_id = User.objects.annotate(uses=Count('article')).order_by('-uses', 'id').values_list('id', flat=True).first()
+            client = APIClient()
+            client.force_authenticate(User.objects.order_by('id').first())
+
+            cases = endpoint_cases(article_id, tag_id, author_id)
+            results = {}
+            for name, (path, params, streamed) in cases.items():
+                if args.cases and name not in args.cases:
+                    continue
+
+                def request(path=path, params=params, streamed=streamed):
+                    response = client.get(path, params)
+                    assert response.status_code == 200, (path, response.status_code)
+                    body = b''.join(response.streaming_content) if streamed else response.content
+                    return len(body)
+
+                result = measure(request, repeat=args.repeat)
+                with CaptureQueriesContext(connection) as queries:
+                    result['bytes'] = request()
+                result['queries'] = len(queries)
+                results[name] = result
+            report['sizes'][size] = {
+                'articles': Article.objects.count(),
+                'users': User.objects.count(),
+                'tags': Tag.objects.count(),
+                'comments': Comment.objects.count(),
+                'endpoints': results,
+            }
+    write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
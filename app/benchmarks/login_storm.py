@@ -0,0 +1,131 @@
+"""
+Measure article list latency while a storm of sign-in requests hits the same server.
+Each case starts gunicorn (one worker, --threads per --threads) with other hashing pool
+and throttle settings, runs the login clients in the background and the read load in
+the foreground, and reports the read percentiles and the status codes of the logins.
+
+    python -m benchmarks.login_storm --articles 20000 --threads 16 --login-clients 32
+
+Cases:
+- reads_only: no logins, the reference latency
+- unbounded: one hashing thread per request thread and no throttling, close to
+  hashing inline on the request workers
+- bounded: the PASSWORD_HASHING_* settings, no throttling
+- throttled: the PASSWORD_HASHING_* and AUTH_*_BUCKET settings
+"""
+import json
+import random
+import threading
+import time
+import urllib.error
+import urllib.request
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import base_parser, benchmark_database, seed_articles, setup_django, write_report
+from benchmarks.wsgi_vs_asgi import free_port, run_load, server_command, start_server
+
+
+def login_storm(base_url, clients, users, stop, seed):
+    """Send logins from clients threads until stop is set, return the status code counts"""
+    rng = random.Random(seed)
+    statuses = Counter()
+    lock = threading.Lock()
+
+    def client():
+        while not stop.is_set():
+            with lock:
+                i = rng.randrange(users) + 1
+            body = json.dumps({
+                'email': f'seed{i}@example.com', 'first_name': f'First{i}', 'last_name': f'Last{i}',
+                'password': 'benchmark',
+            }).encode()
+            request = urllib.request.Request(f'{base_url}/api/users/auth/token/login', data=body,
+                                             headers={'Content-Type': 'application/json'})
+            try:
+                with urllib.request.urlopen(request, timeout=60) as response:
+                    response.read()
+                    status = response.status
+            except urllib.error.HTTPError as error:
+                status = error.code
+            except urllib.error.URLError:
+                status = 'error'
+            with lock:
+                statuses[status] += 1
+
+    executor = ThreadPoolExecutor(max_workers=clients)
+    for _ in range(clients):
+        executor.submit(client)
+    return executor, statuses
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--threads', type=int, default=16, help='gunicorn threads')
+    parser.add_argument('--read-clients', type=int, default=8)
+    parser.add_argument('--login-clients', type=int, default=32)
+    parser.add_argument('--requests', type=int, default=400, help='Article list requests per case')
+    args = parser.parse_args()
+    # Fail before seeding when gunicorn is missing
+    server_command('wsgi', 0, args.threads)
+
+    setup_django()
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from api.articles.models import Article
+    from api.models import User
+
+    with benchmark_database(keepdb=args.keepdb) as connection:
+        if not Article.objects.exists():
+            seed_articles(args.articles, users=args.users, seed=args.seed)
+        token = str(RefreshToken.for_user(User.objects.first()).access_token)
+        max_offset = max(Article.objects.count() - 20, 1)
+        database_name = connection.settings_dict['NAME']
+        # The servers open their own connections to the benchmark database
+        connection.close()
+
+        no_throttle = {'AUTH_IP_BUCKET': None, 'AUTH_EMAIL_BUCKET': None}
+        cases = {
+            'reads_only': None,
+            'unbounded': {**no_throttle, 'PASSWORD_HASHING_WORKERS': args.threads,
+                          'PASSWORD_HASHING_QUEUE_SIZE': args.login_clients, 'PASSWORD_HASHING_TIMEOUT': 600},
+            'bounded': no_throttle,
+            'throttled': {},
+        }
+        report = {'benchmark': 'login_storm', 'articles': args.articles, 'threads': args.threads,
+                  'read_clients': args.read_clients, 'login_clients': args.login_clients, 'cases': {}}
+        for name, overrides in cases.items():
+            port = free_port()
+            process = start_server(
+                server_command('wsgi', port, args.threads), port, database_name,
+                settings_module='benchmarks.settings',
+                extra_env={'BENCHMARK_SETTINGS': json.dumps(overrides or {})},
+            )
+            base_url = f'http://127.0.0.1:{port}'
+            stop = threading.Event()
+            storm = None
+            try:
+                # Warm up the worker (imports, connections) before measuring
+                run_load(base_url, '/api/articles/', token, args.read_clients, args.read_clients * 2,
+                         max_offset, args.seed)
+                if overrides is not None:
+                    storm, statuses = login_storm(base_url, args.login_clients, args.users, stop, args.seed)
+                    # Let the storm build up before the reads start
+                    time.sleep(1)
+                case = run_load(base_url, '/api/articles/', token, args.read_clients, args.requests,
+                                max_offset, args.seed)
+                if storm is not None:
+                    stop.set()
+                    storm.shutdown(wait=True)
+                    case['logins'] = {str(status): count for status, count in sorted(statuses.items(), key=str)}
+                report['cases'][name] = case
+            finally:
+                stop.set()
+                process.terminate()
+                process.wait(timeout=30)
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
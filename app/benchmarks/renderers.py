@@ -0,0 +1,59 @@
+"""
+Compare render time and payload size of DRF's stdlib JSONRenderer, the orjson
+renderer and the MessagePack renderer on article and comment list pages.
+
+    python -m benchmarks.renderers --articles 5000 --page-size 100
+"""
+from benchmarks.common import (
+    base_parser, benchmark_database, measure, setup_django, write_report
+)
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--articles', type=int, default=5000)
+    parser.add_argument('--comments', type=int, default=20000)
+    parser.add_argument('--page-size', type=int, default=100)
+    args = parser.parse_args()
+
+    setup_django()
+    from rest_framework.renderers import JSONRenderer
+    from api.articles.models import Article
+    from api.articles.serializers import ArticleSerializer
+    from api.comments.models import Comment
+    from api.comments.serializers import CommentSerializer
+    from api.renderers import MessagePackRenderer, ORJSONRenderer
+    from api.seeding import seed_data
+
+    with benchmark_database(keepdb=args.keepdb):
+        if not Comment.objects.exists():
+            # Articles and comments from the seed_data generator, comment counters included
+            seed_data(articles=args.articles, comments=args.comments, password='benchmark', seed=args.seed)
+
+        pages = {
+            'articles': ArticleSerializer(
+                Article.objects.prefetch_related('authors', 'tags')[:args.page_size], many=True
+            ).data,
+            'comments': CommentSerializer(Comment.objects.all()[:args.page_size], many=True).data,
+        }
+        renderers = {
+            'json_stdlib': JSONRenderer(),
+            'orjson': ORJSONRenderer(),
+            'msgpack': MessagePackRenderer(),
+        }
+        report = {'benchmark': 'renderers', 'page_size': args.page_size, 'pages': {}}
+        for page_name, data in pages.items():
+            # Render the paginated envelope, as the list endpoints do
+            payload = {'count': 10 ** 6, 'next': None, 'previous': None, 'results': data}
+            case = {}
+            for name, renderer in renderers.items():
+                def render(renderer=renderer):
+                    return renderer.render(payload, renderer.media_type, {})
+
+                case[name] = {'bytes': len(render()), **measure(render, repeat=args.repeat)}
+            report['pages'][page_name] = case
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
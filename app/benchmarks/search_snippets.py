@@ -0,0 +1,65 @@
+"""
+Measure the cost of search snippets (ts_headline) on GET /api/articles/?keyword=
+as the number of matching articles grows. Snippets are computed for the returned
+page only, so the difference between the snippet and plain requests should stay
+flat while ranking the matches gets slower.
+
+    python -m benchmarks.search_snippets --articles 50000 --matches 100 1000 10000 50000
+"""
+from benchmarks.common import (
+    base_parser, benchmark_database, measure, seed_articles, setup_django, write_report
+)
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--matches', type=int, nargs='+', default=[100, 1000, 10000, 20000])
+    parser.add_argument('--page-size', type=int, default=20)
+    args = parser.parse_args()
+
+    setup_django()
+    from django.db.models import F, TextField, Value
+    from django.db.models.functions import Concat
+    from django.test import override_settings
+    from rest_framework.test import APIRequestFactory, force_authenticate
+    from api.articles.models import Article
+    from api.articles.views import ArticleView
+    from api.models import User
+
+    dummy_cache = {'default': {'BACKEND': 'django.core.cache.backends.dummy.DummyCache'}}
+    with benchmark_database(keepdb=args.keepdb), override_settings(CACHES=dummy_cache):
+        if not Article.objects.exists():
+            seed_articles(args.articles, seed=args.seed)
+        article_ids = list(Article.objects.order_by('id').values_list('id', flat=True))
+        # One marker word per case, so each keyword matches exactly that many articles
+        for matches in args.matches:
+            Article.objects.filter(pk__in=article_ids[:matches]).update(
+                abstract=Concat(F('abstract'), Value(f' marker{matches}'), output_field=TextField())
+            )
+        user = User.objects.first()
+        factory = APIRequestFactory()
+        view = ArticleView.as_view()
+
+        report = {'benchmark': 'search_snippets', 'articles': len(article_ids),
+                  'page_size': args.page_size, 'matches': {}}
+        for matches in args.matches:
+            case = {}
+            for name, snippet in (('plain', 'false'), ('snippet', 'true')):
+                def search(snippet=snippet):
+                    request = factory.get('/api/articles/', {
+                        'keyword': f'marker{matches}', 'snippet': snippet, 'limit': args.page_size,
+                    }, HTTP_HOST='localhost')
+                    force_authenticate(request, user=user)
+                    response = view(request)
+                    response.render()
+                    assert response.status_code == 200, response.status_code
+
+                case[name] = measure(search, repeat=args.repeat)
+            case['snippet_cost_p50_ms'] = round(case['snippet']['p50_ms'] - case['plain']['p50_ms'], 3)
+            report['matches'][matches] = case
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
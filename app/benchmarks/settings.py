@@ -0,0 +1,11 @@
+"""
+Settings of the servers the benchmarks start: the application settings, with the
+overrides of the BENCHMARK_SETTINGS environment variable (a JSON object) applied.
+"""
+import json
+import os
+
+from app.settings import *  # noqa: F401,F403
+
+for _name, _value in json.loads(os.environ.get('BENCHMARK_SETTINGS', '{}')).items():
+    globals()[_name] = _value
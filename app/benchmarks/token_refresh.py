@@ -0,0 +1,100 @@
+"""
+Measure POST /api/users/auth/token/refresh/ (with rotation and blacklisting) as the
+token_blacklist tables grow, with simplejwt's serializer and with the prefiltered one
+of api.token_blacklist, then time purge_expired_tokens over the full tables.
+
+    python -m benchmarks.token_refresh --tokens 0 100000 1000000
+"""
+import time
+from io import StringIO
+
+from benchmarks.common import base_parser, benchmark_database, measure, setup_django, write_report
+
+
+def seed_tokens(cursor, count, offset):
+    """Insert count outstanding tokens, every one of them blacklisted"""
+    cursor.execute(
+        "INSERT INTO token_blacklist_outstandingtoken (jti, token, created_at, expires_at)"
+        " SELECT md5('benchmark' || i), 'benchmark', now(), now() + interval '1 day'"
+        " FROM generate_series(%s, %s) AS i",
+        [offset + 1, offset + count],
+    )
+    cursor.execute(
+        "INSERT INTO token_blacklist_blacklistedtoken (token_id, blacklisted_at)"
+        " SELECT id, now() FROM token_blacklist_outstandingtoken o WHERE token = 'benchmark'"
+        " AND NOT EXISTS (SELECT 1 FROM token_blacklist_blacklistedtoken b WHERE b.token_id = o.id)"
+    )
+    cursor.execute('ANALYZE')
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--tokens', type=int, nargs='+', default=[0, 100000, 500000],
+                        help='Blacklisted tokens in the tables, cumulative')
+    args = parser.parse_args()
+
+    setup_django()
+    from django.conf import settings
+    from django.core.management import call_command
+    from django.db import connection
+    from django.test.utils import CaptureQueriesContext
+    from rest_framework.test import APIRequestFactory
+    from rest_framework_simplejwt.serializers import TokenRefreshSerializer as StockRefreshSerializer
+    from rest_framework_simplejwt.token_blacklist.models import OutstandingToken
+    from rest_framework_simplejwt.tokens import RefreshToken as StockRefreshToken
+    from rest_framework_simplejwt.utils import aware_utcnow
+    from rest_framework_simplejwt.views import TokenRefreshView
+    from api import token_blacklist
+    from api.models import User
+
+    with benchmark_database(keepdb=args.keepdb):
+        user = User.objects.create_user('bench@example.com', 'Bench', 'User', password_hash='!')
+        factory = APIRequestFactory()
+        views = {
+            'simplejwt': TokenRefreshView.as_view(serializer_class=StockRefreshSerializer),
+            'prefiltered': TokenRefreshView.as_view(serializer_class=token_blacklist.TokenRefreshSerializer),
+        }
+
+        report = {'benchmark': 'token_refresh', 'tokens': {}}
+        seeded = 0
+        for tokens in sorted(args.tokens):
+            with connection.cursor() as cursor:
+                seed_tokens(cursor, tokens - seeded, seeded)
+            seeded = tokens
+            case = {}
+            for name, view in views.items():
+                # A fresh prefilter per table size, so its build is part of the warmup
+                token_blacklist._prefilter = None
+                current = {'refresh': str(StockRefreshToken.for_user(user))}
+
+                def refresh():
+                    request = factory.post('/api/users/auth/token/refresh/', {'refresh': current['refresh']},
+                                           format='json', HTTP_HOST='localhost')
+                    response = view(request)
+                    assert response.status_code == 200, response.data
+                    current['refresh'] = response.data['refresh']
+
+                timings = measure(refresh, repeat=args.repeat)
+                timings['refreshes_per_second'] = round(1000 / timings['mean_ms'], 1)
+                with CaptureQueriesContext(connection) as queries:
+                    refresh()
+                timings['queries'] = len(queries)
+                case[name] = timings
+            report['tokens'][tokens] = case
+
+        OutstandingToken.objects.update(expires_at=aware_utcnow())
+        total = OutstandingToken.objects.count()
+        started = time.perf_counter()
+        call_command('purge_expired_tokens', stdout=StringIO())
+        elapsed = time.perf_counter() - started
+        report['purge'] = {
+            'tokens': total,
+            'seconds': round(elapsed, 3),
+            'tokens_per_second': round(total / elapsed, 1) if elapsed else None,
+        }
+        report['prefilter_sync_interval'] = settings.TOKEN_BLACKLIST_FILTER_SYNC_INTERVAL
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,60 @@
+"""
+Compare the throughput of creating users one by one with create_user() (what
+RegisterView does) with the bulk importer at several hashing process counts.
+
+    python -m benchmarks.user_import --users 2000 --processes 1 4 8
+
+Each importer run loads the same generated CSV into an empty users table; the
+create_user() baseline runs on --serial-users of them.
+"""
+import io
+import multiprocessing
+import time
+
+from benchmarks.common import base_parser, benchmark_database, setup_django, write_report
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--users', type=int, default=1000)
+    parser.add_argument('--serial-users', type=int, default=50)
+    parser.add_argument('--processes', type=int, nargs='+', default=[1, multiprocessing.cpu_count()])
+    parser.add_argument('--batch-size', type=int, default=2000)
+    args = parser.parse_args()
+
+    setup_django()
+    from api.models import User
+    from api.users.user_import import UserImporter
+
+    content = "email,first_name,last_name,password\n" + "".join(
+        f"import{i}@example.com,First{i},Last{i},password-{i}\n" for i in range(args.users)
+    )
+    with benchmark_database(keepdb=args.keepdb):
+        report = {'benchmark': 'user_import', 'users': args.users, 'cpus': multiprocessing.cpu_count()}
+
+        User.objects.all().delete()
+        started = time.perf_counter()
+        for i in range(args.serial_users):
+            User.objects.create_user(f'serial{i}@example.com', f'First{i}', f'Last{i}', password=f'password-{i}')
+        elapsed = time.perf_counter() - started
+        report['create_user'] = {
+            'users': args.serial_users,
+            'seconds': round(elapsed, 3),
+            'users_per_second': round(args.serial_users / elapsed, 1),
+        }
+
+        report['importer'] = {}
+        for processes in args.processes:
+            User.objects.all().delete()
+            summary = UserImporter(io.StringIO(content), batch_size=args.batch_size, processes=processes).run()
+            assert summary['inserted'] == args.users, summary
+            report['importer'][processes] = {
+                'seconds': summary['seconds'],
+                'users_per_second': summary['users_per_second'],
+                'speedup': round(summary['users_per_second'] / report['create_user']['users_per_second'], 2),
+            }
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()
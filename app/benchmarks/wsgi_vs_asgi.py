@@ -0,0 +1,141 @@
+"""
+Serve the same seeded database with a WSGI server (sync views) and an ASGI server
+(async views), then load both with the same number of concurrent clients and compare
+latency percentiles and throughput.
+
+    python -m benchmarks.wsgi_vs_asgi --articles 50000 --concurrency 1 16 64
+
+The WSGI side uses gunicorn with one worker and --threads equal to the concurrency;
+the ASGI side uses uvicorn with one worker. Both are in requirements.txt.
+Both servers run as subprocesses of this script on free local ports.
+"""
+import os
+import random
+import shutil
+import socket
+import subprocess
+import time
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+
+from benchmarks.common import (
+    base_parser, benchmark_database, percentile, seed_articles, setup_django, write_report
+)
+
+APP_DIRECTORY = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def free_port():
+    with socket.socket() as sock:
+        sock.bind(('127.0.0.1', 0))
+        return sock.getsockname()[1]
+
+
+def server_command(kind, port, threads):
+    server = 'uvicorn' if kind == 'asgi' else 'gunicorn'
+    if shutil.which(server) is None:
+        raise RuntimeError(f"{server} is not installed, run pip install -r requirements.txt")
+    if kind == 'asgi':
+        return ['uvicorn', 'app.asgi:application', '--port', str(port), '--workers', '1',
+                '--no-access-log', '--log-level', 'warning']
+    return ['gunicorn', 'app.wsgi:application', '--bind', f'127.0.0.1:{port}', '--workers', '1',
+            '--threads', str(threads), '--log-level', 'warning']
+
+
+def start_server(command, port, database_name, settings_module='app.settings', extra_env=None):
+    env = dict(os.environ, DB_NAME=database_name, DJANGO_SETTINGS_MODULE=settings_module, **(extra_env or {}))
+    process = subprocess.Popen(command, cwd=APP_DIRECTORY, env=env,
+                               stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL)
+    deadline = time.monotonic() + 30
+    while time.monotonic() < deadline:
+        try:
+            with socket.create_connection(('127.0.0.1', port), timeout=0.5):
+                return process
+        except OSError:
+            time.sleep(0.2)
+    process.terminate()
+    raise RuntimeError(f"{command[0]} did not start on port {port}")
+
+
+def run_load(base_url, path, token, concurrency, requests, max_offset, seed):
+    """Issue requests from concurrency client threads, return latency stats and throughput"""
+    rng = random.Random(seed)
+    # Random offsets keep the response cache from answering the requests
+    urls = [f"{base_url}{path}?limit=20&offset={rng.randrange(max_offset)}" for _ in range(requests)]
+    headers = {'Authorization': f'Bearer {token}'}
+
+    def fetch(url):
+        start = time.perf_counter()
+        try:
+            with urllib.request.urlopen(urllib.request.Request(url, headers=headers), timeout=60) as response:
+                response.read()
+                ok = response.status == 200
+        except urllib.error.URLError:
+            ok = False
+        return (time.perf_counter() - start) * 1000, ok
+
+    started = time.perf_counter()
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        results = list(executor.map(fetch, urls))
+    elapsed = time.perf_counter() - started
+
+    timings = sorted(timing for timing, _ in results)
+    return {
+        'requests': requests,
+        'errors': sum(1 for _, ok in results if not ok),
+        'requests_per_second': round(requests / elapsed, 1),
+        'p50_ms': round(percentile(timings, 50), 3),
+        'p95_ms': round(percentile(timings, 95), 3),
+        'p99_ms': round(percentile(timings, 99), 3),
+        'max_ms': round(timings[-1], 3),
+    }
+
+
+def main():
+    parser = base_parser(__doc__)
+    parser.add_argument('--articles', type=int, default=20000)
+    parser.add_argument('--concurrency', type=int, nargs='+', default=[1, 8, 32])
+    parser.add_argument('--requests', type=int, default=400, help='Requests per concurrency level')
+    args = parser.parse_args()
+    # Fail before seeding when a server is missing
+    for kind in ('wsgi', 'asgi'):
+        server_command(kind, 0, 1)
+
+    setup_django()
+    from rest_framework_simplejwt.tokens import RefreshToken
+    from api.articles.models import Article
+    from api.models import User
+
+    with benchmark_database(keepdb=args.keepdb) as connection:
+        if not Article.objects.exists():
+            seed_articles(args.articles, seed=args.seed)
+        token = str(RefreshToken.for_user(User.objects.first()).access_token)
+        max_offset = max(Article.objects.count() - 20, 1)
+        database_name = connection.settings_dict['NAME']
+        # The servers open their own connections to the benchmark database
+        connection.close()
+
+        report = {'benchmark': 'wsgi_vs_asgi', 'articles': args.articles, 'servers': {}}
+        for kind, path in (('wsgi', '/api/articles/'), ('asgi', '/api/articles/async/')):
+            report['servers'][kind] = {'path': path, 'concurrency': {}}
+            for concurrency in args.concurrency:
+                port = free_port()
+                command = server_command(kind, port, concurrency)
+                report['servers'][kind]['server'] = command[0]
+                process = start_server(command, port, database_name)
+                try:
+                    base_url = f'http://127.0.0.1:{port}'
+                    # Warm up the worker (imports, connections) before measuring
+                    run_load(base_url, path, token, concurrency, concurrency * 2, max_offset, args.seed)
+                    report['servers'][kind]['concurrency'][concurrency] = run_load(
+                        base_url, path, token, concurrency, args.requests, max_offset, args.seed
+                    )
+                finally:
+                    process.terminate()
+                    process.wait(timeout=30)
+        write_report(report, args.output)
+
+
+if __name__ == '__main__':
+    main()